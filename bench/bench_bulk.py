@@ -0,0 +1,48 @@
+""" Throughput of OntId.from_many vs constructing OntIds one at a time
+
+    python bench/bench_bulk.py [n-identifiers] [n-distinct]
+"""
+import sys
+import time
+import ontquery as oq
+
+oq.OntCuries({'UBERON': 'http://purl.obolibrary.org/obo/UBERON_',
+              'GO': 'http://purl.obolibrary.org/obo/GO_',
+              'ILX': 'http://uri.interlex.org/base/ilx_',
+              'NCBITaxon': 'http://purl.obolibrary.org/obo/NCBITaxon_',})
+
+
+def make_inputs(n, distinct):
+    prefixes = sorted(oq.OntCuries)
+    out = []
+    for i in range(n):
+        j = i % distinct
+        prefix = prefixes[j % len(prefixes)]
+        curie = f'{prefix}:{j:07}'
+        out.append(curie if i % 2 else oq.OntCuries[prefix] + curie.split(':')[1])
+
+    return out
+
+
+def timed(name, function, n):
+    start = time.perf_counter()
+    out = function()
+    elapsed = time.perf_counter() - start
+    print(f'{name:<24} {elapsed:8.3f} s {n / elapsed:12.0f} ids/s')
+    return out
+
+
+def main(n=1000000, distinct=100000):
+    inputs = make_inputs(n, distinct)
+    print(f'{n} inputs {distinct} distinct, half curies half iris')
+    one = timed('[OntId(c) for c in ...]', lambda: [oq.OntId(c) for c in inputs], n)
+    many = timed('OntId.from_many', lambda: oq.OntId.from_many(inputs), n)
+    assert one == many
+    timed('OntCuries.expand_many', lambda: oq.OntCuries.expand_many(
+        [c for c in inputs if not c.startswith('http')]), n // 2)
+    timed('OntCuries.qname_many', lambda: oq.OntCuries.qname_many(
+        [c for c in inputs if c.startswith('http')]), n // 2)
+
+
+if __name__ == '__main__':
+    main(*(int(a) for a in sys.argv[1:]))
@@ -0,0 +1,40 @@
+""" Memory per identifier for OntId vs CompactOntId
+
+    python bench/bench_compact.py [n-identifiers]
+"""
+import sys
+import tracemalloc
+import ontquery as oq
+from ontquery.terms import CompactOntId
+
+oq.OntCuries({'UBERON': 'http://purl.obolibrary.org/obo/UBERON_',
+              'ILX': 'http://uri.interlex.org/base/ilx_',})
+
+
+def measure(cls, iris):
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    ids = [cls(iri) for iri in iris]
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    # don't count the list that holds them
+    return (after - before - sys.getsizeof(ids)) / len(ids), ids
+
+
+def main(n=100000):
+    # the qname memo would otherwise be counted against whichever class runs first
+    oq.OntCuries.set_qname_cache_size(0)
+    iris = [f'http://purl.obolibrary.org/obo/UBERON_{i:07}' if i % 2 else
+            f'http://uri.interlex.org/base/ilx_{i:07}'
+            for i in range(n)]
+    baseline, _ = measure(str, iris)  # fresh copies would be the same size as the input
+    for cls in (oq.OntId, CompactOntId):
+        per, ids = measure(cls, iris)
+        assert ids[1].curie == 'UBERON:0000001'
+        print(f'{cls.__name__:<14} {per:8.1f} bytes/identifier')
+
+    print(f'{"str iri":<14} {sys.getsizeof(iris[1]):8.1f} bytes/identifier')
+
+
+if __name__ == '__main__':
+    main(*(int(a) for a in sys.argv[1:]))
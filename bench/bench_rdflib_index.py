@@ -0,0 +1,92 @@
+""" Compare rdflibLocal queries with and without the GraphIndex
+
+    python bench/bench_rdflib_index.py [n-classes]
+
+Builds a synthetic ontology with n classes (about 6 triples each, so the
+default 500000 classes is about 3 million triples) in a subClassOf tree
+with labels, synonyms, and definitions, then times identifier lookups
+and depth traversals and reports the memory used by the index.
+"""
+import sys
+import random
+import tracemalloc
+from time import perf_counter
+import rdflib
+import ontquery as oq
+
+try:
+    from pyontutils.namespaces import PREFIXES as CURIE_MAP
+except ModuleNotFoundError:
+    from ontquery.plugins.namespaces.nifstd import CURIE_MAP
+
+oq.OntCuries(CURIE_MAP)
+OBO = 'http://purl.obolibrary.org/obo/'
+
+
+def make_graph(n):
+    g = rdflib.Graph()
+    g.bind('UBERON', OBO + 'UBERON_')
+    sco = rdflib.RDFS.subClassOf
+    syn = rdflib.URIRef('http://www.geneontology.org/formats/oboInOwl#hasExactSynonym')
+    dfn = rdflib.URIRef('http://purl.obolibrary.org/obo/IAO_0000115')
+    for i in range(n):
+        s = rdflib.URIRef(f'{OBO}UBERON_{i:07}')
+        g.add((s, rdflib.RDF.type, rdflib.OWL.Class))
+        g.add((s, rdflib.RDFS.label, rdflib.Literal(f'class {i}')))
+        g.add((s, syn, rdflib.Literal(f'synonym {i}')))
+        g.add((s, dfn, rdflib.Literal(f'the definition of class {i}')))
+        if i:
+            g.add((s, sco, rdflib.URIRef(f'{OBO}UBERON_{(i - 1) // 4:07}')))
+            g.add((s, sco, rdflib.URIRef(f'{OBO}UBERON_{random.randrange(i):07}')))
+
+    return g
+
+
+def run(remote, curies, depth):
+    sco = oq.OntId('rdfs:subClassOf')
+    start = perf_counter()
+    for curie in curies:
+        for result in remote.query(curie=curie):
+            pass
+
+    lookup = perf_counter() - start
+    start = perf_counter()
+    for curie in curies:
+        for result in remote.query(curie=curie, predicates=(sco,), depth=depth):
+            pass
+
+    traverse = perf_counter() - start
+    return lookup, traverse
+
+
+def main(n=500000, queries=2000, depth=5):
+    random.seed(0)
+    start = perf_counter()
+    graph = make_graph(n)
+    print(f'triples: {len(graph)} built in {perf_counter() - start:.1f}s')
+
+    class OntTerm(oq.OntTerm): pass
+    plain = oq.plugin.get('rdflib')(graph)
+    plain.use_index = False
+    plain.setup(instrumented=OntTerm)
+    indexed = oq.plugin.get('rdflib')(graph)
+    indexed.setup(instrumented=OntTerm)
+
+    tracemalloc.start()
+    start = perf_counter()
+    index = indexed.index()
+    build = perf_counter() - start
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f'index: {len(index)} edges built in {build:.1f}s using {size / 2 ** 20:.0f} MiB')
+
+    curies = [f'UBERON:{random.randrange(n):07}' for _ in range(queries)]
+    for name, remote in (('rdflib store', plain), ('GraphIndex  ', indexed)):
+        run(remote, curies[:10], depth)  # warm
+        lookup, traverse = run(remote, curies, depth)
+        print(f'{name} lookup {lookup / queries * 1e6:8.1f} us  '
+              f'depth={depth} traversal {traverse / queries * 1e6:8.1f} us')
+
+
+if __name__ == '__main__':
+    main(*(int(a) for a in sys.argv[1:]))
@@ -0,0 +1,55 @@
+""" Compare starting rdflibLocal from turtle with starting it from a snapshot
+
+    python bench/bench_rdflib_snapshot.py [n-classes]
+
+Uses the synthetic ontology from bench_rdflib_index, writes it as turtle
+and as a snapshot, then times how long each takes until the first
+identifier lookup and depth traversal have been answered.
+"""
+import os
+import sys
+import random
+import tempfile
+from time import perf_counter
+import rdflib
+import ontquery as oq
+from bench_rdflib_index import make_graph
+
+
+def first_query(remote, curie):
+    class OntTerm(oq.OntTerm): pass
+    remote.setup(instrumented=OntTerm)
+    sco = oq.OntId('rdfs:subClassOf')
+    return list(remote.query(curie=curie, predicates=(sco,), depth=5))
+
+
+def main(n=200000):
+    random.seed(0)
+    graph = make_graph(n)
+    rdflibLocal = oq.plugin.get('rdflib')
+    curie = f'UBERON:{n - 1:07}'
+    with tempfile.TemporaryDirectory() as directory:
+        ttl = os.path.join(directory, 'graph.ttl')
+        snapshot = os.path.join(directory, 'graph.snapshot')
+        graph.serialize(ttl, format='turtle')
+        start = perf_counter()
+        rdflibLocal(graph).snapshot(snapshot)
+        print(f'triples: {len(graph)} snapshot written in {perf_counter() - start:.1f}s')
+        print(f'turtle {os.path.getsize(ttl) / 2 ** 20:.0f} MiB  '
+              f'snapshot {os.path.getsize(snapshot) / 2 ** 20:.0f} MiB')
+
+        start = perf_counter()
+        parsed = rdflib.Graph()
+        parsed.parse(ttl, format='turtle')
+        first_query(rdflibLocal(parsed), curie)
+        print(f'turtle   first answer after {perf_counter() - start:8.3f}s')
+
+        start = perf_counter()
+        remote = rdflibLocal.from_snapshot(snapshot)
+        first_query(remote, curie)
+        print(f'snapshot first answer after {perf_counter() - start:8.3f}s')
+        remote.graph.close()
+
+
+if __name__ == '__main__':
+    main(*(int(a) for a in sys.argv[1:]))
@@ -0,0 +1,52 @@
+""" Compare the dict of dicts namespace trie with trie.PrefixIndex
+
+    python bench/bench_trie.py [n-namespaces]
+"""
+import sys
+from timeit import timeit
+from ontquery import trie
+
+
+def make_namespaces(n):
+    try:
+        from pyontutils.namespaces import PREFIXES
+        namespaces = sorted(set(PREFIXES.values()))
+    except ModuleNotFoundError:
+        namespaces = []
+
+    # lots of siblings under one host, the SciGraph getCuries case
+    namespaces += [f'http://purl.obolibrary.org/obo/PFX{i}_' for i in range(n)]
+    return namespaces
+
+
+def make_iris(namespaces, n=10000):
+    return [namespaces[i % len(namespaces)] + f'{i:07}' for i in range(n)]
+
+
+def dict_trie(namespaces):
+    root = {}
+    for ns in namespaces:
+        trie.insert_trie(root, ns)
+
+    return root
+
+
+def main(n_namespaces=500):
+    namespaces = make_namespaces(n_namespaces)
+    iris = make_iris(namespaces)
+    old = dict_trie(namespaces)
+    new = trie.PrefixIndex(namespaces)
+    assert all(trie.get_longest_namespace(old, i) == new.longest(i) for i in iris)
+
+    number = 5
+    t_old = timeit(lambda: [trie.get_longest_namespace(old, i) for i in iris], number=number)
+    t_new = timeit(lambda: [new.longest(i) for i in iris], number=number)
+    n = len(iris) * number
+    print(f'namespaces: {len(namespaces)} lookups: {n}')
+    print(f'dict trie     {t_old / n * 1e6:8.3f} us/lookup')
+    print(f'PrefixIndex   {t_new / n * 1e6:8.3f} us/lookup')
+    print(f'speedup       {t_old / t_new:8.2f}x')
+
+
+if __name__ == '__main__':
+    main(*(int(a) for a in sys.argv[1:]))
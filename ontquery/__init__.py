@@ -1,7 +1,7 @@
 from ontquery.query import OntQuery, OntQueryCli
-from ontquery.terms import OntCuries, OntId, OntTerm
+from ontquery.terms import OntCuries, OntId, OntTerm, CompactOntId
 from ontquery import plugin
 
-__all__ = ['OntCuries', 'OntId', 'OntTerm', 'OntQuery', 'OntQueryCli']
+__all__ = ['OntCuries', 'OntId', 'OntTerm', 'CompactOntId', 'OntQuery', 'OntQueryCli']
 
 __version__ = '0.2.11'
@@ -0,0 +1,317 @@
+"""
+Caches for the results that services return to OntQuery.
+
+The persistent cache can be managed from the command line.
+
+    python -m ontquery.cache info  <path>
+    python -m ontquery.cache purge <path> [--expired] [--ttl=SECONDS]
+    python -m ontquery.cache warm  <path> <service-plugin> <identifiers-file>
+"""
+
+import json
+import sys
+import time
+import zlib
+import sqlite3
+import threading
+from ontquery.utils import LRUCache, CacheInfo, freeze, log
+
+
+class QueryCache:
+    """ In memory LRU cache for the results of OntService.query keyed on
+        the service and the normalized arguments passed to it by OntQuery.
+
+        Entries older than ttl seconds are treated as missing.
+        Services with cache_results = False are never cached. """
+
+    def __init__(self, maxsize=4096, ttl=None, timer=time.monotonic):
+        self.ttl = ttl
+        self.timer = timer
+        self.expired = 0
+        self._lru = LRUCache(maxsize)
+
+    @staticmethod
+    def key(service, kwargs):
+        return service, freeze(kwargs)
+
+    def get(self, service, kwargs):
+        """ the cached results tuple or None """
+        key = self.key(service, kwargs)
+        entry = self._lru.get(key)
+        if entry is None:
+            return None
+
+        expires, results = entry
+        if expires is not None and self.timer() >= expires:
+            self.expired += 1
+            # an expired hit is a miss
+            self._lru.hits -= 1
+            self._lru.misses += 1
+            try:
+                del self._lru[key]
+            except KeyError:
+                pass
+
+            return None
+
+        return results
+
+    def set(self, service, kwargs, results):
+        expires = None if self.ttl is None else self.timer() + self.ttl
+        self._lru[self.key(service, kwargs)] = expires, tuple(results)
+
+    def query(self, service, kwargs):
+        """ service.query(**kwargs) going through the cache """
+        if not getattr(service, 'cache_results', True):
+            return service.query(**kwargs)
+
+        results = self.get(service, kwargs)
+        if results is None:
+            results = tuple(service.query(**kwargs))
+            self.set(service, kwargs, results)
+
+        return results
+
+    async def aquery(self, service, kwargs):
+        """ await service.aquery(**kwargs) going through the cache """
+        if not getattr(service, 'cache_results', True):
+            return await service.aquery(**kwargs)
+
+        results = self.get(service, kwargs)
+        if results is None:
+            results = tuple(await service.aquery(**kwargs))
+            self.set(service, kwargs, results)
+
+        return results
+
+    def invalidate(self, service=None):
+        """ drop everything, or only the entries for service """
+        if service is None:
+            self._lru.clear()
+        else:
+            for key in self._lru:
+                if key[0] is service:
+                    try:
+                        del self._lru[key]
+                    except KeyError:
+                        pass
+
+    clear = invalidate
+
+    def info(self):
+        return self._lru.info()
+
+    def __len__(self):
+        return len(self._lru)
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({self.info()}, ttl={self.ttl})'
+
+
+def _encode(value):
+    """ QueryResult values -> json, OntIds and uris are tagged so that
+        they can be rebuilt with the OntId class of the service """
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    elif isinstance(value, str):
+        if type(value) == str:
+            return value
+        elif hasattr(value, 'curie') and hasattr(value, 'iri'):  # OntId
+            return {'@id': str(value)}
+        elif type(value).__name__ == 'URIRef':
+            return {'@uri': str(value)}
+        else:
+            return str(value)
+    elif isinstance(value, tuple):
+        return {'@tuple': [_encode(v) for v in value]}
+    elif isinstance(value, list):
+        return [_encode(v) for v in value]
+    elif isinstance(value, dict):
+        return {'@dict': [[_encode(k), _encode(v)] for k, v in value.items()]}
+    else:
+        return {'@str': str(value)}  # dates and friends from Literal.toPython
+
+
+def _decode(value, OntId):
+    if isinstance(value, list):
+        return [_decode(v, OntId) for v in value]
+    elif not isinstance(value, dict):
+        return value
+    elif '@id' in value:
+        return OntId(value['@id'])
+    elif '@tuple' in value:
+        return tuple(_decode(v, OntId) for v in value['@tuple'])
+    elif '@dict' in value:
+        return {_decode(k, OntId): _decode(v, OntId) for k, v in value['@dict']}
+    elif '@uri' in value:
+        try:
+            from rdflib import URIRef
+            return URIRef(value['@uri'])
+        except ModuleNotFoundError:
+            return value['@uri']
+    else:
+        return value['@str']
+
+
+class SqliteQueryCache(QueryCache):
+    """ Persistent cache for the results of OntService.query stored in sqlite.
+
+        Entries are keyed by OntService.identity and the normalized query
+        arguments. Results are stored as compressed json, the source of
+        each result is the service passed to get and _graph is dropped.
+        A change to version discards existing entries. """
+
+    version = 1
+    _skip = '_graph', 'source'
+
+    def __init__(self, path, ttl=None, timer=time.time):
+        self.path = path
+        self.ttl = ttl
+        self.timer = timer
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._setup()
+
+    def _setup(self):
+        with self._lock, self._conn as conn:
+            conn.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)')
+            row = conn.execute('SELECT value FROM meta WHERE key = ?', ('version',)).fetchone()
+            if row is None or int(row[0]) != self.version:
+                if row is not None:
+                    log.info(f'{self.path} cache version {row[0]} != {self.version}, purging')
+
+                conn.execute('DROP TABLE IF EXISTS results')
+                conn.execute('INSERT OR REPLACE INTO meta VALUES (?, ?)',
+                             ('version', str(self.version)))
+
+            conn.execute('CREATE TABLE IF NOT EXISTS results ('
+                         'service TEXT, key TEXT, created REAL, results BLOB, '
+                         'PRIMARY KEY (service, key))')
+
+    @staticmethod
+    def key(service, kwargs):
+        return service.identity, json.dumps(_encode(freeze(kwargs)), sort_keys=True)
+
+    def _dumps(self, results):
+        records = [{k: _encode(v) for k, v in result.items() if k not in self._skip}
+                   for result in results]
+        return zlib.compress(json.dumps(records, separators=(',', ':')).encode())
+
+    def _loads(self, service, blob, kwargs):
+        return tuple(service.QueryResult(kwargs, source=service,
+                                         **{k: _decode(v, service.OntId)
+                                            for k, v in record.items()})
+                     for record in json.loads(zlib.decompress(blob).decode()))
+
+    def get(self, service, kwargs):
+        key = self.key(service, kwargs)
+        with self._lock:
+            row = self._conn.execute('SELECT created, results FROM results '
+                                     'WHERE service = ? AND key = ?', key).fetchone()
+
+        if row is None:
+            self.misses += 1
+            return None
+
+        created, blob = row
+        if self.ttl is not None and self.timer() >= created + self.ttl:
+            self.expired += 1
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return self._loads(service, blob, kwargs)
+
+    def set(self, service, kwargs, results):
+        row = self.key(service, kwargs) + (self.timer(), self._dumps(results))
+        with self._lock, self._conn as conn:
+            conn.execute('INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)', row)
+
+    def invalidate(self, service=None):
+        with self._lock, self._conn as conn:
+            if service is None:
+                conn.execute('DELETE FROM results')
+            else:
+                conn.execute('DELETE FROM results WHERE service = ?', (service.identity,))
+
+    clear = invalidate
+
+    def purge(self, expired_only=False):
+        """ remove all entries or only those that are older than ttl """
+        with self._lock, self._conn as conn:
+            if expired_only:
+                if self.ttl is None:
+                    return 0
+
+                cursor = conn.execute('DELETE FROM results WHERE created <= ?',
+                                      (self.timer() - self.ttl,))
+            else:
+                cursor = conn.execute('DELETE FROM results')
+
+            return cursor.rowcount
+
+    def warm(self, query, queries):
+        """ run each kwargs in queries through an OntQuery against all of
+            its services so that later runs are served from this cache,
+            OntTerm queries with both curie and iri when it can expand """
+        old_cache, query.cache = query.cache, self
+        try:
+            count = 0
+            for kwargs in queries:
+                for result in query(raw=True, include_all_services=True, **kwargs):
+                    count += 1
+
+            return count
+        finally:
+            query.cache = old_cache
+
+    def info(self):
+        return CacheInfo(self.hits, self.misses, None, len(self))
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute('SELECT count(*) FROM results').fetchone()[0]
+
+    def close(self):
+        self._conn.close()
+
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(prog='python -m ontquery.cache',
+                                     description='manage a persistent ontquery cache')
+    parser.add_argument('command', choices=('info', 'purge', 'warm'))
+    parser.add_argument('path')
+    parser.add_argument('service', nargs='?', help='plugin name e.g. SciGraph (warm only)')
+    parser.add_argument('identifiers', nargs='?', help='file with one curie or iri per line (warm only)')
+    parser.add_argument('--expired', action='store_true', help='only purge expired entries')
+    parser.add_argument('--ttl', type=float, default=None, help='seconds until entries expire')
+    args = parser.parse_args(argv)
+
+    cache = SqliteQueryCache(args.path, ttl=args.ttl)
+    if args.command == 'info':
+        print(f'{args.path} version {cache.version} entries {len(cache)}')
+    elif args.command == 'purge':
+        print(f'purged {cache.purge(expired_only=args.expired)} entries')
+    elif args.command == 'warm':
+        if args.service is None or args.identifiers is None:
+            parser.error('warm requires service and identifiers')
+
+        import ontquery as oq
+        service = oq.plugin.get(args.service)()
+        query = oq.OntQuery(service, instrumented=oq.OntTerm)
+        with open(args.identifiers, 'rt') as f:
+            identifiers = [l.strip() for l in f if l.strip()]
+
+        queries = ({'curie': oid.curie, 'iri': oid.iri} if oid.curie else {'iri': oid.iri}
+                   for oid in oq.OntId.from_many(identifiers))
+        print(f'warmed {cache.warm(query, queries)} results')
+
+    cache.close()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
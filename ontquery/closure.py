@@ -0,0 +1,79 @@
+"""
+Transitive closure over a directed graph that is given as an adjacency function.
+Used by local services to answer predicates= and depth= traversals.
+"""
+
+from itertools import chain
+from ontquery.utils import LRUCache
+
+
+class Closure:
+    """ Breadth first transitive closure from one or many seed nodes.
+
+        adjacency(node) returns the neighbours of node. It is called at
+        most once per node and the result is kept, so ancestors shared
+        by many seeds are only looked up once. The levels of the search
+        from each seed are memoized and extended on demand, so asking
+        for a deeper closure only pays for the new levels. Cycles are
+        handled by never revisiting a node.
+
+        Call clear() if the underlying graph changes. """
+
+    def __init__(self, adjacency, maxsize=2 ** 14):
+        self.adjacency = adjacency
+        self._neighbours = {}
+        self._searches = LRUCache(maxsize)
+
+    def neighbours(self, node):
+        try:
+            return self._neighbours[node]
+        except KeyError:
+            neighbours = self._neighbours[node] = tuple(self.adjacency(node))
+            return neighbours
+
+    def _search(self, seed, depth):
+        search = self._searches.get(seed)
+        if search is None:
+            # levels, seen, exhausted
+            search = [[], set(), False]
+            self._searches[seed] = search
+
+        levels, seen, exhausted = search
+        frontier = levels[-1] if levels else (seed,)
+        while not exhausted and (depth is None or len(levels) < depth):
+            level = []
+            for node in frontier:
+                for neighbour in self.neighbours(node):
+                    if neighbour not in seen:
+                        seen.add(neighbour)
+                        level.append(neighbour)
+
+            if level:
+                frontier = tuple(level)
+                levels.append(frontier)
+            else:
+                exhausted = search[2] = True
+
+        return levels
+
+    def levels(self, seed, depth=None):
+        """ tuples of the nodes first reached at each step from seed """
+        return tuple(self._search(seed, depth)[:depth])
+
+    def closure(self, seed, depth=None):
+        """ nodes reachable from seed in at most depth steps, or all reachable
+            nodes when depth is None, in breadth first order without repeats.
+            The seed is only included when it is reachable from itself. """
+        return tuple(chain.from_iterable(self.levels(seed, depth)))
+
+    def closure_many(self, seeds, depth=None):
+        """ seed -> closure for each seed """
+        return {seed: self.closure(seed, depth) for seed in seeds}
+
+    def clear(self):
+        self._neighbours = {}
+        self._searches.clear()
+
+    def __repr__(self):
+        return (f'{self.__class__.__name__}(nodes={len(self._neighbours)}, '
+                f'searches={self._searches.info()})')
@@ -50,3 +50,4 @@ register('SciCrunch', 'ontquery.plugins.services.scigraph', 'SciCrunchRemote')
 register('rdflib', 'ontquery.plugins.services.rdflib', 'rdflibLocal')
 register('iris', 'ontquery.plugins.services.rdflib', 'StaticIriRemote')
 register('GitHub', 'ontquery.plugins.services.rdflib', 'GitHubRemote')
+register('termstore', 'ontquery.plugins.services.termstore', 'TermStoreLocal')
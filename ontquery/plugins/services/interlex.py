@@ -4,7 +4,7 @@ import rdflib
 
 import ontquery as oq
 import ontquery.exceptions as exc
-from ontquery.utils import cullNone, log, QueryResult
+from ontquery.utils import cullNone, one_or_many, log, QueryResult
 from ontquery.services import OntService
 from .interlex_client import InterLexClient
 from .rdflib import rdflibLocal
@@ -21,6 +21,7 @@ class _InterLexSharedCache:
 class InterLexRemote(_InterLexSharedCache, OntService):  # note to self
     known_inverses = ('', ''),
     defaultEndpoint = 'https://scicrunch.org/api/1/'
+    aquery_max_workers = 8  # bounds concurrent http requests from aquery
 
     def __init__(self, *args, apiEndpoint=defaultEndpoint,
                  user_curies: dict = None,  # FIXME hardcoded
@@ -83,6 +84,10 @@ class InterLexRemote(_InterLexSharedCache, OntService):  # note to self
 
         super().setup(**kwargs)
 
+    @property
+    def identity(self):
+        return f'{super().identity} {self.apiEndpoint}'
+
     @property
     def host_port(self):
         return f'{self.host}:{self.port}' if self.port else self.host
@@ -519,17 +524,7 @@ class InterLexRemote(_InterLexSharedCache, OntService):  # note to self
     def query(self, iri=None, curie=None, label=None, term=None, predicates=tuple(),
               prefix=tuple(), exclude_prefix=tuple(), limit=10, depth=1, **_):
         kwargs = cullNone(iri=iri, curie=curie, label=label, term=term, predicates=predicates)
-        if iri:
-            oiri = self.OntId(iri=iri)
-            icurie = oiri.curie
-            if curie and icurie and icurie != curie:
-                raise ValueError(f'curie and curied iri do not match {curie} {icurie}')
-            else:
-                curie = icurie
-
-        elif curie:
-            iri = self.OntId(curie).iri
-
+        iri, curie = self._iri_curie(iri, curie)
         if self._is_dev_endpoint:
             res = self._dev_query(kwargs, iri, curie, label, predicates, prefix, exclude_prefix, depth)
             if res is not None:
@@ -558,6 +553,126 @@ class InterLexRemote(_InterLexSharedCache, OntService):  # note to self
             if res is not None:
                 yield res
 
+    def _iri_curie(self, iri, curie):
+        if iri:
+            oiri = self.OntId(iri=iri)
+            icurie = oiri.curie
+            if curie and icurie and icurie != curie:
+                raise ValueError(f'curie and curied iri do not match {curie} {icurie}')
+            else:
+                curie = icurie
+
+        elif curie:
+            iri = self.OntId(curie).iri
+
+        return iri, curie
+
+    def query_many(self, queries, mapper=map):
+        """ Queries for an iri or curie that are not answered by the
+            resolver, which is skipped when api_first is set, are all
+            looked up with one elastic search. Other queries go through
+            query one at a time. """
+        if self._is_dev_endpoint or not hasattr(self, 'ilx_cli'):
+            return super().query_many(queries, mapper=mapper)
+
+        results = [None] * len(queries)
+        ids = {}
+        for i, query in enumerate(queries):
+            if query.get('label') or query.get('term'):
+                continue
+
+            try:
+                iri, curie = self._iri_curie(query.get('iri'), query.get('curie'))
+            except Exception as e:
+                results[i] = e
+                continue
+
+            if iri or curie:
+                ids[i] = iri, curie
+
+        if not self.api_first:
+            def resolve(i):
+                iri, curie = ids[i]
+                query = queries[i]
+                try:
+                    return self._dev_query(self._query_kwargs(query), iri, curie, None,
+                                           query.get('predicates', tuple()),
+                                           query.get('prefix', tuple()),
+                                           query.get('exclude_prefix', tuple()),
+                                           query.get('depth', 1))
+                except Exception as e:
+                    return e
+
+            indexes = list(ids)
+            for i, result in zip(indexes, mapper(resolve, indexes)):
+                if result is not None:
+                    results[i] = result if isinstance(result, Exception) else (result,)
+                    del ids[i]
+
+        if ids:
+            try:
+                by_fragment, by_curie = self._entities_by_id(ids.values())
+            except (self._requests.exceptions.HTTPError, self.ilx_cli.Error) as e:
+                log.debug(e)
+                by_fragment, by_curie = {}, {}
+
+            for i, (iri, curie) in ids.items():
+                resp = by_fragment.get(self._ilx_fragment(iri)) or by_curie.get(curie)
+                try:
+                    results[i] = (tuple(self._api_results(self._query_kwargs(queries[i]),
+                                                          [resp], iri, curie))
+                                  if resp else tuple())
+                except Exception as e:
+                    results[i] = e
+
+        rest = [i for i, result in enumerate(results) if result is None]
+        for i, result in zip(rest, mapper(self._query_or_error, [queries[i] for i in rest])):
+            results[i] = result
+
+        return results
+
+    @staticmethod
+    def _query_kwargs(query):
+        # the query_args that query gives its results
+        return cullNone(iri=query.get('iri'), curie=query.get('curie'),
+                        label=query.get('label'), term=query.get('term'),
+                        predicates=query.get('predicates', tuple()))
+
+    @staticmethod
+    def _ilx_fragment(iri):
+        try:
+            return InterLexClient.get_ilx_fragment(iri)
+        except ValueError:
+            return None
+
+    def _entities_by_id(self, iri_curies):
+        """ the entities with any of the ilx ids or existing curies """
+        fragments = set()
+        curies = set()
+        for iri, curie in iri_curies:
+            fragment = self._ilx_fragment(iri)
+            if fragment is not None:
+                fragments.add(fragment)
+            elif curie:
+                curies.add(curie)
+
+        should = []
+        if fragments:
+            should.append({'terms': {'ilx': sorted(fragments)}})
+        if curies:
+            should.append({'terms': {'existing_ids.curie': sorted(curies)}})
+
+        by_fragment, by_curie = {}, {}
+        query = {'query': {'bool': {'should': should}}}
+        for page in self._elastic_pages(query, len(fragments) + len(curies)):
+            for resp in page:
+                by_fragment.setdefault(resp['ilx'], resp)
+                for existing in resp['existing_ids']:
+                    if existing.get('curie') in curies:
+                        by_curie.setdefault(existing['curie'], resp)
+
+        return by_fragment, by_curie
+
     def _scicrunch_api_query(self, kwargs, iri, curie, label, term, predicates, limit):
         resp = None
         if iri:
@@ -603,7 +718,9 @@ class InterLexRemote(_InterLexSharedCache, OntService):  # note to self
             return
 
         resps = [resp] if isinstance(resp, dict) else resp
+        yield from self._api_results(kwargs, resps, iri, curie)
 
+    def _api_results(self, kwargs, resps, iri=None, curie=None):
         # FIXME this is really a temp hack until we can get the
         # next version of the alt resolver up and running with
         # since iirc it can resolve curies
@@ -645,6 +762,43 @@ class InterLexRemote(_InterLexSharedCache, OntService):  # note to self
                 source=self,
             )
 
+    def iter_terms(self, prefix=tuple(), category=tuple(), page_size=100):
+        """ page through elastic with from and size, category is the
+            interlex type e.g. term or cde, note that elastic will not
+            page past its max_result_window which is 10000 by default """
+        if not hasattr(self, 'ilx_cli'):
+            raise NotImplementedError('enumerating terms requires the scicrunch api')
+
+        filters = []
+        if prefix:
+            filters.append({'bool': {'should': [
+                {'prefix': {'existing_ids.curie': p + ':'}}
+                for p in one_or_many(prefix)]}})
+        if category:
+            filters.append({'terms': {'type': list(one_or_many(category))}})
+
+        query = ({'query': {'bool': {'filter': filters}}} if filters else
+                 {'query': {'match_all': {}}})
+        return self._iter_terms(query, dict(prefix=prefix, category=category), page_size)
+
+    def _iter_terms(self, query, kwargs, page_size):
+        for page in self._elastic_pages(query, page_size):
+            yield from self._api_results(kwargs, page)
+
+    def _elastic_pages(self, query, page_size):
+        start = 0
+        while True:
+            page = self.ilx_cli.query_elastic(query=query, size=page_size,
+                                              **{'from': start})
+            if not page:
+                return
+
+            yield page
+            if len(page) < page_size:
+                return
+
+            start += page_size
+
     def _proc_api(self, resp):
         preferred, existing, = self._proc_existing(resp)
         ilx_id = 'http://uri.interlex.org/base/' + resp['ilx']
@@ -0,0 +1,117 @@
+"""
+Files of named arrays that are memory mapped instead of read.
+
+Each file starts with an 8 byte magic, a json header that records where
+each array is, and then the arrays themselves aligned so that they can
+be used through memoryview casts without being copied.
+"""
+
+import os
+import sys
+import json
+import mmap
+from array import array
+from bisect import bisect_left
+
+
+def write_sections(path, magic, meta, sections):
+    """ Write magic, meta, and named arrays to path so that each array is
+        8 byte aligned and can be cast from a memory map without copying.
+        The file is written next to path and moved into place. """
+    header = {**meta, 'byteorder': sys.byteorder, 'sections': {}}
+    position = 0
+    for name, values in sections.items():
+        header['sections'][name] = [position, values.typecode, len(values)]
+        size = len(values) * values.itemsize
+        position += size + (-size % 8)
+
+    blob = json.dumps(header).encode()
+    blob += b' ' * (-(len(magic) + 8 + len(blob)) % 8)
+    temp = f'{path}.tmp'
+    with open(temp, 'wb') as f:
+        f.write(magic)
+        f.write(len(blob).to_bytes(8, 'little'))
+        f.write(blob)
+        for values in sections.values():
+            data = values.tobytes()
+            f.write(data)
+            f.write(b'\x00' * (-len(data) % 8))
+
+    os.replace(temp, path)
+
+
+def read_sections(path, magic):
+    """ (header, mmap, name -> memoryview) for a file from write_sections,
+        raises ValueError if path does not start with magic """
+    with open(path, 'rb') as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    if mm[:len(magic)] != magic:
+        mm.close()
+        raise ValueError(f'{path} is not a {magic[:6].decode()} file of version {magic[-1]}')
+
+    start = len(magic) + 8
+    length = int.from_bytes(mm[len(magic):start], 'little')
+    header = json.loads(mm[start:start + length].decode())
+    if header['byteorder'] != sys.byteorder:
+        mm.close()
+        raise ValueError(f'{path} was written on a {header["byteorder"]} endian machine')
+
+    base = start + length
+    view = memoryview(mm)
+    sections = {}
+    for name, (offset, typecode, count) in header['sections'].items():
+        itemsize = array(typecode).itemsize
+        sections[name] = view[base + offset:base + offset + count * itemsize].cast(typecode)
+
+    return header, mm, sections
+
+
+def compress(n, rows):
+    """ offsets, a, b arrays for rows which maps int -> [(a, b), ...] """
+    offsets = array('q', bytes(8 * (n + 1)))
+    edge_a, edge_b = array('i'), array('i')
+    for i in range(n):
+        for a, b in sorted(rows.get(i, ())):
+            edge_a.append(a)
+            edge_b.append(b)
+
+        offsets[i + 1] = len(edge_a)
+
+    return offsets, edge_a, edge_b
+
+
+class StringTable:
+    """ Sorted table of byte strings, string i is blob[offsets[i]:offsets[i + 1]] """
+
+    def __init__(self, offsets, blob):
+        self.offsets = offsets
+        self.blob = blob
+
+    @classmethod
+    def from_strings(cls, strings):
+        """ strings must already be sorted """
+        offsets = array('q', [0])
+        blob = bytearray()
+        for string in strings:
+            blob += string
+            offsets.append(len(blob))
+
+        return cls(offsets, array('B', blob))
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        return bytes(self.blob[self.offsets[i]:self.offsets[i + 1]])
+
+    def find(self, string):
+        """ index of string or None """
+        i = bisect_left(self, string)
+        if i < len(self) and self[i] == string:
+            return i
+
+    def range(self, prefix):
+        """ start and stop of the strings that start with prefix,
+            0xff never occurs in utf-8 so it sorts after any suffix """
+        return bisect_left(self, prefix), bisect_left(self, prefix + b'\xff')
@@ -1,14 +1,337 @@
+import os
+import re
+import gzip
+import json
+import math
+import zlib
+from array import array
+from bisect import bisect_left
 import rdflib
 import ontquery as oq
 import ontquery.exceptions as exc
-from ontquery.utils import log, red
+from ontquery.utils import normalize_label, log, red
+from ontquery.closure import Closure
 from ontquery.services import OntService
 
 
+class GraphIndex:
+    """ Integer coded adjacency index over the triples of an rdflib graph
+        that have no blank nodes.
+
+        Every node gets an int. Edges are stored as compressed rows, the
+        (predicate, object) pairs of node i are edge_p[offsets[i]:offsets[i + 1]]
+        and the same slice of edge_o. The reverse rows for subjects of an
+        object are only built if they are used. Predicate curies and the
+        OntId or python value of each object are computed once per node
+        on first use instead of once per triple per query. """
+
+    def __init__(self, graph, OntId):
+        self.OntId = OntId
+        ids = {}
+        nodes = []
+        rows = {}
+        for s, p, o in graph:
+            if isinstance(s, rdflib.BNode) or isinstance(o, rdflib.BNode):
+                continue
+
+            for node in (s, p, o):
+                if node not in ids:
+                    ids[node] = len(nodes)
+                    nodes.append(node)
+
+            si = ids[s]
+            if si not in rows:
+                rows[si] = []
+
+            rows[si].append((ids[p], ids[o]))
+
+        self.ids = ids
+        self.nodes = nodes
+        self.offsets, self.edge_p, self.edge_o = self._compress(len(nodes), rows)
+        self._reverse = None
+        self._curies = {}
+        self._values = {}
+        self._classes = frozenset(ids[p] for p in (rdflib.RDF.type, rdflib.RDFS.subClassOf)
+                                  if p in ids)
+
+    @staticmethod
+    def _compress(n, rows):
+        offsets = array('q', bytes(8 * (n + 1)))
+        edge_a, edge_b = array('l'), array('l')
+        for i in range(n):
+            if i in rows:
+                for a, b in rows[i]:
+                    edge_a.append(a)
+                    edge_b.append(b)
+
+            offsets[i + 1] = len(edge_a)
+
+        return offsets, edge_a, edge_b
+
+    def __len__(self):
+        return len(self.edge_p)
+
+    def edges(self, node):
+        """ (predicate id, object id) pairs for node """
+        i = self.ids.get(node)
+        if i is None:
+            return ()
+
+        start, stop = self.offsets[i], self.offsets[i + 1]
+        return zip(self.edge_p[start:stop], self.edge_o[start:stop])
+
+    def objects(self, node, predicate):
+        pi = self.ids.get(predicate)
+        return (self.nodes[oi] for p, oi in self.edges(node) if p == pi)
+
+    def subjects(self, predicate, node):
+        i, pi = self.ids.get(node), self.ids.get(predicate)
+        if i is None or pi is None:
+            return ()
+
+        if self._reverse is None:
+            rows = {}
+            for si in range(len(self.nodes)):
+                for k in range(self.offsets[si], self.offsets[si + 1]):
+                    oi = self.edge_o[k]
+                    if oi not in rows:
+                        rows[oi] = []
+
+                    rows[oi].append((self.edge_p[k], si))
+
+            self._reverse = self._compress(len(self.nodes), rows)
+
+        offsets, edge_p, edge_s = self._reverse
+        start, stop = offsets[i], offsets[i + 1]
+        return (self.nodes[si] for p, si in zip(edge_p[start:stop], edge_s[start:stop])
+                if p == pi)
+
+    def is_class(self, node):
+        """ node has an rdf:type or an rdfs:subClassOf """
+        return any(p in self._classes for p, o in self.edges(node))
+
+    def curie(self, i):
+        try:
+            return self._curies[i]
+        except KeyError:
+            curie = self._curies[i] = self.OntId(self.nodes[i]).curie
+            return curie
+
+    def value(self, i):
+        """ the python value of a literal or the OntId of a uri """
+        try:
+            return self._values[i]
+        except KeyError:
+            node = self.nodes[i]
+            if isinstance(node, rdflib.Literal):
+                value = node.toPython()
+            else:
+                value = self.OntId(node)
+
+            self._values[i] = value
+            return value
+
+    def ontid(self, node):
+        return self.value(self.ids[node])
+
+    def clear_curies(self):
+        """ drop the curies and OntIds made with the old namespaces """
+        self._curies = {}
+        self._values = {}
+
+    def predicate_objects(self, node):
+        """ (predicate, object, predicate curie, object value) where object
+            is the python value of literals as with Literal.toPython """
+        nodes = self.nodes
+        for pi, oi in self.edges(node):
+            o = nodes[oi]
+            yield (nodes[pi],
+                   self.value(oi) if isinstance(o, rdflib.Literal) else o,
+                   self.curie(pi),
+                   self.value(oi))
+
+
+class LabelIndex:
+    """ Inverted index from normalized label and synonym strings to subjects.
+
+        Strings are casefolded and runs of whitespace are collapsed, the
+        language tag and datatype of literals are ignored. predicates are
+        given in rank order, earlier predicates rank higher. """
+
+    def __init__(self, graph, predicates):
+        self.predicates = tuple(predicates)
+        self._rank = {p: i for i, p in enumerate(self.predicates)}
+        index = {}
+        for p in self.predicates:
+            for s, o in graph.subject_objects(p):
+                if isinstance(s, rdflib.BNode) or not isinstance(o, rdflib.Literal):
+                    continue
+
+                key = self.normalize(o)
+                if key not in index:
+                    index[key] = []
+
+                index[key].append((s, p, str(o)))
+
+        self._index = index
+
+    normalize = staticmethod(normalize_label)
+
+    def __len__(self):
+        return len(self._index)
+
+    def search(self, string, predicates=None):
+        """ subjects with a string for one of predicates that matches string,
+            ranked by predicate, then exact matches first, then by iri """
+        string = str(string)
+        best = {}
+        for s, p, value in self._index.get(self.normalize(string), ()):
+            if predicates is not None and p not in predicates:
+                continue
+
+            rank = self._rank[p], value != string
+            if s not in best or rank < best[s]:
+                best[s] = rank
+
+        return sorted(best, key=lambda s: (best[s], s))
+
+
+class TextIndex:
+    """ Tokenized inverted index over label, synonym, and definition
+        literals with BM25 ranking for search= queries.
+
+        fields is a sequence of (predicate, weight) pairs, the weight
+        scales the term frequency of tokens from that predicate. Every
+        token of a query must match a token of a subject either exactly
+        or as a prefix, prefix matches score less than exact matches. """
+
+    version = 1
+    k1 = 1.2
+    b = 0.75
+    prefix_weight = 0.5
+    _token = re.compile(r'\w+')
+
+    def __init__(self, subjects=tuple(), lengths=tuple(), postings=None, stamp=None):
+        self.subjects = list(subjects)
+        self.lengths = list(lengths)
+        self.postings = {} if postings is None else postings
+        self.stamp = stamp
+        self._vocabulary = sorted(self.postings)
+        self._average = (sum(self.lengths) / len(self.lengths)) if self.lengths else 0
+
+    @classmethod
+    def tokenize(cls, string):
+        return cls._token.findall(str(string).casefold())
+
+    @classmethod
+    def from_graph(cls, graph, fields, stamp=None):
+        ids, subjects, lengths, postings = {}, [], [], {}
+        for predicate, weight in fields:
+            for s, o in graph.subject_objects(predicate):
+                if isinstance(s, rdflib.BNode) or not isinstance(o, rdflib.Literal):
+                    continue
+
+                if s not in ids:
+                    ids[s] = len(subjects)
+                    subjects.append(s)
+                    lengths.append(0)
+
+                i = ids[s]
+                for token in cls.tokenize(o):
+                    lengths[i] += weight
+                    if token not in postings:
+                        postings[token] = {}
+
+                    posting = postings[token]
+                    posting[i] = posting.get(i, 0) + weight
+
+        return cls(subjects, lengths, postings, stamp)
+
+    def _matches(self, token):
+        """ (vocabulary token, weight) for token and tokens it prefixes """
+        vocabulary = self._vocabulary
+        i = bisect_left(vocabulary, token)
+        while i < len(vocabulary) and vocabulary[i].startswith(token):
+            match = vocabulary[i]
+            yield match, 1 if match == token else self.prefix_weight
+            i += 1
+
+    def scores(self, string):
+        """ subject index -> bm25 score for subjects matching every token """
+        n = len(self.subjects)
+        scores = None
+        for token in dict.fromkeys(self.tokenize(string)):
+            token_scores = {}
+            for match, weight in self._matches(token):
+                posting = self.postings[match]
+                idf = math.log(1 + (n - len(posting) + .5) / (len(posting) + .5))
+                for i, tf in posting.items():
+                    norm = self.k1 * (1 - self.b + self.b * self.lengths[i] / self._average)
+                    score = weight * idf * tf * (self.k1 + 1) / (tf + norm)
+                    if score > token_scores.get(i, 0):
+                        token_scores[i] = score
+
+            if scores is None:
+                scores = token_scores
+            else:
+                scores = {i: score + token_scores[i]
+                          for i, score in scores.items() if i in token_scores}
+
+            if not scores:
+                return {}
+
+        return scores or {}
+
+    def search(self, string):
+        """ matching subjects from best to worst """
+        scores = self.scores(string)
+        subjects = self.subjects
+        return [subjects[i] for i in sorted(scores, key=lambda i: (-scores[i], subjects[i]))]
+
+    def __len__(self):
+        return len(self.subjects)
+
+    def save(self, path):
+        blob = {'version': self.version,
+                'stamp': self.stamp,
+                'subjects': [str(s) for s in self.subjects],
+                'lengths': self.lengths,
+                'postings': {t: [[i, tf] for i, tf in p.items()]
+                             for t, p in self.postings.items()},}
+        # readers never see a partial file
+        temp = f'{path}.{os.getpid()}.tmp'
+        with gzip.open(temp, 'wt') as f:
+            json.dump(blob, f)
+
+        os.replace(temp, path)
+
+    @classmethod
+    def load(cls, path):
+        """ None if path is missing, unreadable, malformed, or has a
+            different version, so that the index is rebuilt """
+        try:
+            with gzip.open(path, 'rt') as f:
+                blob = json.load(f)
+
+            if blob.get('version') != cls.version:
+                return None
+
+            return cls([rdflib.URIRef(s) for s in blob['subjects']],
+                       blob['lengths'],
+                       {t: {i: tf for i, tf in p} for t, p in blob['postings'].items()},
+                       blob['stamp'])
+        except (OSError, EOFError, zlib.error, ValueError,
+                LookupError, TypeError, AttributeError) as e:
+            if not isinstance(e, FileNotFoundError):
+                log.warning(f'rebuilding search index, could not load {path} {e!r}')
+
+            return None
+
+
 class rdflibLocal(OntService):  # reccomended for local default implementation
     #graph = rdflib.Graph()  # TODO pull this out into ../plugins? package as ontquery-plugins?
-    # if loading if the default set of ontologies is too slow, it is possible to
-    # dump loaded graphs to a pickle gzip and distribute that with a release...
+    # if loading if the default set of ontologies is too slow, write a snapshot
+    # once with snapshot(path) and start from it with from_snapshot(path)
 
     def __init__(self, graph, OntId=oq.OntId):
         self.OntId = OntId
@@ -62,6 +385,18 @@ class rdflibLocal(OntService):  # reccomended for local default implementation
     def add(self, iri, format):
         pass
 
+    @classmethod
+    def from_snapshot(cls, path, OntId=oq.OntId):
+        """ a service for the read only graph in a snapshot written by
+            snapshot, the file is memory mapped instead of parsed """
+        from .snapshot import load_snapshot
+        return cls(load_snapshot(path), OntId=OntId)
+
+    def snapshot(self, path):
+        """ write graph to path for from_snapshot """
+        from .snapshot import write_snapshot
+        write_snapshot(self.graph, path)
+
     def setup(self, **kwargs):
         # graph is already set up...
         # assume that the graph is static for these
@@ -71,6 +406,12 @@ class rdflibLocal(OntService):  # reccomended for local default implementation
         if self.graph:
             print(self.graph.serialize(format='nifttl').decode())
 
+    @property
+    def identity(self):
+        # graphs created without an identifier get a fresh bnode every
+        # time so they will not match across processes
+        return f'{super().identity} {self.graph.identifier}'
+
     @property
     def curies(self):
         return self._curies
@@ -79,7 +420,140 @@ class rdflibLocal(OntService):  # reccomended for local default implementation
     def predicates(self):
         yield from sorted(set(self.graph.predicates()))
 
-    def by_ident(self, iri, curie, kwargs, predicates=tuple(), depth=1, _pseen=tuple()):
+    use_index = True  # build a GraphIndex the first time it is needed
+
+    def index(self):
+        """ the GraphIndex for graph, rebuilt if the graph changes, only
+            its curies and OntIds are dropped if the curies change """
+        stamp = len(self.graph), self.OntId
+        generation = self.OntId._namespaces.generation()
+        if getattr(self, '_index_stamp', None) != stamp:
+            # snapshots come with their rows prebuilt
+            graph_index = getattr(self.graph.store, 'graph_index', None)
+            self._index = (GraphIndex(self.graph, self.OntId) if graph_index is None else
+                           graph_index(self.OntId))
+            self._index_stamp = stamp
+        elif self._index_generation != generation:
+            self._index.clear_curies()
+
+        self._index_generation = generation
+        return self._index
+
+    def labels(self):
+        """ the LabelIndex for the predicates in predicate_mapping,
+            rebuilt if the graph changes """
+        stamp = len(self.graph)
+        if getattr(self, '_labels_stamp', None) != stamp:
+            predicates = []
+            for keyword in ('label', 'term', 'definition'):  # rank order
+                for predicate in self.predicate_mapping.get(keyword, ()):
+                    if predicate not in predicates:
+                        predicates.append(predicate)
+
+            for predicates_ in self.predicate_mapping.values():
+                predicates.extend(p for p in predicates_ if p not in predicates)
+
+            self._labels = LabelIndex(self.graph, predicates)
+            self._labels_stamp = stamp
+
+        return self._labels
+
+    search_index_path = None  # set to persist the TextIndex between runs
+    search_fields = (('label', 2.), ('term', 1.), ('definition', .5))
+
+    def text_index(self):
+        """ the TextIndex used for search=, built on first use and loaded
+            from or saved to search_index_path if it is set """
+        fields, seen = [], set()
+        for keyword, weight in self.search_fields:
+            for predicate in self.predicate_mapping.get(keyword, ()):
+                if predicate not in seen:
+                    seen.add(predicate)
+                    fields.append((predicate, weight))
+
+        # a list of lists so it compares equal after a round trip through json
+        stamp = [len(self.graph), str(self.graph.identifier),
+                 [[str(predicate), weight] for predicate, weight in fields]]
+        if getattr(self, '_text_index_stamp', None) == stamp:
+            return self._text_index
+
+        index = None
+        if self.search_index_path is not None:
+            index = TextIndex.load(self.search_index_path)
+            if index is not None and index.stamp != stamp:
+                index = None
+
+        if index is None:
+            index = TextIndex.from_graph(self.graph, fields, stamp)
+            if self.search_index_path is not None:
+                try:
+                    index.save(self.search_index_path)
+                except OSError as e:
+                    log.warning(f'could not save search index to {self.search_index_path} {e}')
+
+        self._text_index = index
+        self._text_index_stamp = stamp
+        return index
+
+    def _predicate_objects(self, node, index=None):
+        if index is not None:
+            yield from index.predicate_objects(node)
+            return
+
+        for p, o in self.graph.predicate_objects(node):
+            if isinstance(o, rdflib.BNode):
+                continue
+
+            if isinstance(o, rdflib.Literal):
+                o = o.toPython()
+                yield p, o, self.OntId(p).curie, o
+            else:
+                yield p, o, self.OntId(p).curie, self.OntId(o)
+
+    def closure(self, predicate, direction='OUTGOING'):
+        """ the Closure engine that follows predicate in direction,
+            OUTGOING for ancestors and INCOMING for descendants, engines
+            are dropped if the size of the graph changes """
+        index = self.index() if self.use_index else None
+        stamp = len(self.graph), index
+        if getattr(self, '_closures_stamp', None) != stamp:
+            self._closures = {}
+            self._closures_stamp = stamp
+
+        key = predicate, direction
+        if key not in self._closures:
+            source = self.graph if index is None else index
+            if direction == 'INCOMING':
+                def adjacency(node, predicate=predicate):
+                    return (s for s in source.subjects(predicate, node)
+                            if self._traversable(s, index))
+            else:
+                def adjacency(node, predicate=predicate):
+                    if not self._traversable(node, index):
+                        return ()
+
+                    return (o.toPython() if isinstance(o, rdflib.Literal) else o
+                            for o in source.objects(node, predicate)
+                            if not isinstance(o, rdflib.BNode))
+
+            self._closures[key] = Closure(adjacency)
+
+        return self._closures[key]
+
+    def _traversable(self, node, index=None):
+        """ only classes are traversed, the same nodes that by_ident
+            returns results for """
+        if not isinstance(node, rdflib.URIRef):
+            return False
+
+        if index is not None:
+            return index.is_class(node)
+
+        graph = self.graph
+        return ((node, rdflib.RDF.type, None) in graph or
+                (node, rdflib.RDFS.subClassOf, None) in graph)
+
+    def by_ident(self, iri, curie, kwargs, predicates=tuple(), depth=1):
         def append_preds(out, c, o):
             if c not in out['predicates']:
                 out['predicates'][c] = o  # curie to be consistent with OntTerm behavior
@@ -88,26 +562,6 @@ class rdflibLocal(OntService):  # reccomended for local default implementation
             else:
                 out['predicates'][c] += o,
 
-        def mergepreds(this_preds, prev_preds):
-            if not prev_preds:
-                return this_preds
-            else:
-                npreds = {**this_preds}
-                for k, v in prev_preds.items():
-                    if k in npreds:
-                        if isinstance(v, tuple):
-                            if isinstance(npreds[k], tuple):
-                                npreds[k] = v + npreds[k]
-                            else:
-                                npreds[k] = v + (npreds[k],)
-                        else:
-                            if isinstance(npreds[k], tuple):
-                                npreds[k] = (v,) + npreds[k]
-                            else:
-                                npreds[k] = v, npreds[k]
-
-                return npreds
-
         predicates = tuple(rdflib.URIRef(p.iri)
                            # FIXME tricky here because we don't actually know the type
                            # of the predicate, it is a good bet that it will be an OntId
@@ -116,23 +570,22 @@ class rdflibLocal(OntService):  # reccomended for local default implementation
                            p for p in predicates)
         out = {'predicates':{}}
         identifier = self.OntId(curie=curie, iri=iri)
-        gen = self.graph.predicate_objects(rdflib.URIRef(identifier.iri))
+        identifier_uri = rdflib.URIRef(identifier.iri)
+        index = self.index() if self.use_index else None
+        gen = self._predicate_objects(identifier_uri, index)
         out['curie'] = identifier.curie
         out['iri'] = identifier.iri
         o = None
         owlClass = None
         owl = rdflib.OWL
+        # DefinedNamespace attribute access is slow, look up once
+        rdf_type, rdfs_subClassOf, owl_deprecated = (
+            rdflib.RDF.type, rdflib.RDFS.subClassOf, owl.deprecated)
 
-        for p, o in gen:
-            if isinstance(o, rdflib.BNode):
-                continue
-
+        for p, o, p_curie, o_value in gen:
             pn = self._translate.get(p, None)
-            if isinstance(o, rdflib.Literal):
-                o = o.toPython()
-
-            #elif p == rdflib.RDF.type and o == owl.Class:
-            elif p == rdflib.RDF.type:  # XXX do not filter on type at this point
+            #if p == rdflib.RDF.type and o == owl.Class:
+            if p == rdf_type:  # XXX do not filter on type at this point
                 if 'type' not in out:
                     out['type'] = o  # FIXME preferred type ...
                 else:
@@ -144,29 +597,24 @@ class rdflibLocal(OntService):  # reccomended for local default implementation
 
                 owlClass = True  # FIXME ...
 
-            elif p == rdflib.RDFS.subClassOf:
+            elif p == rdfs_subClassOf:
                 owlClass = True
                 # cardinality n > 1 fix
-                c = self.OntId(p).curie
+                c = p_curie
                 if c not in out['predicates']:
                     out['predicates'][c] = tuple()  # force tuple
 
-            if p == owl.deprecated and o:
+            if p == owl_deprecated and o:
                 out['deprecated'] = True
 
-            _o_already_done = False  # FIXME not quite right, also _out
             if pn is None:
                 # TODO translation and support for query result structure
                 # FIXME lists instead of klobbering results with mulitple predicates
-                if isinstance(o, rdflib.URIRef):
-                    o = self.OntId(o)  # FIXME we try to use OntTerm directly everything breaks
-                    # FIXME these OntIds also do not derive from rdflib... sigh
-
-                c = self.OntId(p).curie
-                if c in _pseen and o in _pseen[c]:
-                    _o_already_done = True
-                else:
-                    append_preds(out, c, o)
+                # o_value is self.OntId(o) for uris
+                # FIXME we try to use OntTerm directly everything breaks
+                # FIXME these OntIds also do not derive from rdflib... sigh
+                c = p_curie
+                append_preds(out, c, o_value)
 
                 #print(red.format('WARNING:'), 'untranslated predicate', p)
             else:
@@ -182,29 +630,89 @@ class rdflibLocal(OntService):  # reccomended for local default implementation
                     else:
                         out[c] = o
 
-            if p in predicates and depth > 0 and not _o_already_done:
-                # FIXME traverse restrictions on transitive properties
-                # to match scigraph behavior
-                try:
-                    spout = next(self.by_ident(
-                        o, None, {},
-                        predicates=(p,),
-                        depth=depth - 1,
-                        _pseen=mergepreds(out['predicates'], _pseen)))
-                    log.debug(f'{spout}')
-                    if c in spout.predicates:
-                        _objs = spout.predicates[c]
-                        objs = _objs if isinstance(_objs, tuple) else (_objs,)
-                        for _o in objs:
-                            append_preds(out, c, _o)
+        if depth > 0:
+            # deeper levels of the traversal come after the direct objects
+            # FIXME traverse restrictions on transitive properties
+            # to match scigraph behavior
+            for p in predicates:
+                if not isinstance(p, rdflib.URIRef):
+                    p = rdflib.URIRef(p)  # OntIds from other instrumented classes
 
-                except StopIteration:
-                    pass
+                if p in self._translate:
+                    continue
+
+                c = self.OntId(p).curie
+                if c not in out['predicates']:
+                    continue
+
+                # the first level is the direct objects that are already in out
+                for level in self.closure(p).levels(identifier_uri, depth + 1)[1:]:
+                    for _o in level:
+                        if not isinstance(_o, rdflib.URIRef):
+                            append_preds(out, c, _o)
+                        elif index is not None:
+                            append_preds(out, c, index.ontid(_o))
+                        else:
+                            append_preds(out, c, self.OntId(_o))
 
         if o is not None and owlClass is not None:
             # if you yield here you have to yield from below
             yield self.QueryResult(kwargs, **out, _graph=self.graph, source=self)
 
+    def prefix_index(self):
+        """ prefix -> sorted tuple of every uri in the graph with that prefix
+            according to the namespaces bound in the graph, rebuilt if the
+            graph or its namespaces change """
+        stamp = len(self.graph), len(list(self.graph.namespaces()))
+        if getattr(self, '_prefix_index_stamp', None) != stamp:
+            uris = set(e for t in self.graph for e in t if isinstance(e, rdflib.URIRef))
+            index = {}
+            for uri in uris:
+                prefix = self._prefix(uri)
+                if prefix is not None:
+                    if prefix not in index:
+                        index[prefix] = []
+
+                    index[prefix].append(uri)
+
+            self._prefix_index = {p: tuple(sorted(us)) for p, us in index.items()}
+            self._prefix_index_stamp = stamp
+
+        return self._prefix_index
+
+    def prefix_subjects(self, prefix, start=0, stop=None):
+        """ the sorted uris for prefix from start to stop for paging """
+        if self.graph.namespace_manager.store.namespace(prefix) is None:
+            return ()
+
+        return self.prefix_index().get(prefix, ())[start:stop]
+
+    def iter_terms(self, prefix=tuple(), category=tuple(), page_size=100):
+        """ page through prefix_index, every bound prefix if prefix is empty """
+        if category:
+            raise NotImplementedError(f'{self.__class__.__name__} has no categories')
+
+        if isinstance(prefix, str):
+            prefix = prefix,
+
+        return self._iter_terms(prefix, page_size)
+
+    def _iter_terms(self, prefix, page_size):
+        if not prefix:
+            prefix = sorted(self.prefix_index())
+
+        for p in prefix:
+            start = 0
+            while True:
+                page = self.prefix_subjects(p, start, start + page_size)
+                for _iri in page:
+                    yield from self.query(iri=_iri)
+
+                if len(page) < page_size:
+                    break
+
+                start += page_size
+
     def _prefix(self, iri):
         try:
             prefix, _, _ = self.graph.compute_qname(iri, generate=False)
@@ -218,20 +726,11 @@ class rdflibLocal(OntService):  # reccomended for local default implementation
         _empty_tuple = tuple()  # FIXME name lookup cost vs empty tuple alloc cost
         if (prefix is not None and
             prefix is not _empty_tuple and
-            all(a is None for a in (iri, curie, label, term))):
+            all(a is None for a in (iri, curie, label, term, search))):
             if isinstance(prefix, str):
                 prefix = prefix,
 
-            for p in prefix:
-                iri_prefix = self.graph.namespace_manager.store.namespace(p)
-                if iri_prefix is not None:
-                    # TODO is this faster or is shortening? this seems like it might be faster ...
-                    # unless the graph has it all cached
-                    for _iri in sorted(u for u in set(e for t in self.graph for e in t
-                                                if isinstance(e, rdflib.URIRef))
-                                       if self._prefix(u) == p):
-                        yield from self.query(iri=_iri)
-
+            yield from self._iter_terms(prefix, 100)
             return
 
         # right now we only support exact matches to labels FIXME
@@ -255,8 +754,12 @@ class rdflibLocal(OntService):  # reccomended for local default implementation
             yield from self.by_ident(iri, curie, kwargs,
                                      predicates=predicates,
                                      depth=depth - 1)
-        elif search is not None:  # prevent search + prefix from behaving like prefix alone
-            return
+        elif search is not None:
+            if isinstance(prefix, str):
+                prefix = prefix,
+
+            yield from self._filtered(self.text_index().search(search),
+                                      prefix, exclude_prefix, kwargs.get('limit', None))
         else:
             for keyword, object in kwargs.items():
                 if object is None:
@@ -266,19 +769,15 @@ class rdflibLocal(OntService):  # reccomended for local default implementation
                 # only meaningful for querying via by_ident
                 if keyword in self.predicate_mapping:
                     predicates = self.predicate_mapping[keyword]
-                    for predicate in predicates:
-                        gen = self.graph.subjects(predicate, rdflib.Literal(object))
-                        for subject in gen:
-                            if prefix or exclude_prefix:
-                                oid = self.OntId(subject)
-                                if prefix and oid.prefix not in prefix:
-                                    continue
-
-                                if exclude_prefix and oid.prefix in exclude_prefix:
-                                    continue
-
-                            yield from self.query(iri=subject)
-                            return  # FIXME we can only search one thing at a time... first wins
+                    subjects = self.labels().search(object, predicates)
+                    yield from self._filtered(subjects, prefix, exclude_prefix,
+                                              kwargs.get('limit', None))
+                    return  # FIXME we can only search one thing at a time
+
+    def _filtered(self, subjects, prefix, exclude_prefix, limit):
+        """ results for up to limit subjects that pass the prefix filters """
+        for subject in self._prefix_filtered(subjects, prefix, exclude_prefix, limit):
+            yield from self.query(iri=subject)
 
 
 class StaticIrisRemote(rdflibLocal):
@@ -1,22 +1,100 @@
+import os
+import json
+import time
+import asyncio
+import weakref
+import threading
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
 import ontquery as oq
-from ontquery.utils import cullNone, one_or_many, log, bunch, red
+import ontquery.exceptions as exc
+from ontquery.utils import cullNone, one_or_many, log, bunch, red, freeze
 from ontquery.services import OntService
+from ontquery.closure import Closure
 from . import deco, auth
 
 
+class _PendingRequest(BaseException):
+    """ raised out of query by a replay client for requests that it has no
+        response for, not an Exception so that query cannot swallow it """
+
+    def __init__(self, requests):
+        super().__init__(requests)
+        self.requests = requests  # [(key, (method, url, params, output, api_key)), ...]
+
+
+def _replay_get(self, method, url, params=None, output=None):
+    key = method, url, freeze(params), output
+    try:
+        return self._responses[key]
+    except KeyError:
+        request = method, url, dict(params or {}), output, self.api_key
+        raise _PendingRequest([(key, request)]) from None
+
+
+def _keep_session(self):
+    # the session belongs to the client that the replay was made from
+    pass
+
+
+@lru_cache(maxsize=None)
+def _replay_class(cls):
+    """ cls answering requests from self._responses instead of its session """
+    return type(cls.__name__, (cls,), {'_get': _replay_get, '__del__': _keep_session})
+
+
 class SciGraphRemote(OntService):  # incomplete and not configureable yet
     cache = True
     verbose = False
     known_inverses = ('', ''),
+    # aquery fetches with at most this many connections per event loop when
+    # aiohttp is installed, otherwise it runs query in this many threads
+    aquery_max_workers = 8
+    # depth 1 predicates for a term come from one neighbors request plus
+    # one for their inverses, instead of one request per predicate
+    batch_neighbors = True
+    # include_supers fetches each superclass closure with one request of
+    # this depth and looks up the predicates of the superclasses with at
+    # most this many concurrent requests
+    supers_depth = 40
+    supers_max_workers = 8
+    _supers_executor = None
+    # curies, categories, relationships, and ontologies are fetched on first
+    # use and kept in this json file for metadata_ttl seconds, None disables
+    metadata_cache_path = os.path.join(os.environ.get('XDG_CACHE_HOME',
+                                                      os.path.expanduser('~/.cache')),
+                                       'ontquery', 'scigraph-metadata.json')
+    metadata_ttl = 24 * 60 * 60
+    _metadata_keys = frozenset(('curies', 'categories', 'relationships', 'ontologies'))
+    _metadata_attributes = frozenset(('curies', '_remote_curies', 'prefixes',
+                                      'search_prefixes', 'categories', '_predicates'))
     def __init__(self, apiEndpoint=None, OntId=oq.OntId):  # apiEndpoint=None -> default from pyontutils.devconfig
         self.apiEndpoint = apiEndpoint
         self.OntId = OntId
+        self._metadata_lock = threading.Lock()
+        self._superclass_parents = {}
+        self._superclasses = Closure(self._superclass_parents_of)
+        self._superclass_lock = threading.Lock()
+        self._aiohttp_sessions = weakref.WeakKeyDictionary()
         super().__init__()
 
+    def __getattr__(self, name):
+        # only called for missing attributes, after setup the metadata
+        # attributes are missing until they are loaded or fetched
+        if name in self._metadata_attributes and 'sgc' in self.__dict__:
+            self._ensure_metadata()
+            return self.__dict__[name]
+
+        raise AttributeError(f'{self.__class__.__name__!r} object has no attribute {name!r}')
+
     @property
     def readonly(self):
         return True
 
+    @property
+    def identity(self):
+        return f'{super().identity} {self.apiEndpoint}'
+
     @property
     def inverses(self):
         inverses = {self.OntId(k):self.OntId(v)
@@ -33,6 +111,20 @@ class SciGraphRemote(OntService):  # incomplete and not configureable yet
     def predicates(self):
         yield from self._predicates
 
+    @property
+    def onts(self):
+        self._ensure_metadata()
+        yield from self._onts
+
+    @staticmethod
+    def _import_aiohttp():
+        try:
+            import aiohttp
+        except ModuleNotFoundError:
+            return None
+
+        return aiohttp
+
     def _import_stuff(self):
         import requests
         self.__class__._requests = requests
@@ -55,67 +147,539 @@ class SciGraphRemote(OntService):  # incomplete and not configureable yet
                                    basePath=self.apiEndpoint)
         self.sgd = self._scigraph.Dynamic(cache=self.cache, verbose=self.verbose,
                                     basePath=self.apiEndpoint)
+        # nothing is fetched here, a fresh metadata cache is applied right away
+        metadata = self._load_metadata()
+        if metadata is not None:
+            self._apply_metadata(metadata)
+
+        super().setup(**kwargs)
+
+    def _fetch_ontologies(self):
+        #return sorted(o['n']['iri'] for o in self.sgc.execute('MATCH (n:Ontology) RETURN n', 1000, 'application/json'))  # only on newer versions, update when we switch production over
+        return sorted(o['iri'] for o in
+                      self.sgc.execute('MATCH (n:Ontology) RETURN n',
+                                       1000,
+                                       'text/plain'))
+
+    def _fetch_metadata(self):
+        """ all of the metadata in one round of concurrent requests """
+        fetchers = {'curies': self.sgc.getCuries,
+                    'categories': self.sgv.getCategories,
+                    'relationships': self.sgg.getRelationships,
+                    'ontologies': self._fetch_ontologies,}
+        with ThreadPoolExecutor(max_workers=len(fetchers)) as executor:
+            futures = {k: executor.submit(f) for k, f in fetchers.items()}
+            return {k: f.result() for k, f in futures.items()}
+
+    def _load_metadata(self):
+        """ the cached metadata for this endpoint or None if it is
+            missing, malformed, or older than metadata_ttl """
+        if self.metadata_cache_path is None:
+            return None
+
+        try:
+            with open(self.metadata_cache_path, 'rt') as f:
+                entry = json.load(f)[self.identity]
+
+            created, metadata = entry['created'], entry['metadata']
+            if (time.time() >= created + self.metadata_ttl or
+                not self._metadata_keys <= metadata.keys()):
+                return None
+        except (FileNotFoundError, ValueError, LookupError, TypeError, AttributeError):
+            # a malformed entry, e.g. from another version, is a cache miss
+            return None
+
+        return metadata
+
+    def _save_metadata(self, metadata):
+        path = self.metadata_cache_path
+        if path is None:
+            return
+
+        try:
+            with open(path, 'rt') as f:
+                blob = json.load(f)
+        except (FileNotFoundError, ValueError):
+            blob = {}
+
+        if not isinstance(blob, dict):
+            blob = {}
+
+        blob[self.identity] = {'created': time.time(), 'metadata': metadata}
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temp = f'{path}.{os.getpid()}.tmp'
+            with open(temp, 'wt') as f:
+                json.dump(blob, f)
+
+            os.replace(temp, path)
+        except OSError as e:
+            log.warning(f'could not save scigraph metadata to {path} {e}')
+
+    def _ensure_metadata(self):
+        if '_predicates' in self.__dict__:
+            return
+
+        with self._metadata_lock:
+            if '_predicates' in self.__dict__:
+                return
+
+            try:
+                metadata = self._fetch_metadata()
+                self._save_metadata(metadata)
+                self._apply_metadata(metadata)
+            except AttributeError as e:
+                # __getattr__ would report this as the metadata attribute missing
+                raise exc.FetchingError(f'could not fetch scigraph metadata: {e!r}') from e
+
+    def _apply_metadata(self, metadata):
+        curies = metadata['curies']
         self.curies = type('LocalCuries', (oq.OntCuries,), {})
         self._remote_curies = type('RemoteCuries', (oq.OntCuries.new(),), {})
-        curies = self.sgc.getCuries()
         self.curies(curies)  # TODO can be used to provide curies...
         self._remote_curies(curies)
         self.prefixes = sorted(self.curies)
         self.search_prefixes = [p for p in sorted(self._remote_curies) if p != 'SCR']
-        self.categories = self.sgv.getCategories()
-        self._predicates = sorted(set(self.sgg.getRelationships()))
-        #self._onts = sorted(o['n']['iri'] for o in self.sgc.execute('MATCH (n:Ontology) RETURN n', 1000, 'application/json'))  # only on newer versions, update when we switch production over
-        self._onts = sorted(o['iri'] for o in
-                            self.sgc.execute('MATCH (n:Ontology) RETURN n',
-                                             1000,
-                                             'text/plain'))
-        super().setup(**kwargs)
+        self.categories = metadata['categories']
+        self._onts = metadata['ontologies']
+        # set last, _ensure_metadata checks for it
+        self._predicates = sorted(set(metadata['relationships']))
+
+    def clear_metadata(self):
+        """ drop the metadata so that it is fetched again on next use """
+        with self._metadata_lock:
+            for name in self._metadata_attributes:
+                self.__dict__.pop(name, None)
+
+    async def aquery(self, **kwargs):
+        """ query without blocking the event loop
+
+            query is run against the responses that have been fetched so
+            far, the requests that it makes which have no response yet are
+            fetched together with aiohttp and then it is run again, which
+            repeats until it finishes. Without aiohttp query is run in a
+            worker thread instead. """
+        if self._import_aiohttp() is None:
+            return await super().aquery(**kwargs)
+
+        if '_predicates' not in self.__dict__:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, self._ensure_metadata)
+
+        responses = {}
+        replay = self._replay(responses)
+        while True:
+            try:
+                return tuple(replay.query(**kwargs))
+            except _PendingRequest as e:
+                requests = dict(e.requests)
+                fetched = await asyncio.gather(*(self._afetch(*request)
+                                                 for request in requests.values()))
+                responses.update(zip(requests, fetched))
+
+    def _replay(self, responses):
+        """ a copy of self whose clients answer requests from responses """
+        replay = object.__new__(self.__class__)
+        replay.__dict__.update(self.__dict__)
+        for name in ('sgv', 'sgg', 'sgc', 'sgd'):
+            client = getattr(self, name)
+            rclient = object.__new__(_replay_class(client.__class__))
+            rclient.__dict__.update(client.__dict__)
+            del rclient.__dict__['_get']
+            rclient._responses = responses
+            setattr(replay, name, rclient)
+
+        def QueryResult(*args, source=None, **kwargs):
+            # results come from self, not from the replay
+            return self.QueryResult(*args, source=self if source is replay else source,
+                                    **kwargs)
+
+        replay.QueryResult = QueryResult
+        replay._map = replay._replay_map
+        return replay
+
+    def _replay_map(self, function, items):
+        """ _map for a replay, every call is made so that the requests
+            missing from all of them are fetched together """
+        results = []
+        pending = []
+        for item in items:
+            try:
+                results.append(function(item))
+            except _PendingRequest as e:
+                pending.extend(e.requests)
+
+        if pending:
+            raise _PendingRequest(pending)
+
+        return results
+
+    async def _afetch(self, method, url, params=None, output=None, api_key=None):
+        """ what restService._normal_get returns for a request, from aiohttp """
+        aiohttp = self._import_aiohttp()
+        session = self._aiohttp_session(aiohttp)
+        params = [(k, str(v)) for k, value in (params or {}).items() if value is not None
+                  for v in (value if isinstance(value, (list, tuple)) else (value,))]
+        if api_key is not None:
+            params.append(('key', api_key))
+
+        headers = {'Accept': output} if output else {}
+        request = dict(data=params) if method == 'POST' else dict(params=params)
+        try:
+            async with session.request(method, url, headers=headers, **request) as resp:
+                if resp.status == 401:
+                    raise ConnectionError(f'{resp.reason}. Did you set '
+                                          f'{self.__class__.__name__}.api_key = my_api_key?')
+                elif not resp.ok:
+                    return None
+
+                content_type = resp.headers.get('content-type', '')
+                if content_type == 'application/json':
+                    return await resp.json()
+                elif content_type.startswith('text/plain'):
+                    return await resp.text()
+                else:
+                    return await resp.read()
+        except aiohttp.ClientConnectionError as e:
+            raise ConnectionError(f'Could not connect to {url}. '
+                                  'Are SciGraph services running?') from e
+
+    def _aiohttp_session(self, aiohttp):
+        # sessions are bound to the loop they are created in
+        loop = asyncio.get_running_loop()
+        session = self._aiohttp_sessions.get(loop)
+        if session is None or session.closed:
+            connector = aiohttp.TCPConnector(limit=self.aquery_max_workers or 100)
+            session = self._aiohttp_sessions[loop] = aiohttp.ClientSession(connector=connector)
+
+        return session
+
+    async def aclose(self):
+        """ close the aiohttp session that aquery opened for the running loop """
+        session = self._aiohttp_sessions.pop(asyncio.get_running_loop(), None)
+        if session is not None:
+            await session.close()
+
+    @staticmethod
+    def _cypher_string(value):
+        return "'" + str(value).replace('\\', '\\\\').replace("'", "\\'") + "'"
+
+    def iter_terms(self, prefix=tuple(), category=tuple(), page_size=100):
+        """ page through classes with paged cypher ordered by iri,
+            prefixes and categories this endpoint does not have are
+            skipped so that OntQuery.iter_terms can move on to services
+            that have them, nothing is yielded if none of them are here """
+        query_args = dict(prefix=one_or_many(prefix), category=one_or_many(category))
+        prefix = [p for p in query_args['prefix'] if p in self.curies]
+        category = [c for c in query_args['category'] if c in self.categories]
+        for name, requested, known in (('prefixes', query_args['prefix'], prefix),
+                                       ('categories', query_args['category'], category)):
+            if len(known) != len(requested):
+                log.debug(f'{sorted(set(requested) - set(known))} not in '
+                          f'{self.__class__.__name__}.{name}')
+
+            if requested and not known:
+                return iter(())
+
+        conditions = []
+        if prefix:
+            conditions.append(' OR '.join(f'n.iri STARTS WITH {self._cypher_string(self.curies[p])}'
+                                          for p in prefix))
+        if category:
+            conditions.append(' OR '.join(f'{self._cypher_string(c)} IN n.category'
+                                          for c in category))
+
+        return self._iter_terms(conditions, query_args, page_size)
+
+    def _iter_terms(self, conditions, query_args, page_size):
+        # page by key so that each page starts where the last one ended
+        # instead of sorting and skipping everything before it
+        last = None
+        while True:
+            after = [] if last is None else [f'n.iri > {self._cypher_string(last)}']
+            where = ' AND '.join(f'({c})' for c in conditions + after)
+            cypher = ('MATCH (n:Class) ' +
+                      (f'WHERE {where} ' if where else '') +
+                      f'RETURN n ORDER BY n.iri LIMIT {page_size}')
+            page = self.sgc.execute(cypher, page_size, 'text/plain')
+            if not page:
+                return
+
+            for node in page:
+                yield self._node_result(node, query_args)
+
+            if len(page) < page_size:
+                return
+
+            last = page[-1]['iri']
+
+    def _node_result(self, node, query_args):
+        """ QueryResult from the properties of a neo4j node """
+        def many(key):
+            value = node.get(key, ())
+            return (value,) if isinstance(value, str) else tuple(value)
+
+        ni = lambda i: next(iter(sorted(i))) if i else None
+        iri = node['iri']
+        curie = self.OntId(iri).curie
+        return self.QueryResult(
+            query_args=query_args,
+            iri=iri,
+            curie=curie,
+            label=ni(many('label')),
+            labels=many('label'),
+            definition=ni(many('definition')),
+            synonyms=many('synonym'),
+            deprecated=bool(node.get('deprecated', False)),
+            acronym=many('acronym'),
+            abbrev=many('abbreviation'),
+            prefix=curie.split(':')[0] if curie else None,
+            category=ni(many('category')),
+            predicates={},
+            source=self)
+
+    @staticmethod
+    def _inverse_direction(direction):
+        return ('OUTGOING' if
+                direction == 'INCOMING' else
+                ('INCOMING' if
+                 direction == 'OUTGOING'
+                 else direction))
+
+    def _batchQuery(self, result, subject, predicates, direction='OUTGOING', entail=True):
+        """ fill result with the depth 1 values of all predicates from a
+            single neighbors request, and a second one for their inverses,
+            edges are partitioned by their predicate here instead of by
+            making one request per predicate
+
+            returns the predicates that have values and the subject node
+            from the response, or None if the response did not include it """
+        unshorten = {}
+        relationships = []
+        inverses = []
+        for predicate in predicates:
+            if (hasattr(predicate, 'prefix') and
+                predicate.prefix in ('owl', 'rdfs')):
+                unshorten[predicate.suffix] = (predicate.curie if predicate.curie
+                                               else str(predicate))
+                predicate = predicate.suffix
+
+            relationships.append(predicate)
+            if predicate in self.inverses:
+                inverses.append(self.inverses[predicate])
+
+        neighbors = self.sgg.getNeighbors(subject, relationshipType=relationships,
+                                          depth=1, direction=direction, entail=entail)
+        out_predicates = []
+        values = tuple(sorted(self._graphQuery(subject, relationships, direction=direction,
+                                               entail=entail, neighbors=neighbors)))
+        for pred, pvalues in bunch(values).items():
+            pred = unshorten.get(pred, pred)
+            out_predicates.append(pred)
+            result[pred] = tuple(pvalues)
+
+        if inverses:
+            inv_direction = self._inverse_direction(direction)
+            inv_values = tuple(sorted(self._graphQuery(subject, inverses,
+                                                       direction=inv_direction,
+                                                       entail=False, inverse=True)))
+            for pred, ipvalues in bunch(inv_values).items():
+                pred = unshorten.get(pred, pred)
+                if pred in result:
+                    rp = result[pred]
+                    result[pred] += tuple(v for v in ipvalues if v not in rp)
+                else:
+                    result[pred] = tuple(ipvalues)
+                    out_predicates.append(pred)
+
+        scurie = self._remote_curies.qname(subject)
+        node = None
+        if neighbors:
+            for n in neighbors['nodes']:
+                if n['id'] == scurie:
+                    node = n
+                    break
+
+        return out_predicates, node
+
+    def _fetch_superclasses(self, subject):
+        """ parents of every node in the subClassOf neighbourhood of subject
+            that is close enough to subject for all of its parents to be in
+            the response, so one request covers all of the shared ancestors """
+        d_nodes_edges = self.sgg.getNeighbors(subject, relationshipType='subClassOf',
+                                              depth=self.supers_depth,
+                                              direction='OUTGOING', entail=True)
+        parents = {}
+        if d_nodes_edges:
+            for e in d_nodes_edges['edges']:
+                if [v for k, v in e.items() if k != 'meta' and v.startswith('_:')]:
+                    continue
+
+                s = self.OntId(e['sub'])
+                if s not in parents:
+                    parents[s] = []
+
+                parents[s].append(self.OntId(e['obj']))
+
+        distances = {subject: 0}
+        frontier = [subject]
+        while frontier:
+            next_frontier = []
+            for node in frontier:
+                for parent in parents.get(node, ()):
+                    if parent not in distances:
+                        distances[parent] = distances[node] + 1
+                        next_frontier.append(parent)
+
+            frontier = next_frontier
+
+        return {node: tuple(parents.get(node, ()))
+                for node, distance in distances.items()
+                if distance < self.supers_depth}
+
+    def _superclass_parents_of(self, node):
+        # adjacency for self._superclasses, superclasses fetches every
+        # node that the closure will reach before it takes the lock
+        return self._superclass_parents[node]
+
+    def _missing_superclasses(self, nodes):
+        """ nodes reachable from nodes whose parents are not fetched """
+        parents = self._superclass_parents
+        missing = []
+        seen = set(nodes)
+        frontier = list(seen)
+        while frontier:
+            next_frontier = []
+            for node in frontier:
+                node_parents = parents.get(node)
+                if node_parents is None:
+                    missing.append(node)
+                    continue
+
+                for parent in node_parents:
+                    if parent not in seen:
+                        seen.add(parent)
+                        next_frontier.append(parent)
+
+            frontier = next_frontier
+
+        return missing
+
+    def _map(self, function, items):
+        """ list(map(function, items)) with concurrent calls """
+        items = list(items)
+        if len(items) < 2:
+            return [function(item) for item in items]
+
+        if self._supers_executor is None:
+            with self._superclass_lock:
+                if self._supers_executor is None:
+                    self._supers_executor = ThreadPoolExecutor(
+                        max_workers=self.supers_max_workers,
+                        thread_name_prefix=f'{self.__class__.__name__}-supers')
+
+        return list(self._supers_executor.map(function, items))
+
+    def superclasses(self, nodes):
+        """ the subClassOf closure of each of nodes, closures are kept
+            so ancestors shared between terms are only fetched once """
+        nodes = [self.OntId(n) for n in nodes]
+        while True:
+            # requests are made without the lock, it is only held to update
+            # the parents and to walk them once nothing is missing, which is
+            # checked again under the lock in case they were cleared
+            missing = self._missing_superclasses(nodes)
+            if not missing:
+                with self._superclass_lock:
+                    if not self._missing_superclasses(nodes):
+                        return [self._superclasses.closure(n) for n in nodes]
+
+                continue
+
+            fetched = self._map(self._fetch_superclasses, missing)
+            with self._superclass_lock:
+                for parents in fetched:
+                    self._superclass_parents.update(parents)
+
+    def clear_superclasses(self):
+        with self._superclass_lock:
+            self._superclass_parents.clear()
+            self._superclasses.clear()
+
+    def _supersQuery(self, subject, predicate, depth=1, direction='OUTGOING',
+                     entail=True, inverse=False):
+        """ predicate values of subject and of all of its superclasses,
+            then the same for each new value, one level at a time
+
+            each level first gets the superclass closures of its nodes
+            and then looks up the predicate for all of the nodes and
+            their superclasses concurrently, superclasses are not
+            themselves reported as values and values of superclasses
+            are not followed further """
+        def lookup(node):
+            return tuple(self._graphQuery(node, predicate, depth=depth,
+                                          direction=direction, entail=entail,
+                                          inverse=inverse))
+
+        done = {subject}
+        frontier = [subject]
+        while frontier:
+            supers = []
+            for closure in self.superclasses(frontier):
+                for sup in closure:
+                    if sup not in done:
+                        done.add(sup)
+                        supers.append(sup)
+
+            values = self._map(lookup, supers + frontier)
+            for pos in values[:len(supers)]:
+                for p, o in pos:
+                    if o not in done:
+                        done.add(o)
+                        yield p, o
+
+            next_frontier = []
+            for pos in values[len(supers):]:
+                for p, o in pos:
+                    if o not in done:
+                        done.add(o)
+                        next_frontier.append(o)
+                        yield p, o
+
+            frontier = next_frontier
 
     def _graphQuery(self, subject, predicate, depth=1, direction='OUTGOING',
-                    entail=True, inverse=False, include_supers=False, done=None):
+                    entail=True, inverse=False, include_supers=False,
+                    neighbors=None):
+        """ predicate may be a list of relationship types when depth is 1,
+            neighbors is a getNeighbors response that was already fetched """
         # TODO need predicate mapping... also subClassOf inverse?? hasSubClass??
         # TODO how to handle depth? this is not an obvious or friendly way to do this
         if entail and inverse:
             raise NotImplementedError('Currently cannot handle inverse and entail at the same time.')
 
         if include_supers:
-            if done is None:
-                done = set()
-
-            done.add(subject)
-            for _, sup in self._graphQuery(subject, 'subClassOf', depth=40):
-                if sup not in done:
-                    done.add(sup)
-                    for p, o in self._graphQuery(sup, predicate, depth=depth,
-                                                 direction=direction, entail=entail,
-                                                 inverse=inverse, done=done):
-                        if o not in done:
-                            done.add(o)
-                            yield p, o
-
-            for p, o in self._graphQuery(subject, predicate, depth=depth,
+            yield from self._supersQuery(subject, predicate, depth=depth,
                                          direction=direction, entail=entail,
-                                         inverse=inverse, done=done):
-                if o not in done:
-                    yield p, o
-                    done.add(o)
-                    yield from self._graphQuery(o, predicate, depth=depth,
-                                                direction=direction, entail=entail,
-                                                inverse=inverse, include_supers=include_supers, done=done)
+                                         inverse=inverse)
             return
 
-        d_nodes_edges = self.sgg.getNeighbors(subject, relationshipType=predicate,
-                                              depth=depth, direction=direction, entail=entail)  # TODO
+        if neighbors is None:
+            d_nodes_edges = self.sgg.getNeighbors(subject, relationshipType=predicate,
+                                                  depth=depth, direction=direction, entail=entail)  # TODO
+        else:
+            d_nodes_edges = neighbors
 
         if d_nodes_edges:
             edges = d_nodes_edges['edges']
         else:
+            _ps = predicate if isinstance(predicate, list) else [predicate]
             if inverse:  # it is probably a bad idea to try to be clever here AND INDEED IT HAS BEEN
-                predicate = self.inverses[predicate]
+                _ps = [self.inverses[p] for p in _ps]
 
-            _p = (predicate.curie
-                  if hasattr(predicate, 'curie') and predicate.curie is not None
-                  else predicate)
+            _p = ', '.join(p.curie
+                           if hasattr(p, 'curie') and p.curie is not None
+                           else p for p in _ps)
             log.warning(f'{subject.curie} has no edges with predicate {_p} ')
             return
 
@@ -243,7 +807,12 @@ class SciGraphRemote(OntService):  # incomplete and not configureable yet
             if result is None:
                 return
 
-            if predicates:  # TODO incoming/outgoing, 'ALL' by depth to avoid fanout
+            node = None
+            if (predicates and self.batch_neighbors and
+                depth == 1 and not include_supers):
+                out_predicates, node = self._batchQuery(result, identifier, predicates,
+                                                        direction=direction, entail=entail)
+            elif predicates:  # TODO incoming/outgoing, 'ALL' by depth to avoid fanout
                 short = None
                 for predicate in predicates:
                     if (hasattr(predicate, 'prefix') and
@@ -277,11 +846,7 @@ class SciGraphRemote(OntService):  # incomplete and not configureable yet
 
                     if predicate in self.inverses:
                         p = self.inverses[predicate]
-                        inv_direction = ('OUTGOING' if
-                                         direction == 'INCOMING' else
-                                         ('INCOMING' if
-                                          direction == 'OUTGOING'
-                                          else direction))
+                        inv_direction = self._inverse_direction(direction)
 
                         # FIXME I'm betting reverse entailed is completely broken
                         inv_values = tuple(sorted(self._graphQuery(identifier, p,
@@ -302,10 +867,13 @@ class SciGraphRemote(OntService):  # incomplete and not configureable yet
                                     result[pred] = tuple(ipvalues)
                                     out_predicates.append(pred)
 
-            res = self.sgg.getNode(identifier)
+            if node is None or 'types' not in node.get('meta', {}):
+                # neighbors responses do not always carry the full meta
+                node = self.sgg.getNode(identifier)['nodes'][0]
+
             types = tuple()
             _type = None
-            for _type in res['nodes'][0]['meta']['types']:
+            for _type in node['meta']['types']:
                 if _type not in result['categories']:
                     _type = self.OntId('owl:' + _type)
                     types += _type,
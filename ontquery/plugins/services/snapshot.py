@@ -0,0 +1,234 @@
+"""
+Binary snapshots of rdflib graphs that are memory mapped on load.
+
+    rdflibLocal(graph).snapshot(path)
+    remote = rdflibLocal.from_snapshot(path)
+
+A snapshot holds a sorted string table of every node in the graph and
+the triples as integer coded rows indexed three ways, by subject, by
+object, and by predicate. Loading a snapshot only reads the header, the
+rest of the file is paged in by the os as queries touch it, so startup
+does not depend on the size of the graph and processes that load the
+same file share one copy in the page cache.
+"""
+
+import rdflib
+from rdflib.plugins.stores.memory import SimpleMemory
+from .rdflib import GraphIndex
+from .mapped import StringTable, write_sections, read_sections, compress
+
+MAGIC = b'OQSNAP\x00\x01'
+
+
+def encode_node(node):
+    """ bytes that sort blank nodes first, then literals, then uris """
+    if isinstance(node, rdflib.BNode):
+        return b'B' + str(node).encode()
+    elif isinstance(node, rdflib.Literal):
+        return b'\x00'.join((b'L' + str(node).encode(),
+                             str(node.datatype or '').encode(),
+                             (node.language or '').encode()))
+    else:
+        return b'U' + str(node).encode()
+
+
+def decode_node(blob):
+    tag, value = blob[:1], blob[1:].decode()
+    if tag == b'U':
+        return rdflib.URIRef(value)
+    elif tag == b'L':
+        # iris and language tags cannot contain nul but the lexical form can
+        lexical, datatype, language = value.rsplit('\x00', 2)
+        return rdflib.Literal(lexical,
+                              datatype=rdflib.URIRef(datatype) if datatype else None,
+                              lang=language or None)
+    else:
+        return rdflib.BNode(value)
+
+
+def write_snapshot(graph, path):
+    """ write graph to path as a snapshot that load_snapshot can map """
+    triples = list(graph)
+    strings = sorted(set(encode_node(n) for t in triples for n in t))
+    ids = {string: i for i, string in enumerate(strings)}
+    spo, ops, pso = {}, {}, {}
+    for s, p, o in triples:
+        si, pi, oi = ids[encode_node(s)], ids[encode_node(p)], ids[encode_node(o)]
+        for rows, key, pair in ((spo, si, (pi, oi)), (ops, oi, (pi, si)), (pso, pi, (si, oi))):
+            if key not in rows:
+                rows[key] = []
+
+            rows[key].append(pair)
+
+    n = len(strings)
+    table = StringTable.from_strings(strings)
+    sections = {'string_offsets': table.offsets, 'strings': table.blob}
+    for name, rows in (('spo', spo), ('ops', ops), ('pso', pso)):
+        offsets, a, b = compress(n, rows)
+        sections.update({f'{name}_offsets': offsets, f'{name}_a': a, f'{name}_b': b})
+
+    meta = {'identifier': encode_node(graph.identifier).decode(),
+            'namespaces': [[p, str(n)] for p, n in graph.namespaces()],
+            'nodes': n,
+            'bnodes': sum(1 for s in strings if s[:1] == b'B'),
+            'triples': len(triples),}
+    write_sections(path, MAGIC, meta, sections)
+
+
+class SnapshotStore(SimpleMemory):
+    """ Read only rdflib store backed by a memory mapped snapshot.
+
+        Namespace bindings are kept in memory and can be changed,
+        adding or removing triples raises a TypeError. """
+
+    def __init__(self, path):
+        super().__init__()
+        self.path = path
+        self.header, self._mmap, sections = read_sections(path, MAGIC)
+        self.strings = StringTable(sections['string_offsets'], sections['strings'])
+        self.rows = {name: (sections[f'{name}_offsets'],
+                            sections[f'{name}_a'],
+                            sections[f'{name}_b'])
+                     for name in ('spo', 'ops', 'pso')}
+        self.bnodes = self.header['bnodes']
+        self._nodes = {}
+        for prefix, namespace in self.header['namespaces']:
+            self.bind(prefix, rdflib.URIRef(namespace))
+
+    def node(self, i):
+        try:
+            return self._nodes[i]
+        except KeyError:
+            node = self._nodes[i] = decode_node(self.strings[i])
+            return node
+
+    def id(self, node):
+        """ the int for node or None if it is not in the snapshot """
+        return self.strings.find(encode_node(node))
+
+    def row(self, name, i):
+        offsets, a, b = self.rows[name]
+        start, stop = offsets[i], offsets[i + 1]
+        return zip(a[start:stop], b[start:stop])
+
+    def _triples(self, s, p, o):
+        if s is not None:
+            for pi, oi in self.row('spo', s):
+                if (p is None or pi == p) and (o is None or oi == o):
+                    yield s, pi, oi
+        elif o is not None:
+            for pi, si in self.row('ops', o):
+                if p is None or pi == p:
+                    yield si, pi, o
+        elif p is not None:
+            for si, oi in self.row('pso', p):
+                yield si, p, oi
+        else:
+            for si in range(len(self.strings)):
+                for pi, oi in self.row('spo', si):
+                    yield si, pi, oi
+
+    def triples(self, triple_pattern, context=None):
+        ids = []
+        for node in triple_pattern:
+            if node is None:
+                ids.append(None)
+            else:
+                i = self.id(node)
+                if i is None:
+                    return
+
+                ids.append(i)
+
+        node = self.node
+        for s, p, o in self._triples(*ids):
+            yield (node(s), node(p), node(o)), iter(())
+
+    def __len__(self, context=None):
+        return self.header['triples']
+
+    def add(self, triple, context=None, quoted=False):
+        raise TypeError('Cannot add to a snapshot.')
+
+    def addN(self, quads):
+        raise TypeError('Cannot add to a snapshot.')
+
+    def remove(self, triple_pattern, context=None):
+        raise TypeError('Cannot remove from a snapshot.')
+
+    def graph_index(self, OntId):
+        """ a GraphIndex over the prebuilt rows """
+        return SnapshotIndex(self, OntId)
+
+    def close(self, commit_pending_transaction=False):
+        # the file is unmapped once nothing holds a view into it
+        self.strings = self.rows = self._mmap = None
+
+
+class _Ids:
+    def __init__(self, store):
+        self.store = store
+
+    def get(self, node, default=None):
+        i = self.store.id(node)
+        return default if i is None else i
+
+    def __getitem__(self, node):
+        i = self.store.id(node)
+        if i is None:
+            raise KeyError(node)
+
+        return i
+
+    def __contains__(self, node):
+        return self.store.id(node) is not None
+
+
+class _Nodes:
+    def __init__(self, store):
+        self.store = store
+
+    def __len__(self):
+        return len(self.store.strings)
+
+    def __getitem__(self, i):
+        return self.store.node(i)
+
+
+class SnapshotIndex(GraphIndex):
+    """ GraphIndex whose rows are the subject and object rows of a
+        snapshot, edges to and from blank nodes are skipped """
+
+    def __init__(self, store, OntId):
+        self.OntId = OntId
+        self.store = store
+        self.ids = _Ids(store)
+        self.nodes = _Nodes(store)
+        self.offsets, self.edge_p, self.edge_o = store.rows['spo']
+        self._reverse = store.rows['ops']
+        self._curies = {}
+        self._values = {}
+        self._classes = frozenset(i for i in (store.id(rdflib.RDF.type),
+                                              store.id(rdflib.RDFS.subClassOf))
+                                  if i is not None)
+
+    def edges(self, node):
+        bnodes = self.store.bnodes
+        return ((p, o) for p, o in super().edges(node) if o >= bnodes)
+
+    def subjects(self, predicate, node):
+        i, pi = self.ids.get(node), self.ids.get(predicate)
+        if i is None or pi is None:
+            return ()
+
+        bnodes, (offsets, edge_p, edge_s) = self.store.bnodes, self._reverse
+        start, stop = offsets[i], offsets[i + 1]
+        return (self.nodes[si] for p, si in zip(edge_p[start:stop], edge_s[start:stop])
+                if p == pi and si >= bnodes)
+
+
+def load_snapshot(path):
+    """ a read only rdflib.Graph for the snapshot at path """
+    store = SnapshotStore(path)
+    identifier = decode_node(store.header['identifier'].encode())
+    return rdflib.Graph(store=store, identifier=identifier, bind_namespaces='none')
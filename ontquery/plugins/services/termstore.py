@@ -0,0 +1,476 @@
+"""
+A read only service over a memory mapped term store file.
+
+Many worker processes on one host can load the same file and share a
+single page cached copy instead of each holding an rdflib graph in ram.
+Build a term store from an rdflibLocal graph or a SciGraph graph export.
+
+    python -m ontquery.plugins.services.termstore rdflib   <out> <rdf-file> ...
+    python -m ontquery.plugins.services.termstore scigraph <out> <graph-json>
+
+The file holds a sorted string table of iris and literals, the sorted
+string ids of the terms, the (predicate, object) edges of each term, and
+an index from normalized labels and synonyms to terms.
+"""
+
+import sys
+import json
+from array import array
+from bisect import bisect_left
+from itertools import chain, islice
+import ontquery as oq
+from ontquery.closure import Closure
+from ontquery.services import OntService
+from ontquery.utils import one_or_many, normalize_label, log
+from .mapped import StringTable, write_sections, read_sections, compress
+
+MAGIC = b'OQTERM\x00\x01'
+
+RDF_TYPE = 'http://www.w3.org/1999/02/22-rdf-syntax-ns#type'
+RDFS = 'http://www.w3.org/2000/01/rdf-schema#'
+OWL = 'http://www.w3.org/2002/07/owl#'
+EXACT_SYNONYM = 'http://www.geneontology.org/formats/oboInOwl#hasExactSynonym'
+DEFINITION = 'http://purl.obolibrary.org/obo/IAO_0000115'
+
+
+def write_term_store(path, terms, fields, label_predicates, n_label,
+                     curies=None, source=None):
+    """ Write a term store to path.
+
+        terms is an iterable of (iri, edges) where edges is a sequence of
+        (predicate iri, value, value is an iri). fields maps predicate
+        iris to the label, synonyms, and definition keys of results.
+        label_predicates are indexed for label= and term= in rank order,
+        label= only uses the first n_label of them. """
+    edges_by_iri = {}
+    for iri, edges in terms:
+        if iri not in edges_by_iri:
+            edges_by_iri[iri] = []
+
+        edges_by_iri[iri].extend(edges)
+
+    strings = set(b'U' + iri.encode() for iri in edges_by_iri)
+    for edges in edges_by_iri.values():
+        for p, o, is_iri in edges:
+            strings.add(b'U' + p.encode())
+            strings.add((b'U' if is_iri else b'L') + str(o).encode())
+
+    strings = sorted(strings)
+    ids = {string: i for i, string in enumerate(strings)}
+    term_iris = sorted(edges_by_iri)
+    rank = {p: i for i, p in enumerate(label_predicates)}
+    rows, labels = {}, {}
+    for t, iri in enumerate(term_iris):
+        rows[t] = []
+        for p, o, is_iri in edges_by_iri[iri]:
+            o_key = (b'U' if is_iri else b'L') + str(o).encode()
+            rows[t].append((ids[b'U' + p.encode()], ids[o_key]))
+            if p in rank and not is_iri:
+                key = normalize_label(o).encode()
+                if key not in labels:
+                    labels[key] = {}
+
+                labels[key][t] = min(labels[key].get(t, rank[p]), rank[p])
+
+        rows[t] = sorted(set(rows[t]))
+
+    keys = sorted(labels)
+    postings = {i: list(labels[key].items()) for i, key in enumerate(keys)}
+    table = StringTable.from_strings(strings)
+    label_table = StringTable.from_strings(keys)
+    edge_offsets, edge_p, edge_o = compress(len(term_iris), rows)
+    posting_offsets, posting_term, posting_rank = compress(len(keys), postings)
+    sections = {'string_offsets': table.offsets,
+                'strings': table.blob,
+                'terms': array('i', (ids[b'U' + iri.encode()] for iri in term_iris)),
+                'edge_offsets': edge_offsets,
+                'edge_p': edge_p,
+                'edge_o': edge_o,
+                'label_offsets': label_table.offsets,
+                'labels': label_table.blob,
+                'posting_offsets': posting_offsets,
+                'posting_term': posting_term,
+                'posting_rank': posting_rank,}
+    meta = {'source': source,
+            'terms': len(term_iris),
+            'curies': dict(curies or {}),
+            'fields': fields,
+            'label_predicates': list(label_predicates),
+            'n_label': n_label,
+            'predicates': sorted(set(p for edges in edges_by_iri.values()
+                                     for p, o, is_iri in edges)),}
+    write_sections(path, MAGIC, meta, sections)
+
+
+def build_from_rdflib(service, path):
+    """ write the classes of an rdflibLocal, or of an rdflib graph,
+        to a term store at path using the label and synonym predicates
+        of the service """
+    import rdflib
+    from .rdflib import rdflibLocal
+    if not isinstance(service, rdflibLocal):
+        service = rdflibLocal(service)
+
+    graph = service.graph
+    subjects = sorted(set(s for p in (rdflib.RDF.type, rdflib.RDFS.subClassOf)
+                          for s in graph.subjects(p, None)
+                          if isinstance(s, rdflib.URIRef)))
+
+    def terms():
+        for s in subjects:
+            yield str(s), [(str(p), str(o), isinstance(o, rdflib.URIRef))
+                           for p, o in graph.predicate_objects(s)
+                           if not isinstance(o, rdflib.BNode)]
+
+    label_predicates = []
+    for keyword in ('label', 'term'):
+        for p in service.predicate_mapping[keyword]:
+            if str(p) not in label_predicates:
+                label_predicates.append(str(p))
+
+    write_term_store(path, terms(),
+                     {str(p): field for p, field in service._translate.items()},
+                     label_predicates, len(service.predicate_mapping['label']),
+                     curies={p: str(n) for p, n in graph.namespaces()},
+                     source=str(graph.identifier))
+
+
+def build_from_scigraph(export, path, curies):
+    """ write the nodes of a SciGraph graph export to a term store at path,
+        export is the json of a SciGraph graph endpoint with nodes
+        [{'id', 'lbl', 'meta'}] and edges [{'sub', 'pred', 'obj'}],
+        curies expands the curies that SciGraph uses for ids """
+    bare = {'subClassOf': RDFS + 'subClassOf',
+            'subPropertyOf': RDFS + 'subPropertyOf',
+            'isDefinedBy': RDFS + 'isDefinedBy',
+            'equivalentClass': OWL + 'equivalentClass',
+            'disjointWith': OWL + 'disjointWith',
+            'type': RDF_TYPE,}
+
+    def expand(id):
+        if id in bare:
+            return bare[id]
+
+        prefix, sep, suffix = id.partition(':')
+        if sep and prefix in curies and not suffix.startswith('//'):
+            return curies[prefix] + suffix
+
+        return id
+
+    edges = {}
+    for node in export['nodes']:
+        iri = expand(node['id'])
+        meta = node.get('meta', {})
+        term = edges[iri] = []
+        if node.get('lbl'):
+            term.append((RDFS + 'label', node['lbl'], False))
+
+        for synonym in meta.get('synonym', ()):
+            term.append((EXACT_SYNONYM, synonym, False))
+
+        for definition in meta.get('definition', ()):
+            term.append((DEFINITION, definition, False))
+
+        for type in meta.get('types', ()):
+            term.append((RDF_TYPE, OWL + type, True))
+
+        if any(meta.get('deprecated', ())):
+            term.append((OWL + 'deprecated', 'true', False))
+
+    for edge in export['edges']:
+        sub = expand(edge['sub'])
+        if sub in edges:
+            edges[sub].append((expand(edge['pred']), expand(edge['obj']), True))
+
+    write_term_store(path, edges.items(),
+                     {RDFS + 'label': 'label',
+                      EXACT_SYNONYM: 'synonyms',
+                      DEFINITION: 'definition',},
+                     (RDFS + 'label', EXACT_SYNONYM), 1,
+                     curies=curies, source='scigraph')
+
+
+class TermStoreLocal(OntService):
+    """ Read only service that answers queries from a term store file
+        written by build_from_rdflib or build_from_scigraph """
+
+    def __init__(self, path, OntId=oq.OntId):
+        self.path = path
+        self.OntId = OntId
+        self.header, self._mmap, sections = read_sections(path, MAGIC)
+        self.strings = StringTable(sections['string_offsets'], sections['strings'])
+        self.terms = sections['terms']
+        self.edge_offsets = sections['edge_offsets']
+        self.edge_p = sections['edge_p']
+        self.edge_o = sections['edge_o']
+        self.labels = StringTable(sections['label_offsets'], sections['labels'])
+        self.posting_offsets = sections['posting_offsets']
+        self.posting_term = sections['posting_term']
+        self.posting_rank = sections['posting_rank']
+        self.fields = self.header['fields']
+        self._values = {}
+        self._curies = {}
+        self._closures = {}
+        super().__init__()
+
+    @property
+    def readonly(self):
+        return True
+
+    @property
+    def identity(self):
+        return f'{super().identity} {self.header["source"]} {self.header["terms"]}'
+
+    @property
+    def curies(self):
+        return self.header['curies']
+
+    @property
+    def predicates(self):
+        yield from self.header['predicates']
+
+    def add(self, iri):
+        raise TypeError('Cannot add to a term store.')
+
+    def __len__(self):
+        return len(self.terms)
+
+    def term_index(self, iri):
+        """ the index of the term for iri or None """
+        sid = self.strings.find(b'U' + str(iri).encode())
+        return None if sid is None else self._term_of(sid)
+
+    def _term_of(self, sid):
+        t = bisect_left(self.terms, sid)
+        if t < len(self.terms) and self.terms[t] == sid:
+            return t
+
+    def iri(self, t):
+        return self.strings[self.terms[t]][1:].decode()
+
+    def edges(self, t):
+        start, stop = self.edge_offsets[t], self.edge_offsets[t + 1]
+        return zip(self.edge_p[start:stop], self.edge_o[start:stop])
+
+    def _iri(self, sid):
+        return self.strings[sid][1:].decode()
+
+    def value(self, sid):
+        """ OntId for iris and str for literals """
+        try:
+            return self._values[sid]
+        except KeyError:
+            string = self.strings[sid]
+            value = string[1:].decode()
+            if string[:1] == b'U':
+                value = self.OntId(value)
+
+            self._values[sid] = value
+            return value
+
+    def curie(self, sid):
+        try:
+            return self._curies[sid]
+        except KeyError:
+            curie = self._curies[sid] = self.OntId(self._iri(sid)).curie
+            return curie
+
+    def closure(self, predicate_sid):
+        """ Closure engine over the objects of predicate that are terms """
+        if predicate_sid not in self._closures:
+            def adjacency(sid):
+                t = self._term_of(sid)
+                if t is None:
+                    return ()
+
+                return (o for p, o in self.edges(t) if p == predicate_sid)
+
+            self._closures[predicate_sid] = Closure(adjacency)
+
+        return self._closures[predicate_sid]
+
+    def search(self, string, n_rank=None):
+        """ term indexes with a label or synonym that normalizes to string,
+            ranked by predicate then by iri, only the first n_rank label
+            predicates are used if it is set """
+        k = self.labels.find(normalize_label(string).encode())
+        if k is None:
+            return []
+
+        best = {}
+        for i in range(self.posting_offsets[k], self.posting_offsets[k + 1]):
+            t, rank = self.posting_term[i], self.posting_rank[i]
+            if n_rank is None or rank < n_rank:
+                best[t] = rank
+
+        return sorted(best, key=lambda t: (best[t], t))
+
+    def _result(self, t, kwargs, predicates=tuple(), depth=0):
+        def append_preds(c, o):
+            if c not in out['predicates']:
+                out['predicates'][c] = o
+            elif isinstance(out['predicates'][c], tuple):
+                out['predicates'][c] += o,
+            else:
+                out['predicates'][c] = out['predicates'][c], o
+
+        out = {'predicates': {}}
+        iri = self.iri(t)
+        out['iri'] = iri
+        out['curie'] = self.OntId(iri).curie
+        fields = self.fields
+        for p, o in self.edges(t):
+            p_iri = self._iri(p)
+            value = self.value(o)
+            field = fields.get(p_iri)
+            if p_iri == RDF_TYPE:
+                if 'type' not in out:
+                    out['type'] = value
+                else:
+                    if 'types' not in out:
+                        out['types'] = out['type'],
+
+                    out['types'] += value,
+
+            elif p_iri == OWL + 'deprecated':
+                out['deprecated'] = value in ('true', '1')
+
+            if field is None:
+                c = self.curie(p)
+                if p_iri == RDFS + 'subClassOf' and c not in out['predicates']:
+                    out['predicates'][c] = tuple()
+
+                append_preds(c, value)
+            elif field == 'synonyms':
+                out[field] = out.get(field, tuple()) + (value,)
+            elif field in out:
+                if not isinstance(out[field], tuple):
+                    out[field] = out[field],
+
+                out[field] += value,
+            else:
+                out[field] = value
+
+        if depth > 0:
+            for predicate in predicates:
+                p = self.strings.find(b'U' + str(self.OntId(predicate).iri).encode())
+                if p is None or self.fields.get(self._iri(p)):
+                    continue
+
+                c = self.curie(p)
+                if c not in out['predicates']:
+                    continue
+
+                sid = self.terms[t]
+                for level in self.closure(p).levels(sid, depth + 1)[1:]:
+                    for o in level:
+                        append_preds(c, self.value(o))
+
+        return self.QueryResult(kwargs, **out, source=self)
+
+    def _filtered(self, terms, kwargs, prefix, exclude_prefix, limit):
+        for t in self._prefix_filtered(terms, prefix, exclude_prefix, limit, iri=self.iri):
+            yield self._result(t, kwargs)
+
+    def iter_terms(self, prefix=tuple(), category=tuple(), page_size=100):
+        """ terms whose curie has one of prefix, every term if prefix is
+            empty, page_size terms are read from the store at a time """
+        if category:
+            raise NotImplementedError(f'{self.__class__.__name__} has no categories')
+
+        return self._iter_terms(one_or_many(prefix), page_size)
+
+    def _iter_terms(self, prefix, page_size):
+        kwargs = {'prefix': prefix}
+        terms = self._prefix_filtered(self._prefix_terms(prefix), prefix, tuple(), None,
+                                      iri=self.iri)
+        while True:
+            page = list(islice(terms, page_size))
+            for t in page:
+                yield self._result(t, kwargs)
+
+            if len(page) < page_size:
+                return
+
+    def _prefix_terms(self, prefix):
+        """ the terms whose iri starts with the namespace of one of prefix,
+            in order and without repeats, every term if prefix is empty,
+            the curie of a term can still have a longer prefix """
+        if not prefix:
+            return range(len(self.terms))
+
+        ranges = []
+        for p in prefix:
+            if p not in self.curies:
+                log.debug(f'{p} not in {self.path}')
+                continue
+
+            start, stop = self.strings.range(b'U' + self.curies[p].encode())
+            ranges.append((bisect_left(self.terms, start), bisect_left(self.terms, stop)))
+
+        merged = []
+        for start, stop in sorted(ranges):
+            if merged and start <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], stop)
+            else:
+                merged.append([start, stop])
+
+        return chain.from_iterable(range(start, stop) for start, stop in merged)
+
+    def query(self, iri=None, curie=None, label=None, term=None, predicates=tuple(),
+              prefix=tuple(), exclude_prefix=tuple(), depth=1, limit=10, **kwargs):
+        prefix = one_or_many(prefix)
+        exclude_prefix = one_or_many(exclude_prefix)
+        kwargs = dict(iri=iri, curie=curie, label=label, term=term,
+                      predicates=predicates, depth=depth)
+        if iri is not None or curie is not None:
+            identifier = self.OntId(curie=curie, iri=iri)
+            t = self.term_index(identifier.iri)
+            if t is not None:
+                yield self._result(t, kwargs, predicates, depth - 1)
+
+        elif label is not None:
+            yield from self._filtered(self.search(label, self.header['n_label']),
+                                      kwargs, prefix, exclude_prefix, limit)
+        elif term is not None:
+            yield from self._filtered(self.search(term), kwargs,
+                                      prefix, exclude_prefix, limit)
+        elif prefix:
+            yield from self._filtered(self._prefix_terms(prefix), kwargs,
+                                      prefix, exclude_prefix, limit)
+
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(prog='python -m ontquery.plugins.services.termstore',
+                                     description='build a term store file')
+    parser.add_argument('source', choices=('rdflib', 'scigraph'))
+    parser.add_argument('path', help='the term store to write')
+    parser.add_argument('inputs', nargs='+', help='rdf files or one scigraph graph json')
+    args = parser.parse_args(argv)
+
+    try:
+        from pyontutils.namespaces import PREFIXES as CURIE_MAP
+    except ModuleNotFoundError:
+        from ontquery.plugins.namespaces.nifstd import CURIE_MAP
+
+    oq.OntCuries(CURIE_MAP)
+    if args.source == 'rdflib':
+        import rdflib
+        graph = rdflib.Graph()
+        for input in args.inputs:
+            graph.parse(input)
+
+        build_from_rdflib(graph, args.path)
+    else:
+        with open(args.inputs[0], 'rt') as f:
+            export = json.load(f)
+
+        build_from_scigraph(export, args.path,
+                            {p: oq.OntCuries[p] for p in oq.OntCuries})
+
+    print(f'wrote {len(TermStoreLocal(args.path))} terms to {args.path}')
+
+
+if __name__ == '__main__':
+    sys.exit(main())
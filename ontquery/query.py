@@ -3,18 +3,25 @@ Implementation of the query interface that provides a layer of separation betwee
 identifiers and lookup services for finding and validating them.
 """
 
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from ontquery import plugin, exceptions as exc
-from ontquery.utils import mimicArgs, cullNone, one_or_many, log
+from ontquery.utils import mimicArgs, cullNone, one_or_many, freeze, log
 
 
 class OntQuery:
-    def __init__(self, *services, prefix=tuple(), category=tuple(), instrumented=None):
+    def __init__(self, *services, prefix=tuple(), category=tuple(), instrumented=None,
+                 cache=None, max_workers=None):
         # services from OntServices
         # check to make sure that prefix valid for ontologies
         # more config
 
         self._prefix = one_or_many(prefix)
         self._category = one_or_many(category)
+        self.cache = cache  # e.g. ontquery.cache.QueryCache()
+        # max_workers > 1 queries all services at the same time
+        self.max_workers = max_workers
+        self._executor = None
 
         _services = [] 
         for maybe_service in services:
@@ -94,25 +101,76 @@ class OntQuery:
         self.setup()
         return self.__call__(*args, **kwargs)
 
-    def _rcall__(self,
-                 term=None,           # put this first so that the happy path query('brain') can be used, matches synonyms
-                 prefix=tuple(),      # limit search within these prefixes
-                 category=None,       # like prefix but works on predefined categories of things like 'anatomical entity' or 'species'
-                 label=None,          # exact matches only
-                 abbrev=None,         # alternately `abbr` as you have
-                 search=None,         # hits a lucene index, not very high quality
-                 suffix=None,         # suffix is 1234567 in PREFIX:1234567
-                 curie=None,          # if you are querying you can probably just use OntTerm directly and it will error when it tries to look up
-                 iri=None,            # the most important one
-                 predicates=tuple(),  # provided with an iri or a curie to extract more specific triple information
-                 exclude_prefix=tuple(),
-                 depth=1,
-                 direction='OUTGOING',
-                 limit=10,
-                 include_deprecated=False,
-                 include_supers=False,
-                 include_all_services=False,
-                 raw=False,
+    def _rcall__(self, *args, **kwargs):
+        kwargs, first_labeled, raw = self._query_kwargs(*args, **kwargs)
+        services_results = self._services_results(kwargs)
+        try:
+            for j, results in enumerate(services_results):
+                # TODO query keyword precedence if there is more than one
+                #print(red.format(str(kwargs)))
+                # TODO don't pass empty kwargs to services that can't handle them?
+                for i, result in enumerate(results):
+                    #print(red.format('AAAAAAAAAA'), result)
+                    if result:
+                        yield result if raw else result.asTerm()
+                        if first_labeled and result.label:
+                            return  # FIXME order services based on which you want first for now, will work on merging later
+        finally:
+            services_results.close()  # cancel pending lower priority services
+
+    async def acall(self, *args, **kwargs):
+        """ async generator form of __call__ that takes the same arguments
+            and awaits OntService.aquery for each service """
+        if '__call__' not in self.__dict__:
+            self.setup()
+
+        kwargs, first_labeled, raw = self._query_kwargs(*args, **kwargs)
+        services = self.services
+        if self.max_workers and self.max_workers > 1:
+            pending = [asyncio.ensure_future(self._aservice_query(service, kwargs))
+                       for service in services]
+        else:
+            pending = None
+
+        try:
+            for j, service in enumerate(services):
+                if pending is None:
+                    results = await self._aservice_query(service, kwargs)
+                else:
+                    results = await pending[j]
+
+                for result in results:
+                    if result:
+                        yield result if raw else result.asTerm()
+                        if first_labeled and result.label:
+                            return
+        finally:
+            if pending is not None:
+                for task in pending:
+                    task.cancel()
+
+                # retrieve the exceptions of tasks that already failed
+                await asyncio.gather(*pending, return_exceptions=True)
+
+    def _query_kwargs(self,
+                      term=None,           # put this first so that the happy path query('brain') can be used, matches synonyms
+                      prefix=tuple(),      # limit search within these prefixes
+                      category=None,       # like prefix but works on predefined categories of things like 'anatomical entity' or 'species'
+                      label=None,          # exact matches only
+                      abbrev=None,         # alternately `abbr` as you have
+                      search=None,         # hits a lucene index, not very high quality
+                      suffix=None,         # suffix is 1234567 in PREFIX:1234567
+                      curie=None,          # if you are querying you can probably just use OntTerm directly and it will error when it tries to look up
+                      iri=None,            # the most important one
+                      predicates=tuple(),  # provided with an iri or a curie to extract more specific triple information
+                      exclude_prefix=tuple(),
+                      depth=1,
+                      direction='OUTGOING',
+                      limit=10,
+                      include_deprecated=False,
+                      include_supers=False,
+                      include_all_services=False,
+                      raw=False,
     ):
         prefix = one_or_many(prefix) + self._prefix
         category = one_or_many(category) + self._category
@@ -146,23 +204,241 @@ class OntQuery:
         # TODO? this is one place we could normalize queries as well instead of having
         # to do it for every single OntService
         kwargs = {**qualifiers, **queries, **graph_queries, **identifiers, **control}
-        for j, service in enumerate(self.services):
-            # TODO query keyword precedence if there is more than one
-            #print(red.format(str(kwargs)))
-            # TODO don't pass empty kwargs to services that can't handle them?
-            for i, result in enumerate(service.query(**kwargs)):
-                #print(red.format('AAAAAAAAAA'), result)
+        first_labeled = search is None and term is None and not include_all_services
+        return kwargs, first_labeled, raw
+
+    def _services_results(self, kwargs):
+        """ the results of each service in priority order """
+        services = self.services
+        if not self.max_workers or self.max_workers < 2 or len(services) < 2:
+            for service in services:
+                yield self._service_query(service, kwargs)
+
+            return
+
+        def materialize(service):
+            return tuple(self._service_query(service, kwargs))
+
+        executor = self._get_executor()
+        futures = [executor.submit(materialize, service) for service in services]
+        try:
+            for future in futures:
+                # errors surface in priority order just as they do sequentially
+                yield future.result()
+        finally:
+            # reached on early return when the consumer closes us
+            for future in futures:
+                future.cancel()
+
+    def _get_executor(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                thread_name_prefix='ontquery')
+
+        return self._executor
+
+    def bulk(self, queries, max_workers=None):
+        """ Run many queries as a batch.
+
+            queries is an iterable of dicts of keyword arguments to __call__.
+            Identical queries are only run once. Services are visited in
+            priority order and each one receives all of the queries that are
+            still unresolved at that point via OntService.query_many, run
+            concurrently when max_workers > 1. Returns a list in the order
+            of queries where each element is the tuple of raw QueryResults
+            that __call__ would have yielded or the exception it raised. """
+        if '__call__' not in self.__dict__:
+            self.setup()
+
+        queries = list(queries)
+        out = [None] * len(queries)
+        unique = {}
+        for i, query in enumerate(queries):
+            try:
+                kwargs, first_labeled, _ = self._query_kwargs(**{**query, 'raw': True})
+            except Exception as e:
+                out[i] = e
+                continue
+
+            key = freeze(kwargs)
+            if key not in unique:
+                unique[key] = kwargs, first_labeled, [], []  # kwargs, first, results, indexes
+
+            unique[key][-1].append(i)
+
+        if max_workers is None:
+            max_workers = self.max_workers
+
+        executor, map_ = None, map
+        if max_workers and max_workers > 1:
+            if max_workers == self.max_workers:
+                map_ = self._get_executor().map
+            else:
+                executor = ThreadPoolExecutor(max_workers=max_workers,
+                                              thread_name_prefix='ontquery')
+                map_ = executor.map
+
+        errors, done = {}, set()
+        try:
+            for service in self.services:
+                pending = [key for key in unique if key not in done]
+                if not pending:
+                    break
+
+                self._bulk_service(service, pending, unique, map_, errors, done)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        for key, (kwargs, first_labeled, results, indexes) in unique.items():
+            value = errors[key] if key in errors else tuple(results)
+            for i in indexes:
+                out[i] = value
+
+        return out
+
+    def _bulk_service(self, service, keys, unique, map_, errors, done):
+        cache = self.cache if getattr(service, 'cache_results', True) else None
+        batch, fetch = {}, []
+        for key in keys:
+            kwargs = unique[key][0]
+            results = None if cache is None else cache.get(service, kwargs)
+            if results is None:
+                fetch.append(key)
+            else:
+                batch[key] = results
+
+        if fetch:
+            fetched = service.query_many([unique[key][0] for key in fetch], mapper=map_)
+            for key, results in zip(fetch, fetched):
+                if not isinstance(results, Exception) and cache is not None:
+                    cache.set(service, unique[key][0], results)
+
+                batch[key] = results
+
+        for key in keys:  # keep the order stable for reproducible errors
+            results = batch[key]
+            if isinstance(results, Exception):
+                # the same as an exception from __call__ ending the query
+                errors[key] = results
+                done.add(key)
+                continue
+
+            kwargs, first_labeled, out, indexes = unique[key]
+            for result in results:
+                if result:
+                    out.append(result)
+                    if first_labeled and result.label:
+                        done.add(key)
+                        break
+
+    def add_to_bulk_fetch(self, term):
+        """ queue an instrumented term to be bound by the next run_bulk_fetch """
+        if not hasattr(self, '_bulk_fetch'):
+            self._bulk_fetch = []
+
+        self._bulk_fetch.append(term)
+
+    def run_bulk_fetch(self, max_workers=None):
+        """ bind all terms queued by add_to_bulk_fetch in one batch,
+            returns a list of (term, exception) pairs for terms that failed """
+        terms, self._bulk_fetch = getattr(self, '_bulk_fetch', []), []
+        # popped as in OntTerm.__getattr__ so that lazy terms are not bound
+        # again on next access, restored for the terms that fail
+        bind_kwargs = [term.__dict__.pop('_bind_kwargs', None) for term in terms]
+        queries = []
+        for term, kwargs in zip(terms, bind_kwargs):
+            query = cullNone(iri=term.iri, curie=term.curie)
+            if kwargs is not None and 'predicates' in kwargs:
+                query['predicates'] = kwargs['predicates']
+
+            queries.append(query)
+
+        try:
+            bulk = self.bulk(queries, max_workers=max_workers)
+        except BaseException:
+            for term, kwargs in zip(terms, bind_kwargs):
+                if kwargs is not None:
+                    term._bind_kwargs = kwargs
+
+            raise
+
+        failed = []
+        for term, kwargs, results in zip(terms, bind_kwargs, bulk):
+            if isinstance(results, Exception):
+                error = results
+            else:
+                try:
+                    term._bind_results(results, **(kwargs or dict(iri=term.iri, curie=term.curie)))
+                    continue
+                except ValueError as e:
+                    error = e
+
+            if kwargs is not None:
+                term._bind_kwargs = kwargs
+
+            failed.append((term, error))
+
+        return failed
+
+    def iter_terms(self, prefix=tuple(), category=tuple(), page_size=100,
+                   include_all_services=False, raw=False):
+        """ Stream every term with one of prefix and in one of category.
+
+            Each service enumerates its terms with OntService.iter_terms a
+            page at a time so memory use is bounded by page_size no matter
+            how many terms match. Services that cannot enumerate are
+            skipped. By default only the first service in priority order
+            that yields anything is used, include_all_services=True visits
+            all of them in which case a term may be yielded more than once.
+            Results do not go through the cache. """
+        if '__call__' not in self.__dict__:
+            self.setup()
+
+        prefix = one_or_many(prefix) + self._prefix
+        category = one_or_many(category) + self._category
+        for service in self.services:
+            try:
+                results = service.iter_terms(prefix=prefix, category=category,
+                                             page_size=page_size)
+            except NotImplementedError as e:
+                log.debug(e)
+                continue
+
+            found = False
+            for result in results:
                 if result:
+                    found = True
                     yield result if raw else result.asTerm()
-                    if search is None and term is None and result.label and not include_all_services:
-                        return  # FIXME order services based on which you want first for now, will work on merging later
+
+            if found and not include_all_services:
+                return
+
+    def shutdown(self, wait=True):
+        """ stop the worker threads used when max_workers is set """
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+
+
+    def _service_query(self, service, kwargs):
+        if self.cache is None:
+            return service.query(**kwargs)
+
+        return self.cache.query(service, kwargs)
+
+    async def _aservice_query(self, service, kwargs):
+        if self.cache is None:
+            return await service.aquery(**kwargs)
+
+        return await self.cache.aquery(service, kwargs)
 
 
 class OntQueryCli(OntQuery):
     raw = False  # return raw QueryResults
 
     def __init__(self, *services, prefix=tuple(), category=tuple(), query=None,
-                 instrumented=None):
+                 instrumented=None, cache=None, max_workers=None):
         if query is not None:
             if services:
                 raise ValueError('*services and query= are mutually exclusive arguments, '
@@ -173,10 +449,14 @@ class OntQueryCli(OntQuery):
             self._services = query.services
             self._instrumented = query._instrumented
             self._OntId = query._OntId
+            self.cache = query.cache if cache is None else cache
+            self.max_workers = query.max_workers if max_workers is None else max_workers
+            self._executor = None
 
         else:
             super().__init__(*services, prefix=prefix, category=category,
-                             instrumented=instrumented)
+                             instrumented=instrumented, cache=cache,
+                             max_workers=max_workers)
 
     @mimicArgs(OntQuery.__call__)
     def __call__(self, *args, **kwargs):
@@ -1,3 +1,6 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from .utils import Graph, QueryResult
 
 
@@ -5,6 +8,13 @@ class OntService:
     """ Base class for ontology wrappers that define setup, dispatch, query,
         add ontology, and list ontologies methods for a given type of endpoint. """
 
+    cache_results = True  # set to False to keep OntQuery.cache from storing results
+    # None runs aquery in the default executor of the event loop
+    # otherwise each service gets its own pool of this many threads
+    aquery_max_workers = None
+    _aquery_executor = None
+    _aquery_executor_lock = threading.Lock()
+
     def __init__(self):
         if not hasattr(self, '_onts'):
             self._onts = []
@@ -19,6 +29,11 @@ class OntService:
     def onts(self):
         yield from self._onts
 
+    @property
+    def identity(self):
+        """ stable across processes, used to key persistent caches """
+        return f'{self.__class__.__module__}.{self.__class__.__qualname__}'
+
     @property
     def predicates(self):
         raise NotImplementedError()
@@ -38,6 +53,63 @@ class OntService:
         yield 'Queries should return an iterable'
         raise NotImplementedError()
 
+    def iter_terms(self, prefix=tuple(), category=tuple(), page_size=100):
+        """ Lazily yield a QueryResult for every term with one of prefix
+            and in one of category, fetching page_size terms at a time.
+
+            Services that cannot enumerate their terms raise
+            NotImplementedError when called so that OntQuery.iter_terms
+            can move on to the next service. """
+        raise NotImplementedError(f'{self.__class__.__name__} cannot enumerate terms')
+
+    def _prefix_filtered(self, items, prefix, exclude_prefix, limit, iri=None):
+        """ up to limit of items whose iri, iri(item) if iri is given,
+            has one of prefix and none of exclude_prefix """
+        count = 0
+        for item in items:
+            if limit is not None and count >= limit:
+                break
+
+            if prefix or exclude_prefix:
+                oid = self.OntId(item if iri is None else iri(item))
+                if prefix and oid.prefix not in prefix:
+                    continue
+
+                if exclude_prefix and oid.prefix in exclude_prefix:
+                    continue
+
+            count += 1
+            yield item
+
+    def query_many(self, queries, mapper=map):
+        """ Results for many queries at once as a list in the order of
+            queries. Each element is a tuple of results or the exception
+            raised by that query. OntQuery.bulk passes a concurrent mapper.
+            Services with a batch endpoint should override this. """
+        return list(mapper(self._query_or_error, queries))
+
+    def _query_or_error(self, kwargs):
+        try:
+            return tuple(self.query(**kwargs))
+        except Exception as e:
+            return e
+
+    async def aquery(self, **kwargs):
+        """ async form of query that returns a tuple of results
+
+            The default runs query in a worker thread, services that
+            can talk to their backend without blocking should override. """
+        if self.aquery_max_workers and self._aquery_executor is None:
+            with self._aquery_executor_lock:
+                if self._aquery_executor is None:
+                    self._aquery_executor = ThreadPoolExecutor(
+                        max_workers=self.aquery_max_workers,
+                        thread_name_prefix=self.__class__.__name__)
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._aquery_executor,
+                                          lambda: tuple(self.query(**kwargs)))
+
 
 class BasicService(OntService):
     """ A very simple service for local use only """
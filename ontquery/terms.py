@@ -1,9 +1,10 @@
 import sys
 import copy
+import weakref
 from itertools import chain
 from urllib.parse import quote
 from . import exceptions as exc, trie
-from .utils import cullNone, subclasses, log, SubClassCompare, _already_logged
+from .utils import cullNone, subclasses, log, SubClassCompare, _already_logged, LRUCache
 from .query import OntQuery
 
 # FIXME ipython notebook?
@@ -12,6 +13,10 @@ from .query import OntQuery
 # saved to disk
 interactive = getattr(sys, 'ps1', sys.flags.interactive)
 
+_miss = object()
+_unsplit = object()
+_iri_schemes = 'http://', 'https://', 'file://'
+
 
 class dictclass(type):
 
@@ -20,7 +25,7 @@ class dictclass(type):
 
     def __setitem__(self, key, value):
         if key not in self._dict:
-            self._dict[key] = value
+            self({key: value})  # keep the trie and the qname cache in sync
         elif self._dict[key] == value:
             pass
         else:
@@ -37,40 +42,104 @@ class OntCuries(metaclass=dictclass):
     """ A bad implementation of a singleton dictionary based namespace.
         Probably better to use metaclass= to init this so types can be tracked.
     """
+    _qname_cache_maxsize = 2 ** 16
     # TODO how to set an OntCuries as the default...
     def __new__(cls, *args, **kwargs):
         #if not hasattr(cls, '_' + cls.__name__ + '_dict'):
         if not hasattr(cls, '_dict'):
             cls._dict = {}
             cls._n_to_p = {}
-            cls._strie = {}
-            cls._trie = {}
+            cls._trie = trie.PrefixIndex()
+            cls._pn_index = []
+            cls._pn_to_i = {}
+
+        if not hasattr(cls, '_qname_cache'):
+            cls._qname_cache = LRUCache(cls._qname_cache_maxsize)
 
+        changed = False
         for p, namespace in dict(*args, **kwargs).items():
             sn = str(namespace)
-            trie.insert_trie(cls._trie, sn)
+            if p not in cls._dict or cls._dict[p] != sn or cls._n_to_p.get(sn) != p:
+                changed = True
+
+            cls._trie.insert(sn)
             cls._dict[p] = sn
             cls._n_to_p[sn] = p
 
         if args or kwargs:
             cls._pn = sorted(cls._dict.items(), key=lambda kv: len(kv[1]), reverse=True)
 
+        if changed:
+            # any new namespace can change the longest match for an iri
+            cls._qname_cache.clear()
+
         return cls._dict
 
     @classmethod
     def reset(cls):
         delattr(cls, '_dict')
+        if hasattr(cls, '_qname_cache'):
+            # clear in place so the generation keeps increasing
+            cls._qname_cache.clear()
 
     @classmethod
     def new(cls):
         # FIXME yet another pattern that I don't like :/
         clsdict = dict(_dict={},
                        _n_to_p={},
-                       _strie={},
-                       _trie={},)
+                       _trie=trie.PrefixIndex(),
+                       _pn_index=[],
+                       _pn_to_i={},
+                       _qname_cache=LRUCache(cls._qname_cache_maxsize),)
 
         return type('OntCuries', (OntCuries,), clsdict)  # FIXME this does not subclass propertly even when using cls ... :/
 
+    @classmethod
+    def generation(cls):
+        """ incremented every time the namespace mapping changes """
+        return cls._qname_cache.generation
+
+    @classmethod
+    def qname_cache_info(cls):
+        return cls._qname_cache.info()
+
+    @classmethod
+    def set_qname_cache_size(cls, maxsize):
+        """ None for unbounded, 0 to disable """
+        cls._qname_cache.maxsize = maxsize
+        cls._qname_cache.clear()
+
+    @classmethod
+    def qname_many(cls, iris):
+        """ qname for each iri in iris, in input order """
+        qname = cls.qname
+        done = {}
+        return [done[iri] if iri in done else done.setdefault(iri, qname(iri))
+                for iri in iris]
+
+    @classmethod
+    def expand_many(cls, curies):
+        """ iri for each curie in curies, in input order
+            raises KeyError for unknown prefixes """
+        namespaces = cls._dict
+        out = []
+        for curie in curies:
+            prefix, _, suffix = curie.partition(':')
+            out.append(namespaces[prefix] + suffix)
+
+        return out
+
+    @classmethod
+    def _prefix_index(cls, prefix):
+        """ small int standing in for a prefix and its current namespace
+            the pair never changes once assigned, see CompactOntId """
+        pn = prefix, cls._dict[prefix]
+        try:
+            return cls._pn_to_i[pn]
+        except KeyError:
+            cls._pn_index.append(pn)
+            return cls._pn_to_i.setdefault(pn, len(cls._pn_index) - 1)
+
     @classmethod
     def populate(cls, graph):
         """ populate an rdflib graph with these curies """
@@ -89,13 +158,25 @@ class OntCuries(metaclass=dictclass):
         else:
             iri = cls._dict[curie_iri_prefix.split(':', 1)[0]]
 
-        return list(trie.get_namespaces(cls._trie, iri))
+        return list(cls._trie.namespaces(iri))
 
     @classmethod
     def qname(cls, iri):
+        key = str(iri)
+        qname = cls._qname_cache.get(key, _miss)
+        if qname is _miss:
+            qname = cls._qname(key)
+            if qname is key:
+                qname = _unsplit  # the caller gets back what they gave us
+
+            cls._qname_cache[key] = qname
+
+        return iri if qname is _unsplit else qname
+
+    @classmethod
+    def _qname(cls, iri):
         # while / is not *technically* allowed in prefix names by ttl
         # RDFa and JSON-LD do allow it, so we are going to allow it too
-        # TODO cache the output mapping?
         try:
             namespace, suffix = trie.split_uri(iri)
             if namespace.endswith('://'):
@@ -108,14 +189,11 @@ class OntCuries(metaclass=dictclass):
             except KeyError as e:
                 return iri  # can't split it then we're in trouble probably
 
-        if namespace not in cls._strie:
-            trie.insert_strie(cls._strie, cls._trie, namespace)
-
-        if cls._strie[namespace]:
-            pl_namespace = trie.get_longest_namespace(cls._strie[namespace], iri)
-            if pl_namespace is not None:
-                namespace = pl_namespace
-                suffix = iri[len(namespace):]
+        pl_namespace = cls._trie.longest(iri)
+        if pl_namespace is not None and len(pl_namespace) > len(namespace):
+            # a registered namespace extends past the split point
+            namespace = pl_namespace
+            suffix = iri[len(namespace):]
 
         try:
             prefix = cls._n_to_p[namespace]
@@ -142,6 +220,8 @@ class OntCuries(metaclass=dictclass):
 class Id:
     """ base for all identifiers, both local and global """
 
+    __slots__ = ()  # so that subclasses can opt out of __dict__
+
     def normalize(self):
         # the sane flow for nearly every identifier system is
         # id -> normalize -> instrument -> resolve -> retrieve meta/data
@@ -159,6 +239,8 @@ class LocalId(Id):
 class Identifier(Id):
     """ any global identifier, manages the local/global transition """
 
+    __slots__ = ()
+
     def __hash__(self):
         return hash((self.__class__, super().__hash__()))
 
@@ -287,6 +369,7 @@ class InstrumentedIdentifier(Identifier):
     """ classes that instrument a type of identifier to make it actionable """
 
     skip_for_instrumentation = False
+    _interned = None  # instrumented identifiers carry mutable state, never intern them
 
 
 class OntId(Identifier, str):  # TODO all terms singletons to prevent nastyness
@@ -296,6 +379,7 @@ class OntId(Identifier, str):  # TODO all terms singletons to prevent nastyness
                       ('prefix', 'suffix'),
                       ('iri',))
     _firsts = 'curie', 'iri'  # FIXME bad for subclassing __repr__ behavior :/
+    _interned = None  # see set_interning
     class Error(Exception): pass
     class BadCurieError(Error): pass
     class UnknownPrefixError(Error): pass
@@ -308,12 +392,51 @@ class OntId(Identifier, str):  # TODO all terms singletons to prevent nastyness
         elif isinstance(curie_or_iri, cls):
             return cls(str(curie_or_iri))
 
+        if (cls._interned is None and
+            prefix is None and suffix is None and curie is None and iri is None and
+            isinstance(curie_or_iri, str) and not isinstance(curie_or_iri, OntId) and
+            curie_or_iri.startswith(_iri_schemes) and ' ' not in curie_or_iri):
+            # the common case, an iri with nothing to check
+            cls._init_repr_level()
+            return str.__new__(cls, curie_or_iri)
+
+        if (cls._interned is not None and curie_or_iri is not None and
+            prefix is None and suffix is None and curie is None and iri is None):
+            key = (cls, cls._namespaces, cls._namespaces.generation(), str(curie_or_iri))
+            self = cls._interned.get(key)
+            if self is None:
+                self = cls._new(curie_or_iri)
+                # the curie and the iri forms both map to the same instance
+                self = cls._interned.setdefault(key[:-1] + (str(self),), self)
+                cls._interned[key] = self
+
+            return self
+
+        return cls._new(curie_or_iri, prefix, suffix, curie, iri)
+
+    @classmethod
+    def set_interning(cls, enable=True):
+        """ When enabled cls(curie_or_iri) returns a canonical instance for
+            each (cls, iri, namespaces generation) so that identifiers that
+            have already been seen are not parsed or qnamed again.
+            Instances are held by weak reference and are reclaimed when no
+            longer in use. Instrumented classes cannot be interned. """
+        if issubclass(cls, InstrumentedIdentifier):
+            raise TypeError(f'{cls} is instrumented, its instances cannot be interned')
+
+        cls._interned = weakref.WeakValueDictionary() if enable else None
+
+    @classmethod
+    def _init_repr_level(cls):
         if not hasattr(cls, f'_{cls.__name__}__repr_level'):
             cls.__repr_level = 0
             cls._oneshot_old_repr_args = None
             if not hasattr(cls, 'repr_args'):
                 cls.repr_args = cls.repr_arg_order[0]
 
+    @classmethod
+    def _new(cls, curie_or_iri=None, prefix=None, suffix=None, curie=None, iri=None):
+        cls._init_repr_level()
         iri_ps, iri_ci, iri_c = None, None, None
 
         if prefix is not None and suffix is not None:
@@ -334,11 +457,6 @@ class OntId(Identifier, str):  # TODO all terms singletons to prevent nastyness
                 curie_or_iri.startswith('https://') or
                 curie_or_iri.startswith('file://')):
                 iri_ci = curie_or_iri
-                curie_ci = cls._namespaces.qname(iri_ci)
-                if curie_ci != iri_ci:  # FIXME this is bad ... figure out where qname returning None is an issue ...
-                    prefix, suffix = curie_ci.split(':', 1)
-                else:
-                    prefix, suffix = None, None
             else:
                 curie_ci = curie_or_iri
                 try:
@@ -369,31 +487,154 @@ class OntId(Identifier, str):  # TODO all terms singletons to prevent nastyness
             except StopIteration as e:
                 raise TypeError('No identifier was provided!') from e
 
-        if iri is not None:
-            # normalization step in case there is a longer prefix match
-            curie_i = cls._namespaces.qname(iri)
-            if curie_i != iri:  # FIXME TODO same issue as above with qname returning None
-                prefix_i, suffix_i = curie_i.split(':', 1)
-            else:
-                prefix_i, suffix_i = None, None
+        if '://' in iri and ' ' not in iri:
+            # nothing that qname could reject, so prefix and suffix
+            # are computed on first access, see _prefix_suffix
+            return super().__new__(cls, iri)
 
-            #if prefix and prefix_i != prefix:
-                #print('Curie changed!', prefix + ':' + suffix, '->', curie_i)
-            prefix, suffix = prefix_i, suffix_i
-            if ((suffix is not None and not suffix.startswith('//') and curie_i == iri)
-                or (suffix is None and '://' not in iri and curie_i == iri)):
-                raise ValueError(f'You have provided a curie {curie_i} as an iri!')
+        # normalization step in case there is a longer prefix match
+        curie_i = cls._namespaces.qname(iri)
+        if curie_i != iri:  # FIXME TODO same issue as above with qname returning None
+            prefix_i, suffix_i = curie_i.split(':', 1)
+        else:
+            prefix_i, suffix_i = None, None
+
+        #if prefix and prefix_i != prefix:
+            #print('Curie changed!', prefix + ':' + suffix, '->', curie_i)
+        prefix, suffix = prefix_i, suffix_i
+        if ((suffix is not None and not suffix.startswith('//') and curie_i == iri)
+            or (suffix is None and '://' not in iri and curie_i == iri)):
+            raise ValueError(f'You have provided a curie {curie_i} as an iri!')
 
         if prefix is not None and (' ' in prefix or ' ' in suffix):
             raise cls.BadCurieError(f'{prefix}:{suffix} has an invalid charachter in it!')
 
         self = super().__new__(cls, iri)
-
-        # FIXME these assignments prevent updates when OntCuries changes
-        self.prefix = prefix
-        self.suffix = suffix
+        self._set_prefix_suffix(prefix, suffix)
         return self
 
+    @classmethod
+    def from_many(cls, curies_or_iris):
+        """ Construct identifiers for an iterable of curies, iris, or OntIds.
+            Returns a list in input order, equal to [cls(c) for c in curies_or_iris]
+            but namespace lookups are done once per distinct input and
+            repeated inputs share a single instance. """
+        if issubclass(cls, InstrumentedIdentifier):
+            # instrumented instances are bound individually
+            return [cls(c) for c in curies_or_iris]
+
+        cls._init_repr_level()
+        namespaces = cls._namespaces
+        qname = namespaces.qname
+        n_to_iri = namespaces._dict
+        interned = cls._interned
+        if interned is not None:
+            ikey = cls, namespaces, namespaces.generation()
+
+        new = super().__new__
+        done = {}
+        out = []
+        for c in curies_or_iris:
+            if type(c) == cls:
+                out.append(c)
+                continue
+
+            key = str(c)
+            if key in done:
+                out.append(done[key])
+                continue
+
+            if interned is not None:
+                self = interned.get(ikey + (key,))
+                if self is not None:
+                    out.append(done.setdefault(key, self))
+                    continue
+
+            if isinstance(c, OntId):
+                iri = c.iri
+            elif (key.startswith('http://') or
+                  key.startswith('https://') or
+                  key.startswith('file://')):
+                iri = key
+            else:
+                prefix, sep, suffix = key.partition(':')
+                if not sep:
+                    raise cls.BadCurieError(f'Could not split curie {key!r} '
+                                            'is it actually an identifier?')
+                if prefix not in n_to_iri:
+                    raise cls.UnknownPrefixError(
+                        f'Unknown curie prefix: {prefix} for {prefix}:{suffix}')
+
+                iri = n_to_iri[prefix] + suffix
+
+            self = new(cls, iri)
+            if '://' not in iri or ' ' in iri:
+                curie = qname(iri)
+                if curie != iri:
+                    prefix, suffix = curie.split(':', 1)
+                    if ' ' in prefix or ' ' in suffix:
+                        raise cls.BadCurieError(f'{prefix}:{suffix} has an invalid charachter in it!')
+                elif '://' not in iri:
+                    raise ValueError(f'You have provided a curie {curie} as an iri!')
+                else:
+                    prefix, suffix = None, None
+
+                self._set_prefix_suffix(prefix, suffix)
+
+            if interned is not None:
+                self = interned.setdefault(ikey + (iri,), self)
+                interned[ikey + (key,)] = self
+
+            out.append(done.setdefault(key, self))
+
+        return out
+
+    def __getstate__(self):
+        # prefix and suffix are derived from the namespaces of the process
+        # that loads the pickle, and their stamp holds the namespaces class
+        return {k: v for k, v in self.__dict__.items()
+                if k not in ('_prefix', '_suffix', '_ps_stamp')}
+
+    def _prefix_suffix(self):
+        """ prefix and suffix are computed lazily and recomputed
+            whenever the namespaces they were computed from change """
+        d = self.__dict__
+        namespaces = self._namespaces
+        stamp = namespaces, namespaces.generation()
+        if d.get('_ps_stamp') != stamp:
+            iri = str(self)
+            curie = namespaces.qname(iri)
+            if curie != iri:
+                d['_prefix'], d['_suffix'] = curie.split(':', 1)
+            else:
+                d['_prefix'], d['_suffix'] = None, None
+
+            d['_ps_stamp'] = stamp
+
+        return d['_prefix'], d['_suffix']
+
+    def _set_prefix_suffix(self, prefix, suffix):
+        d = self.__dict__
+        d['_prefix'], d['_suffix'] = prefix, suffix
+        namespaces = self._namespaces
+        d['_ps_stamp'] = namespaces, namespaces.generation()
+
+    @property
+    def prefix(self):
+        return self._prefix_suffix()[0]
+
+    @prefix.setter
+    def prefix(self, value):
+        self._set_prefix_suffix(value, self._prefix_suffix()[1])
+
+    @property
+    def suffix(self):
+        return self._prefix_suffix()[1]
+
+    @suffix.setter
+    def suffix(self, value):
+        self._set_prefix_suffix(self._prefix_suffix()[0], value)
+
     @property
     def namespaces(self):
         return self._namespaces()
@@ -544,6 +785,103 @@ class OntId(Identifier, str):  # TODO all terms singletons to prevent nastyness
         return result
 
 
+class CompactOntId(Identifier, str):
+    """ A memory compact OntId for holding large sets of identifiers.
+
+        There is no instance __dict__, the only per instance state is a
+        small int indexing the (prefix, namespace) table of _namespaces
+        so prefix, suffix, and curie are derived from the iri on access.
+        Prefixes are normalized against the namespaces at construction.
+
+        On 64 bit CPython 3.11 an iri such as UBERON:0000955 costs about
+        150 bytes as a CompactOntId (the str plus one slot) vs about 610
+        bytes as an OntId (str, __dict__, prefix and suffix strings).
+        See bench/bench_compact.py """
+
+    __slots__ = ('_pi',)
+    _namespaces = OntCuries
+    Error = OntId.Error
+    BadCurieError = OntId.BadCurieError
+    UnknownPrefixError = OntId.UnknownPrefixError
+
+    def __new__(cls, curie_or_iri):
+        if type(curie_or_iri) == cls:
+            return curie_or_iri
+
+        namespaces = cls._namespaces
+        if isinstance(curie_or_iri, OntId):
+            iri = curie_or_iri.iri
+        elif (curie_or_iri.startswith('http://') or
+              curie_or_iri.startswith('https://') or
+              curie_or_iri.startswith('file://')):
+            iri = str(curie_or_iri)
+        else:
+            try:
+                prefix, suffix = curie_or_iri.split(':', 1)
+            except ValueError as e:
+                raise cls.BadCurieError(f'Could not split curie {curie_or_iri!r} '
+                                        'is it actually an identifier?') from e
+            if prefix not in namespaces._dict:
+                raise cls.UnknownPrefixError(
+                    f'Unknown curie prefix: {prefix} for {prefix}:{suffix}')
+
+            iri = namespaces._dict[prefix] + suffix
+
+        curie = namespaces.qname(iri)
+        if curie == iri:
+            pi = None
+        else:
+            if ' ' in curie:
+                raise cls.BadCurieError(f'{curie} has an invalid charachter in it!')
+
+            pi = namespaces._prefix_index(curie.split(':', 1)[0])
+
+        self = str.__new__(cls, iri)
+        self._pi = pi
+        return self
+
+    def __reduce__(self):
+        return self.__class__, (str(self),)
+
+    @property
+    def prefix(self):
+        if self._pi is not None:
+            return self._namespaces._pn_index[self._pi][0]
+
+    @property
+    def namespace(self):
+        if self.prefix:
+            return self._namespaces._pn_index[self._pi][1]
+
+    @property
+    def suffix(self):
+        if self._pi is not None:
+            return self[len(self._namespaces._pn_index[self._pi][1]):]
+
+    @property
+    def curie(self):
+        if self._pi is not None:
+            prefix, namespace = self._namespaces._pn_index[self._pi]
+            suffix = self[len(namespace):]
+            if prefix or suffix:
+                return prefix + ':' + suffix
+
+    @property
+    def iri(self):
+        return str(self)
+
+    @property
+    def quoted(self):
+        return quote(self.iri, safe=tuple())
+
+    def asOntId(self, OntId=OntId):
+        return OntId(self.iri)
+
+    def __repr__(self):
+        curie = self.curie
+        return f'{self.__class__.__name__}({curie if curie else self.iri!r})'
+
+
 class OntTerm(InstrumentedIdentifier, OntId):
     # TODO need a nice way to pass in the ontology query interface to the class at run time to enable dynamic repr if all information did not come back at the same time
     _valid_repr_args = OntId._valid_repr_args + ('label', 'synonyms', 'definition')
@@ -558,6 +896,17 @@ class OntTerm(InstrumentedIdentifier, OntId):
 
     _cache = {}
 
+    # (query, iri, predicates, direction, include_supers) -> traversal results by depth
+    _traversal_cache = LRUCache(2 ** 12)
+
+    # when lazy is True construction does not query, the query runs the
+    # first time one of _lazy_attributes is read, including validation
+    # of any label= or other values passed to the constructor
+    lazy = False
+    _lazy_attributes = frozenset(('label', 'labels', 'definition', 'synonyms',
+                                  'deprecated', 'predicates', 'validated',
+                                  '_graph', '_blob', '_source', '_query_result'))
+
     #__firsts = 'curie', 'iri'
 
     def __new__(cls, curie_or_iri=None, prefix=None, suffix=None, curie=None,
@@ -571,27 +920,55 @@ class OntTerm(InstrumentedIdentifier, OntId):
                                **kwargs)
         kwargs['iri'] = self.iri
         kwargs['curie'] = self.curie
-        self._bind_result(**kwargs)
+        if cls.lazy:
+            self._bind_kwargs = kwargs
+        else:
+            self._bind_result(**kwargs)
+
         return self
 
     def __init__(self, *args, **kwargs):
         pass
 
-    def _bind_result(self, **kwargs):
-        try:
-            result = self._get_query_result(**kwargs)
-            self._bind_query_result(result, **kwargs)
-        except StopIteration:
-            self.validated = False
-            self.label = None  # the label attr should always be present even on failure
+    def __getattr__(self, attr):
+        # only called when normal lookup fails
+        if attr in self._lazy_attributes and '_bind_kwargs' in self.__dict__:
+            # popped first so that attribute access while binding does not
+            # bind again, restored if the query fails so the next access retries
+            kwargs = self.__dict__.pop('_bind_kwargs')
+            try:
+                self._bind_result(**kwargs)
+            except BaseException:
+                self._bind_kwargs = kwargs
+                raise
+
+            return getattr(self, attr)
+
+        raise AttributeError(f'{self.__class__.__name__!r} object has no attribute {attr!r}')
+
+    @property
+    def bound(self):
+        """ False for a lazy term whose query has not run yet """
+        return '_bind_kwargs' not in self.__dict__
 
-    def _get_query_result(self, **kwargs):
+    def _bind_result(self, **kwargs):
         extra_kwargs = {}
         if 'predicates' in kwargs:
             extra_kwargs['predicates'] = kwargs['predicates']
         # can't gurantee that all endpoints work on the expanded iri
         #log.info(repr(self.asId()))
         results_gen = self.query(iri=self.iri, curie=self.curie, raw=True, **extra_kwargs)
+        self._bind_results(results_gen, **kwargs)
+
+    def _bind_results(self, results_gen, **kwargs):
+        try:
+            result = self._get_query_result(results_gen)
+            self._bind_query_result(result, **kwargs)
+        except StopIteration:
+            self.validated = False
+            self.label = None  # the label attr should always be present even on failure
+
+    def _get_query_result(self, results_gen):
         i = None
         for i, result in enumerate(results_gen):
             if i > 0:
@@ -714,17 +1091,55 @@ class OntTerm(InstrumentedIdentifier, OntId):
         self._bind_query_result(result)
         return self
 
+    @classmethod
+    def resolve_many(cls, curies_or_iris, max_workers=None):
+        """ Construct bound terms for many curies or iris in one batch.
+
+            Identical identifiers are only queried once and share a term.
+            Returns a list in input order where each element is a term or
+            the exception raised while constructing or binding it. """
+        OntId = cls._uninstrumented_class()
+        ids, unique = [], {}
+        for curie_or_iri in curies_or_iris:
+            try:
+                oid = OntId(curie_or_iri)
+                ids.append(oid.iri)
+                if oid.iri not in unique:
+                    unique[oid.iri] = oid
+            except Exception as e:
+                ids.append(e)
+
+        queries = [cullNone(iri=oid.iri, curie=oid.curie) for oid in unique.values()]
+        terms = {}
+        for oid, results in zip(unique.values(),
+                                cls.query.bulk(queries, max_workers=max_workers)):
+            if isinstance(results, Exception):
+                terms[oid.iri] = results
+                continue
+
+            try:
+                self = super().__new__(cls, iri=oid.iri)
+                self._bind_results(results, iri=self.iri, curie=self.curie)
+                terms[oid.iri] = self
+            except Exception as e:
+                terms[oid.iri] = e
+
+        return [iri if isinstance(iri, Exception) else terms[iri] for iri in ids]
+
     def fetch(self, *service_names):  # TODO
         """ immediately fetch the current term """
 
-    def fetch_with(self, query=None):  # TODO
-        """ add to a future bulk fetch """
+    def fetch_with(self, query=None):
+        """ add to a future bulk fetch, see OntQuery.run_bulk_fetch """
         # depending on the nature of the services for the fetcher
         # and which ones are selected we can optimize to either
         # send a bunch of queries at the same time if the remote
         # side of the service doesn't support what we want, OR
         # we can send a bulk query all at once, dealing with the
         # rankings is a bit of a pain though
+        if query is None:
+            query = self.query
+
         query.add_to_bulk_fetch(self)
 
     def debug(self):
@@ -779,7 +1194,7 @@ class OntTerm(InstrumentedIdentifier, OntId):
                           for qr in OntTerm.query(search=expression,
                                                   prefix=prefix, limit=limit))
 
-        return sorted(set(next(OntTerm.query(term=s)).OntTerm
+        return sorted(set(next(OntTerm.query(term=s, raw=True)).OntTerm
                           for qr in OntTerm.query(search=expression,
                                                   prefix=prefix, limit=limit)
                           for s in chain(OntTerm(qr.iri).synonyms, (qr.label,))
@@ -799,24 +1214,15 @@ class OntTerm(InstrumentedIdentifier, OntId):
         else:
             predicates = (predicate,) + predicates  # ensure at least one
 
-        results_gen = self.query(iri=self, predicates=predicates, depth=depth,  # XXX observe passing OntTerm as iri here
-                                 direction=direction, include_supers=include_supers)
-        out = {}
-        for result in results_gen:  # FIXME should only be one?!
-            for k, v in result.predicates.items():
-                if not isinstance(v, tuple):
-                    v = v,
-
-                if asTerm:
-                    v = tuple(self.__class__(v) if not isinstance(v, self.__class__) and isinstance(v, OntId)
-                              else v for v in v)
-                    if asPreferred:
-                        v = tuple(t.asPreferred() if isinstance(t, self.__class__) else t for t in v)
+        out = self._traverse(predicates, depth, direction, include_supers)
+        if asTerm:
+            for k, v in out.items():
+                v = tuple(self.__class__(v) if not isinstance(v, self.__class__) and isinstance(v, OntId)
+                          else v for v in v)
+                if asPreferred:
+                    v = tuple(t.asPreferred() if isinstance(t, self.__class__) else t for t in v)
 
-                if k in out:
-                    out[k] += v
-                else:
-                    out[k] = v
+                out[k] = v
 
         if not hasattr(self, 'predicates'):
             self.predicates = {}
@@ -833,6 +1239,84 @@ class OntTerm(InstrumentedIdentifier, OntId):
         else:
             return out
 
+    def _traverse(self, predicates, depth, direction, include_supers):
+        """ predicate curie -> objects for a traversal from this term
+
+            Results are kept on the term and in _traversal_cache which is
+            shared by all terms. A traversal saturates at depth d when
+            going deeper finds nothing new, either because there are no
+            objects at d or because d and a deeper depth returned the same
+            objects, after which every depth >= d is answered from d. Until
+            then a depth that has not been seen is queried from this term,
+            results for shallower depths are not extended. """
+        key = (tuple(str(OntId(p)) if ':' in p else p for p in predicates),
+               direction, include_supers)
+        shared_key = (self.query, self.iri) + key
+        generation = self._traversal_cache.generation
+        if self.__dict__.get('_traversals_generation') != generation:
+            self._traversals = {}
+            self._traversals_generation = generation
+
+        entry = self._traversals.get(key)
+        if entry is None:
+            entry = self._traversal_cache.get(shared_key)
+            if entry is None:
+                entry = {'depths': {}, 'saturated': None}
+                self._traversal_cache[shared_key] = entry
+
+            self._traversals[key] = entry
+
+        depths, saturated = entry['depths'], entry['saturated']
+        if depth in depths:
+            return dict(depths[depth])
+        elif saturated is not None and depth >= saturated:
+            return dict(depths[saturated])
+
+        results_gen = self.query(iri=self, predicates=predicates, depth=depth,  # XXX observe passing OntTerm as iri here
+                                 direction=direction, include_supers=include_supers)
+        out = {}
+        for result in results_gen:  # FIXME should only be one?!
+            for k, v in result.predicates.items():
+                if not isinstance(v, tuple):
+                    v = v,
+
+                if k in out:
+                    out[k] += v
+                else:
+                    out[k] = v
+
+        depths[depth] = out
+        curies = {OntId(p).curie if ':' in p else p for p in predicates}
+        if not any(out.get(c) for c in curies):
+            # nothing to traverse from, deeper can only be the same
+            entry['saturated'] = depth if saturated is None else min(saturated, depth)
+        else:
+            as_sets = {d: {k: frozenset(v) for k, v in o.items()} for d, o in depths.items()}
+            ordered = sorted(as_sets)
+            for shallow, deep in zip(ordered, ordered[1:]):
+                if as_sets[shallow] == as_sets[deep]:
+                    if entry['saturated'] is None or shallow < entry['saturated']:
+                        entry['saturated'] = shallow
+
+                    break
+
+        return dict(out)
+
+    def clear_traversals(self):
+        """ drop cached predicate traversals for this term from the term
+            and from the shared cache so the next call queries again """
+        self.__dict__.pop('_traversals_generation', None)
+        for key in self.__dict__.pop('_traversals', {}):
+            try:
+                del self._traversal_cache[(self.query, self.iri) + key]
+            except KeyError:
+                pass
+
+    @classmethod
+    def clear_traversal_cache(cls):
+        """ drop all cached predicate traversals for all terms """
+        cls._traversal_cache.clear()
+
     @property
     def type(self):
         if not hasattr(self, '_type'):
@@ -6,10 +6,53 @@ NAME_CATEGORIES = NAME_START_CATEGORIES + ["Mc", "Me", "Mn", "Lm", "Nd"]
 ALLOWED_NAME_CHARS = ["\u00B7", "\u0387", "-", ".", "_", ":"]
 XMLNS = "http://www.w3.org/XML/1998/namespace"
 
+_ASCII = [chr(i) for i in range(128)]
+_ASCII_NAME_CHARS = ''.join(c for c in _ASCII
+                            if category(c) in NAME_CATEGORIES or c in ALLOWED_NAME_CHARS)
+_ascii_not_split_start_chars = {}
+
+try:
+    _isascii = str.isascii
+except AttributeError:  # python < 3.7
+    def _isascii(string):
+        return all(c < '\x80' for c in string)
+
+
+def _not_split_start_chars(split_start):
+    key = tuple(split_start)
+    if key not in _ascii_not_split_start_chars:
+        _ascii_not_split_start_chars[key] = ''.join(
+            c for c in _ASCII if not (category(c) in split_start or c == '_'))
+
+    return _ascii_not_split_start_chars[key]
+
 
 def split_uri(uri, split_start=SPLIT_START_CATEGORIES):
     if uri.startswith(XMLNS):
         return (XMLNS, uri.split(XMLNS)[1])
+    if _isascii(uri):
+        return _split_uri_ascii(uri, _not_split_start_chars(split_start))
+    return _split_uri_unicode(uri, split_start)
+
+
+def _split_uri_ascii(uri, skip):
+    """ same rules as _split_uri_unicode but uses str.rstrip and str.lstrip
+        with precomputed character tables to do the scanning in C """
+    head = uri.rstrip(_ASCII_NAME_CHARS)
+    if head:  # head ends with the first non name character from the right
+        # look right of that character first, then from the start
+        rest = uri[len(head):].lstrip(skip)
+        if not rest:
+            rest = uri.lstrip(skip)
+
+        j = len(uri) - len(rest)
+        if rest and j:
+            return uri[:j], rest
+
+    raise ValueError("Can't split '{}'".format(uri))
+
+
+def _split_uri_unicode(uri, split_start=SPLIT_START_CATEGORIES):
     length = len(uri)
     for i in range(0, length):
         c = uri[-i - 1]
@@ -71,3 +114,85 @@ def get_namespaces(trie, value):
             for ns in get_namespaces(trie[key], value):
                 if ns is not None:
                     yield ns
+
+
+class PrefixIndex:
+    """ Character level trie for longest prefix matching of namespaces.
+
+        Lookups walk the characters of the value so their cost is bounded
+        by the length of the longest matching namespace and is independent
+        of the number of namespaces in the index. """
+
+    __slots__ = ('_root', '_size')
+
+    def __init__(self, values=tuple()):
+        self._root = {}
+        self._size = 0
+        for value in values:
+            self.insert(value)
+
+    def insert(self, value):
+        node = self._root
+        for char in value:
+            child = node.get(char)
+            if child is None:
+                child = node[char] = {}
+
+            node = child
+
+        if None not in node:
+            node[None] = value  # None is never a character so it marks the end
+            self._size += 1
+
+    def longest(self, value):
+        """ the longest namespace that is a prefix of value or None """
+        node = self._root
+        out = node.get(None)
+        for char in value:
+            node = node.get(char)
+            if node is None:
+                break
+
+            if None in node:
+                out = node[None]
+
+        return out
+
+    def namespaces(self, value):
+        """ all namespaces that are a prefix of value, shortest first """
+        node = self._root
+        if None in node:
+            yield node[None]
+
+        for char in value:
+            node = node.get(char)
+            if node is None:
+                break
+
+            if None in node:
+                yield node[None]
+
+    def __contains__(self, value):
+        node = self._root
+        for char in value:
+            node = node.get(char)
+            if node is None:
+                return False
+
+        return None in node
+
+    def __iter__(self):
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            for key, child in node.items():
+                if key is None:
+                    yield child
+                else:
+                    stack.append(child)
+
+    def __len__(self):
+        return self._size
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({sorted(self)!r})'
@@ -1,5 +1,7 @@
 import logging
+import threading
 from functools import wraps
+from collections import OrderedDict, namedtuple
 
 red = '\x1b[31m{}\x1b[0m'
 
@@ -87,6 +89,90 @@ def bunch(pairs):
     return out
 
 
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'maxsize', 'currsize'])
+
+
+class LRUCache:
+    """ A bounded mapping that evicts the least recently used entry.
+        Keeps hit and miss counters and a generation number that is
+        bumped every time the cache is cleared so that consumers can
+        tell whether values they derived from it are stale. Safe to
+        share between threads. """
+
+    _missing = object()
+
+    def __init__(self, maxsize=2 ** 16):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.generation = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def __getitem__(self, key):
+        value = self.get(key, self._missing)
+        if value is self._missing:
+            raise KeyError(key)
+
+        return value
+
+    def __setitem__(self, key, value):
+        if self.maxsize is not None and self.maxsize <= 0:
+            return
+
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if self.maxsize is not None:
+                while len(self._data) > self.maxsize:
+                    self._data.popitem(last=False)
+
+    def __delitem__(self, key):
+        with self._lock:
+            del self._data[key]
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def __len__(self):
+        return len(self._data)
+
+    def __iter__(self):
+        yield from tuple(self._data)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.generation += 1
+
+    def info(self):
+        return CacheInfo(self.hits, self.misses, self.maxsize, len(self._data))
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({self.info()})'
+
+
 def cullNone(**kwargs):
     return {k:v for k, v in kwargs.items() if v is not None}
 
@@ -96,6 +182,24 @@ def one_or_many(arg):
                                     if isinstance(arg, str)
                                     else arg)
 
+
+def normalize_label(string):
+    """ form of labels and synonyms used as keys by the local label indexes """
+    return ' '.join(str(string).split()).casefold()
+
+
+def freeze(value):
+    """ hashable form of query kwargs and their values, used as cache keys """
+    if isinstance(value, str):
+        return str(value)  # OntId, URIRef, and friends hash differently
+    elif isinstance(value, (tuple, list)):
+        return tuple(freeze(v) for v in value)
+    elif isinstance(value, dict):
+        return tuple(sorted((k, freeze(v)) for k, v in value.items()))
+    else:
+        return value
+
+
 def mimicArgs(function_to_mimic):
     def decorator(function):
         @wraps(function_to_mimic)
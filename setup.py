@@ -92,6 +92,7 @@ try:
                                 'pytest-cov',
                                 'wheel',
                                 ],
+                        'async': ['aiohttp'],
                         'services': services_require,
                         'test': tests_require},
         entry_points={
@@ -54,3 +54,13 @@ for proto_t in triples:
                    if ':' in e else
                    rdflib.Literal(e) for e in proto_t)
 
+
+
+class CountingRdflib(oq.plugin.get('rdflib')):
+    def __init__(self, *args, **kwargs):
+        self.calls = 0
+        super().__init__(*args, **kwargs)
+
+    def query(self, *args, **kwargs):
+        self.calls += 1
+        yield from super().query(*args, **kwargs)
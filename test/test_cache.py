@@ -0,0 +1,133 @@
+import tempfile
+import unittest
+from pathlib import Path
+import rdflib
+import ontquery as oq
+from ontquery.cache import QueryCache, SqliteQueryCache
+from .common import test_graph, CountingRdflib
+
+
+class TestQueryCache(unittest.TestCase):
+    def setUp(self):
+        self.now = 0
+        self.remote = CountingRdflib(test_graph)
+        self.cache = QueryCache(maxsize=100, ttl=10, timer=lambda: self.now)
+
+        class OntTerm(oq.OntTerm): pass
+        OntTerm.query_init(self.remote, cache=self.cache)
+        self.OntTerm = OntTerm
+
+    def test_hit(self):
+        t1 = self.OntTerm('UBERON:0000955')
+        t2 = self.OntTerm('UBERON:0000955')
+        t3 = self.OntTerm(iri='http://purl.obolibrary.org/obo/UBERON_0000955')
+        assert t1.label == t2.label == t3.label == 'brain'
+        assert self.remote.calls == 1
+        info = self.cache.info()
+        assert info.hits == 2 and info.misses == 1
+
+    def test_different_args(self):
+        t = self.OntTerm('UBERON:0000955')
+        t('rdfs:subClassOf', depth=1)
+        t('rdfs:subClassOf', depth=2)
+        t('rdfs:subClassOf', depth=2)
+        assert self.remote.calls == 3
+
+    def test_ttl(self):
+        self.OntTerm('UBERON:0000955')
+        self.now = 11
+        self.OntTerm('UBERON:0000955')
+        assert self.remote.calls == 2
+        assert self.cache.expired == 1
+
+    def test_opt_out(self):
+        self.remote.cache_results = False
+        self.OntTerm('UBERON:0000955')
+        self.OntTerm('UBERON:0000955')
+        assert self.remote.calls == 2
+        assert not len(self.cache)
+
+    def test_invalidate(self):
+        self.OntTerm('UBERON:0000955')
+        self.cache.invalidate(self.remote)
+        assert not len(self.cache)
+        self.OntTerm('UBERON:0000955')
+        assert self.remote.calls == 2
+
+
+class TestSqliteQueryCache(unittest.TestCase):
+    def setUp(self):
+        self.now = 0
+        self._tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self._tmp.name) / 'cache.sqlite'
+        # a stable graph identifier so that the service identity
+        # is the same for every cache instance
+        self.graph = rdflib.Graph(identifier=rdflib.URIRef('http://example.org/test-graph'))
+        for t in test_graph:
+            self.graph.add(t)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def make(self, **kwargs):
+        remote = CountingRdflib(self.graph)
+        cache = SqliteQueryCache(self.path, timer=lambda: self.now, **kwargs)
+
+        class OntTerm(oq.OntTerm): pass
+        OntTerm.query_init(remote, cache=cache)
+        return remote, cache, OntTerm
+
+    def test_persist(self):
+        remote, cache, OntTerm = self.make()
+        t1 = OntTerm('UBERON:0000955')
+        cache.close()
+
+        remote, cache, OntTerm = self.make()
+        t2 = OntTerm('UBERON:0000955')
+        assert remote.calls == 0
+        assert t1 == t2 and t1.label == t2.label == 'brain'
+        assert t2.synonyms == t1.synonyms
+        assert cache.info().hits == 1
+
+    def test_round_trip_predicates(self):
+        remote, cache, OntTerm = self.make()
+        expect = OntTerm('UBERON:0000955')('rdfs:subClassOf', depth=2)
+        remote, cache, OntTerm = self.make()
+        got = OntTerm('UBERON:0000955')('rdfs:subClassOf', depth=2)
+        assert remote.calls == 0
+        assert got == expect
+
+    def test_version(self):
+        remote, cache, OntTerm = self.make()
+        OntTerm('UBERON:0000955')
+        assert len(cache)
+        cache.close()
+
+        class Next(SqliteQueryCache):
+            version = SqliteQueryCache.version + 1
+
+        assert not len(Next(self.path))
+
+    def test_ttl_purge(self):
+        remote, cache, OntTerm = self.make(ttl=10)
+        OntTerm('UBERON:0000955')
+        self.now = 5
+        OntTerm('BIRNLEX:796')
+        self.now = 11
+        OntTerm('UBERON:0000955')
+        assert remote.calls == 3 and cache.expired == 1
+        self.now = 16
+        assert cache.purge(expired_only=True) == 1
+        assert len(cache) == 1
+        assert cache.purge() == 1
+        assert not len(cache)
+
+    def test_warm(self):
+        remote, cache, OntTerm = self.make()
+        query = oq.OntQuery(remote, instrumented=OntTerm)
+        oid = oq.OntId('UBERON:0000955')
+        assert cache.warm(query, [{'curie': oid.curie, 'iri': oid.iri}]) == 1
+        assert query.cache is None
+        remote, cache, OntTerm = self.make()
+        OntTerm('UBERON:0000955')
+        assert remote.calls == 0
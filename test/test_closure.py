@@ -0,0 +1,86 @@
+import unittest
+import rdflib
+import ontquery as oq
+from ontquery.closure import Closure
+from .common import test_graph
+
+
+class TestClosure(unittest.TestCase):
+    edges = {'a': ('b', 'c'),
+             'b': ('d',),
+             'c': ('d', 'e'),
+             'd': ('f',),
+             'x': ('y',),
+             'y': ('z',),
+             'z': ('x',),}
+
+    def setUp(self):
+        self.calls = []
+
+        def adjacency(node):
+            self.calls.append(node)
+            return self.edges.get(node, ())
+
+        self.closure = Closure(adjacency)
+
+    def test_bfs(self):
+        assert self.closure.closure('a') == ('b', 'c', 'd', 'e', 'f')
+        assert self.closure.levels('a') == (('b', 'c'), ('d', 'e'), ('f',))
+
+    def test_depth(self):
+        assert self.closure.closure('a', 1) == ('b', 'c')
+        assert self.closure.closure('a', 2) == ('b', 'c', 'd', 'e')
+        assert self.closure.closure('a', 99) == self.closure.closure('a')
+
+    def test_cycle(self):
+        assert self.closure.closure('x') == ('y', 'z', 'x')
+        assert self.closure.closure('x', 2) == ('y', 'z')
+
+    def test_memo(self):
+        self.closure.closure('a', 1)
+        self.closure.closure('a')
+        self.closure.closure('a')
+        self.closure.closure_many(['b', 'c', 'd'])
+        assert sorted(self.calls) == sorted(set(self.calls))
+
+    def test_many(self):
+        out = self.closure.closure_many(['b', 'c', 'f'])
+        assert out == {'b': ('d', 'f'), 'c': ('d', 'e', 'f'), 'f': ()}
+
+    def test_clear(self):
+        self.closure.closure('b')
+        self.closure.clear()
+        self.closure.closure('b')
+        assert self.calls.count('b') == 2
+
+
+class TestRdflibClosure(unittest.TestCase):
+    def setUp(self):
+        self.remote = oq.plugin.get('rdflib')(test_graph)
+
+        class OntTerm(oq.OntTerm): pass
+        OntTerm.query_init(self.remote)
+        self.OntTerm = OntTerm
+
+    def test_descendants(self):
+        sco = rdflib.RDFS.subClassOf
+        root = rdflib.URIRef(oq.OntId('UBERON:0001062').iri)
+        brain = rdflib.URIRef(oq.OntId('UBERON:0000955').iri)
+        descendants = self.remote.closure(sco, 'INCOMING').closure(root)
+        assert brain in descendants and len(descendants) == 5
+        ancestors = self.remote.closure(sco).closure(brain)
+        assert ancestors[-1] == root
+
+    def test_graph_change(self):
+        sco = rdflib.RDFS.subClassOf
+        graph = rdflib.Graph()
+        for t in test_graph:
+            graph.add(t)
+
+        remote = oq.plugin.get('rdflib')(graph)
+        remote.setup(instrumented=self.OntTerm)
+        brain = rdflib.URIRef(oq.OntId('UBERON:0000955').iri)
+        before = remote.closure(sco).closure(brain)
+        new = rdflib.URIRef('http://example.org/new')
+        graph.add((rdflib.URIRef(oq.OntId('UBERON:0001062').iri), sco, new))
+        assert remote.closure(sco).closure(brain) == before + (new,)
@@ -1,6 +1,7 @@
 import unittest
 from . import common
 import ontquery as oq
+from ontquery import trie
 
 
 class TestOntCuries(unittest.TestCase):
@@ -85,3 +86,125 @@ class TestQname(unittest.TestCase):
         got = oq.OntCuries.qname(iri)
         old = oq.OntCuries._qname_old(iri)
         return expect, got, old
+
+
+class TestQnameCache(unittest.TestCase):
+    def setUp(self):
+        self.OntCuries = oq.OntCuries.new()
+        self.OntCuries(common.CURIE_MAP)
+
+    def test_hit(self):
+        iri = self.OntCuries['UBERON'] + '0000955'
+        before = self.OntCuries.qname_cache_info()
+        first = self.OntCuries.qname(iri)
+        second = self.OntCuries.qname(iri)
+        after = self.OntCuries.qname_cache_info()
+        assert first == second == 'UBERON:0000955'
+        assert after.hits > before.hits
+        assert after.misses > before.misses
+
+    def test_unsplit(self):
+        iri = 'http://not-a-registered-namespace.org/lol/123'
+        assert self.OntCuries.qname(iri) == iri
+        assert self.OntCuries.qname(iri) == iri
+        unsplittable = 'lol'
+        assert self.OntCuries.qname(unsplittable) is unsplittable
+
+    def test_invalidate_on_new_prefix(self):
+        iri = 'http://example.org/ns/thing/1'
+        assert self.OntCuries.qname(iri) == iri
+        generation = self.OntCuries.generation()
+        self.OntCuries({'ex': 'http://example.org/ns/'})
+        assert self.OntCuries.generation() > generation
+        assert self.OntCuries.qname(iri) == 'ex:thing/1'
+        self.OntCuries['exthing'] = 'http://example.org/ns/thing/'
+        assert self.OntCuries.qname(iri) == 'exthing:1'
+
+    def test_no_invalidate_on_same_prefix(self):
+        generation = self.OntCuries.generation()
+        self.OntCuries(common.CURIE_MAP)
+        assert self.OntCuries.generation() == generation
+
+    def test_bounded(self):
+        self.OntCuries.set_qname_cache_size(10)
+        for i in range(100):
+            self.OntCuries.qname(self.OntCuries['UBERON'] + str(i))
+
+        assert self.OntCuries.qname_cache_info().currsize <= 10
+
+    def test_threads(self):
+        from concurrent.futures import ThreadPoolExecutor
+        self.OntCuries.set_qname_cache_size(4)
+        iris = [self.OntCuries['UBERON'] + str(i % 50) for i in range(20000)]
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            qnames = list(executor.map(self.OntCuries.qname, iris))
+
+        assert qnames == ['UBERON:' + str(i % 50) for i in range(20000)]
+        assert self.OntCuries.qname_cache_info().currsize <= 4
+
+
+class TestPrefixIndex(unittest.TestCase):
+    def setUp(self):
+        self.namespaces = sorted(set(common.CURIE_MAP.values()))
+        self.index = trie.PrefixIndex(self.namespaces)
+
+    def test_longest_matches_dict_trie(self):
+        old = {}
+        for namespace in self.namespaces:
+            trie.insert_trie(old, namespace)
+
+        failed = []
+        for namespace in self.namespaces:
+            for suffix in common.suffixes:
+                iri = namespace + suffix
+                expect = trie.get_longest_namespace(old, iri)
+                got = self.index.longest(iri)
+                if expect != got:
+                    failed.append((iri, expect, got))
+
+        assert not failed, failed
+
+    def test_namespaces(self):
+        for namespace in self.namespaces:
+            got = list(self.index.namespaces(namespace + 'lol'))
+            assert got == sorted(got, key=len)
+            assert all(namespace.startswith(g) for g in got)
+            assert got[-1] == namespace
+
+    def test_container(self):
+        assert len(self.index) == len(self.namespaces)
+        assert sorted(self.index) == self.namespaces
+        assert self.namespaces[0] in self.index
+        assert self.namespaces[0][:-1] not in self.index or self.namespaces[0][:-1] in self.namespaces
+        assert self.index.longest('not an iri') is None
+
+
+class TestSplitUri(unittest.TestCase):
+    @staticmethod
+    def split(function, iri):
+        try:
+            return function(iri)
+        except ValueError:
+            return ValueError
+
+    def corpus(self):
+        evils = 'http://lol.com/', 'http://hrm.com/lol_', ''
+        for namespace in tuple(common.CURIE_MAP.values()) + evils:
+            for suffix in common.suffixes + (':', '_', '-1', '.x', '/', '#'):
+                yield namespace + suffix
+
+    def test_ascii_matches_unicode(self):
+        failed = []
+        for iri in self.corpus():
+            fast = self.split(trie.split_uri, iri)
+            slow = self.split(trie._split_uri_unicode, iri)
+            if fast != slow:
+                failed.append((iri, fast, slow))
+
+        assert not failed, failed
+
+    def test_non_ascii(self):
+        for iri in ('http://example.org/ünïcode_123',
+                    'http://example.org/ns/·thing',
+                    'http://example.org/·'):
+            assert self.split(trie.split_uri, iri) == self.split(trie._split_uri_unicode, iri)
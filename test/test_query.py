@@ -0,0 +1,434 @@
+import time
+import asyncio
+import threading
+import unittest
+import ontquery as oq
+from ontquery.services import OntService
+from .common import CURIE_MAP, test_graph, CountingRdflib  # populates OntCuries
+
+
+class SlowService(OntService):
+    """ returns a fixed label for any identifier after a delay """
+
+    def __init__(self, name, delay=0.1, label=True, gate=None, barrier=None):
+        self.name = name
+        self.delay = delay
+        self.label = label
+        self.gate = gate
+        self.barrier = barrier  # fails unless the other parties run at the same time
+        self.started_at = None
+        self.finished = False
+        super().__init__()
+
+    @property
+    def predicates(self):
+        return tuple()
+
+    def query(self, iri=None, curie=None, **kwargs):
+        self.started_at = time.monotonic()
+        if self.barrier is not None:
+            self.barrier.wait()
+
+        if self.gate is not None:
+            self.gate.wait(5)
+        else:
+            time.sleep(self.delay)
+
+        self.finished = True
+        if iri is None and curie is None:
+            return
+
+        oid = self.OntId(curie) if iri is None else self.OntId(iri)
+        yield self.QueryResult(kwargs, iri=oid.iri, curie=oid.curie,
+                               label=(self.name if self.label else None),
+                               predicates={}, source=self)
+
+
+class TestConcurrentQuery(unittest.TestCase):
+    curie = 'BIRNLEX:796'
+
+    def make(self, *services, max_workers=4):
+        class OntTerm(oq.OntTerm): pass
+        return oq.OntQuery(*services, instrumented=OntTerm, max_workers=max_workers)
+
+    def test_parallel_priority_order(self):
+        barrier = threading.Barrier(3, timeout=10)  # breaks if run one at a time
+        services = [SlowService(n, delay=0, label=False, barrier=barrier) for n in 'abc']
+        query = self.make(*services)
+        results = list(query(curie=self.curie, raw=True))
+        assert [r.source.name for r in results] == ['a', 'b', 'c']
+        query.shutdown()
+
+    def test_early_return(self):
+        gate = threading.Event()
+        low = SlowService('low', gate=gate)
+        blocker = SlowService('blocker', gate=gate)
+        pending = SlowService('pending', delay=0)
+        query = self.make(SlowService('high', delay=0), low, blocker, pending,
+                          max_workers=2)
+        results = list(query(curie=self.curie, raw=True))
+        assert [r.source.name for r in results] == ['high']
+        gate.set()
+        query.shutdown()
+        # pending never got a worker and was cancelled
+        assert pending.started_at is None
+
+    def test_include_all_services(self):
+        query = self.make(SlowService('a', delay=0), SlowService('b', delay=0))
+        results = list(query(curie=self.curie, raw=True, include_all_services=True))
+        assert [r.source.name for r in results] == ['a', 'b']
+        query.shutdown()
+
+    def test_sequential_default(self):
+        services = SlowService('a', delay=0), SlowService('b', delay=0)
+        query = self.make(*services, max_workers=None)
+        assert [r.source.name for r in query(curie=self.curie, raw=True)] == ['a']
+        assert services[1].started_at is None
+        assert query._executor is None
+
+    def test_error_order(self):
+        class Broken(SlowService):
+            def query(self, **kwargs):
+                raise ValueError('broken')
+                yield
+
+        query = self.make(SlowService('a', delay=0, label=False), Broken('b'))
+        with self.assertRaises(ValueError):
+            list(query(curie=self.curie, raw=True))
+
+        query.shutdown()
+
+
+class TestAsyncQuery(unittest.TestCase):
+    curie = 'BIRNLEX:796'
+
+    def make(self, *services, **kwargs):
+        class OntTerm(oq.OntTerm): pass
+        return oq.OntQuery(*services, instrumented=OntTerm, **kwargs)
+
+    @staticmethod
+    def collect(agen):
+        async def inner():
+            return [r async for r in agen]
+
+        return asyncio.run(inner())
+
+    def test_acall(self):
+        query = self.make(SlowService('a', delay=0), SlowService('b', delay=0))
+        results = self.collect(query.acall(curie=self.curie, raw=True))
+        assert [r.source.name for r in results] == ['a']
+        assert results[0].curie == self.curie
+
+    def test_acall_terms(self):
+        query = self.make(SlowService('a', delay=0))
+        terms = self.collect(query.acall(curie=self.curie))
+        assert [t.curie for t in terms] == [self.curie] and terms[0].label == 'a'
+
+    def test_multiplexed(self):
+        # breaks unless all 20 queries are in flight at the same time
+        service = SlowService('a', delay=0, barrier=threading.Barrier(20, timeout=10))
+        service.aquery_max_workers = 20
+        query = self.make(service)
+        curies = [f'BIRNLEX:{i}' for i in range(20)]
+
+        async def one(curie):
+            return [r async for r in query.acall(curie=curie, raw=True)]
+
+        async def many():
+            return await asyncio.gather(*(one(c) for c in curies))
+
+        results = asyncio.run(many())
+        assert [r.curie for r, in results] == curies
+
+    def test_concurrent_priority(self):
+        # all three start together and the lowest priority finishes first
+        barrier = threading.Barrier(3, timeout=10)
+        services = [SlowService(n, delay=d, label=False, barrier=barrier)
+                    for n, d in (('a', .2), ('b', .1), ('c', 0))]
+        query = self.make(*services, max_workers=3)
+        results = self.collect(query.acall(curie=self.curie, raw=True))
+        assert [r.source.name for r in results] == ['a', 'b', 'c']
+
+    def test_early_return_failed_task(self):
+        import gc
+        class Broken(SlowService):
+            def query(self, **kwargs):
+                raise ValueError('broken')
+                yield
+
+        query = self.make(SlowService('a', delay=.1), Broken('b'), max_workers=2)
+        errors = []
+        async def inner():
+            asyncio.get_running_loop().set_exception_handler(
+                lambda loop, context: errors.append(context))
+            results = [r async for r in query.acall(curie=self.curie, raw=True)]
+            gc.collect()
+            return results
+
+        results = asyncio.run(inner())
+        gc.collect()
+        assert [r.source.name for r in results] == ['a']
+        assert errors == []
+
+    def test_cache(self):
+        from ontquery.cache import QueryCache
+        service = SlowService('a', delay=0)
+        query = self.make(service, cache=QueryCache())
+        for _ in range(2):
+            self.collect(query.acall(curie=self.curie, raw=True))
+
+        assert query.cache.info().hits == 1
+        # the sync and async paths share entries
+        assert [r.source.name for r in query(curie=self.curie, raw=True)] == ['a']
+        assert query.cache.info().hits == 2
+
+
+class TestBulkQuery(unittest.TestCase):
+    def setUp(self):
+        self.remote = CountingRdflib(test_graph)
+
+        class OntTerm(oq.OntTerm): pass
+        OntTerm.query_init(self.remote)
+        self.OntTerm = OntTerm
+
+    def test_resolve_many(self):
+        inputs = ['UBERON:0000955', 'BIRNLEX:796',
+                  'http://purl.obolibrary.org/obo/UBERON_0000955',
+                  'UBERON:0000955']
+        terms = self.OntTerm.resolve_many(inputs, max_workers=4)
+        assert self.remote.calls == 2
+        assert [t.curie for t in terms] == ['UBERON:0000955', 'BIRNLEX:796',
+                                            'UBERON:0000955', 'UBERON:0000955']
+        assert terms[0] is terms[2] is terms[3]
+        expect = [self.OntTerm(i) for i in inputs]
+        for t, e in zip(terms, expect):
+            assert t.label == e.label and t.synonyms == e.synonyms
+            assert t.validated and t.source is self.remote
+
+    def test_errors(self):
+        terms = self.OntTerm.resolve_many(['UBERON:0000955',
+                                           'NOTAPREFIX:1',
+                                           'UBERON:999999999'])
+        assert terms[0].label == 'brain'
+        assert isinstance(terms[1], oq.OntId.UnknownPrefixError)
+        assert not terms[2].validated and terms[2].label is None
+
+    def test_service_error(self):
+        class Broken(SlowService):
+            def query(self, curie=None, **kwargs):
+                if curie == 'BIRNLEX:796':
+                    raise ValueError('broken')
+
+                yield from super().query(curie=curie, **kwargs)
+
+        query = oq.OntQuery(Broken('b', delay=0), instrumented=self.OntTerm)
+        results = query.bulk([{'curie': 'UBERON:0000955'},
+                              {'curie': 'BIRNLEX:796'},
+                              {'term': 'a', 'curie': 'UBERON:0000955', 'suffix': '1'}])
+        assert results[0][0].label == 'b'
+        assert isinstance(results[1], ValueError)
+        assert isinstance(results[2], ValueError)  # suffix without prefix
+
+    def test_priority(self):
+        unlabeled = SlowService('u', delay=0, label=False)
+        labeled = SlowService('l', delay=0)
+        last = SlowService('x', delay=0)
+        query = oq.OntQuery(unlabeled, labeled, last, instrumented=self.OntTerm)
+        results, = query.bulk([{'curie': 'BIRNLEX:796'}])
+        # same as what __call__ yields
+        assert [r.source.name for r in results] == ['u', 'l']
+        assert last.started_at is None
+
+    def test_query_many_batch(self):
+        class Batched(SlowService):
+            batches = []
+            def query_many(self, queries, mapper=map):
+                self.batches.append(len(queries))
+                return super().query_many(queries)
+
+        query = oq.OntQuery(Batched('b', delay=0), instrumented=self.OntTerm)
+        results = query.bulk([{'curie': f'BIRNLEX:{i}'} for i in range(5)])
+        assert Batched.batches == [5]
+        assert [r.curie for r, in results] == [f'BIRNLEX:{i}' for i in range(5)]
+
+    def test_interlex_query_many(self):
+        remote = oq.plugin.get('InterLex')(api_first=True)
+        OntService.setup(remote, instrumented=self.OntTerm)
+        entities = [{'ilx': f'ilx_{i:07}', 'label': f'thing {i}', 'definition': None,
+                     'synonyms': [], 'type': 'term', 'existing_ids': [],
+                     'superclasses': []}
+                    for i in range(5)]
+        entities[4]['existing_ids'] = [{'iri': oq.OntId('UBERON:0000955').iri,
+                                        'curie': 'UBERON:0000955', 'preferred': '0'}]
+        remote.ilx_cli = FakeIlxClient(entities)
+        queries = [{'curie': 'ILX:0000001'},
+                   {'iri': 'http://uri.interlex.org/base/ilx_0000003'},
+                   {'curie': 'UBERON:0000955'},
+                   {'curie': 'ILX:0000009'},
+                   {'iri': oq.OntId('ILX:0000002').iri, 'curie': 'ILX:0000001'}]
+        results = remote.query_many(queries)
+        assert len(remote.ilx_cli.calls) == 1
+        assert [r.label for r, in results[:3]] == ['thing 1', 'thing 3', 'thing 4']
+        assert results[2][0].curie == 'UBERON:0000955'
+        assert results[3] == ()
+        assert isinstance(results[4], ValueError)
+
+    def test_fetch_with(self):
+        terms = [self.OntTerm('UBERON:0000955'), self.OntTerm('BIRNLEX:796')]
+        for term in terms:
+            term.label = None
+            term.fetch_with()
+
+        calls = self.remote.calls
+        assert self.OntTerm.query.run_bulk_fetch() == []
+        assert self.remote.calls == calls + 2
+        assert terms[0].label == 'brain'
+
+    def test_fetch_with_lazy(self):
+        class OntTerm(self.OntTerm):
+            lazy = True
+
+        terms = [OntTerm('UBERON:0000955'), OntTerm('BIRNLEX:796')]
+        for term in terms:
+            term.fetch_with()
+
+        assert self.OntTerm.query.run_bulk_fetch() == []
+        calls = self.remote.calls
+        assert all(t.bound for t in terms)
+        assert terms[0].label == 'brain'
+        assert self.remote.calls == calls  # not queried again on access
+
+
+class FakeCypher:
+    """ answers paged cypher from a list of neo4j node dicts """
+
+    def __init__(self, nodes):
+        self.nodes = sorted(nodes, key=lambda n: n['iri'])
+        self.queries = []
+
+    def execute(self, cypher, limit, output):
+        self.queries.append(cypher)
+        nodes = self.nodes
+        if 'n.iri > ' in cypher:
+            last = cypher.split('n.iri > ')[1].split(')')[0].strip("'")
+            nodes = [n for n in nodes if n['iri'] > last]
+
+        return nodes[:limit]
+
+
+class FakeIlxClient:
+    def __init__(self, entities):
+        self.entities = entities
+        self.calls = []
+
+    def query_elastic(self, query=None, size=10, **kwargs):
+        start = kwargs['from']
+        self.calls.append((query, start, size))
+        entities = [e for e in self.entities if self.matches(e, query)]
+        return entities[start:start + size]
+
+    @staticmethod
+    def matches(entity, query):
+        # only the should terms of the id lookups in query_many
+        should = query['query'].get('bool', {}).get('should')
+        if should is None:
+            return True
+
+        for clause in should:
+            (field, values), = clause['terms'].items()
+            if field == 'ilx' and entity['ilx'] in values:
+                return True
+            elif field == 'existing_ids.curie' and any(
+                    e['curie'] in values for e in entity['existing_ids']):
+                return True
+
+        return False
+
+
+class TestIterTerms(unittest.TestCase):
+    def setUp(self):
+        import rdflib
+        graph = rdflib.Graph()
+        for t in test_graph:
+            graph.add(t)
+
+        graph.bind('UBERON', rdflib.Namespace(oq.OntId('UBERON:').iri))
+        graph.bind('BIRNLEX', rdflib.Namespace(oq.OntId('BIRNLEX:').iri))
+
+        class OntTerm(oq.OntTerm): pass
+        self.OntTerm = OntTerm
+        self.remote = oq.plugin.get('rdflib')(graph)
+        self.remote.setup(instrumented=OntTerm)
+
+    def test_rdflib_pages(self):
+        query = oq.OntQuery(self.remote, instrumented=self.OntTerm)
+        expect = [r.curie for r in self.remote.query(prefix='UBERON')]
+        for page_size in (1, 2, 100):
+            curies = [t.curie for t in query.iter_terms(prefix='UBERON', page_size=page_size)]
+            assert curies == expect, page_size
+
+        assert len(expect) > 2
+
+    def test_lazy(self):
+        query = oq.OntQuery(self.remote, instrumented=self.OntTerm)
+        pages = []
+        prefix_subjects = self.remote.prefix_subjects
+        def counting(prefix, start=0, stop=None):
+            pages.append(start)
+            return prefix_subjects(prefix, start, stop)
+
+        self.remote.prefix_subjects = counting
+        first = next(query.iter_terms(prefix='UBERON', page_size=1, raw=True))
+        assert first.curie and pages == [0]
+
+    def test_skip_services(self):
+        service = SlowService('a', delay=0)
+        query = oq.OntQuery(service, self.remote, instrumented=self.OntTerm)
+        results = list(query.iter_terms(prefix='BIRNLEX', raw=True))
+        assert [r.curie for r in results] == ['BIRNLEX:796']
+        assert all(r.source is self.remote for r in results)
+        # rdflib has no categories
+        assert list(query.iter_terms(category='anatomical entity')) == []
+
+    def test_scigraph(self):
+        remote = oq.plugin.get('SciGraph')()
+        OntService.setup(remote, instrumented=self.OntTerm)
+        uberon = oq.OntId('UBERON:').iri
+        remote.curies = type('RemoteCuries', (oq.OntCuries.new(),), {})
+        remote.curies({'UBERON': uberon})
+        remote.categories = ['anatomical entity']
+        remote.sgc = FakeCypher([{'iri': f'{uberon}{i:07}', 'label': [f'thing {i}'],
+                                  'category': ['anatomical entity'], 'synonym': 'syn'}
+                                 for i in range(5)])
+        query = oq.OntQuery(remote, instrumented=self.OntTerm)
+        results = list(query.iter_terms(prefix='UBERON', category='anatomical entity',
+                                        page_size=2, raw=True))
+        assert [r.curie for r in results] == [f'UBERON:{i:07}' for i in range(5)]
+        assert results[0].label == 'thing 0' and results[0].synonyms == ('syn',)
+        assert len(remote.sgc.queries) == 3
+        assert f"n.iri STARTS WITH '{uberon}'" in remote.sgc.queries[0]
+        assert "'anatomical entity' IN n.category" in remote.sgc.queries[0]
+        assert 'SKIP' not in remote.sgc.queries[1]
+        assert f"(n.iri > '{uberon}0000001')" in remote.sgc.queries[1]
+        assert list(query.iter_terms(prefix='notaprefix')) == []
+        assert len(remote.sgc.queries) == 3
+        # prefixes the endpoint does not have are left to other services
+        query = oq.OntQuery(remote, self.remote, instrumented=self.OntTerm)
+        results = list(query.iter_terms(prefix='BIRNLEX', raw=True))
+        assert [(r.curie, r.source) for r in results] == [('BIRNLEX:796', self.remote)]
+        list(query.iter_terms(prefix=('UBERON', 'notaprefix'), page_size=10))
+        assert "notaprefix" not in remote.sgc.queries[-1]
+
+    def test_interlex(self):
+        remote = oq.plugin.get('InterLex')()
+        OntService.setup(remote, instrumented=self.OntTerm)
+        entities = [{'ilx': f'ilx_{i:07}', 'label': f'thing {i}', 'definition': None,
+                     'synonyms': [], 'type': 'term', 'existing_ids': [],
+                     'superclasses': []}
+                    for i in range(5)]
+        remote.ilx_cli = FakeIlxClient(entities)
+        results = list(remote.iter_terms(category='term', page_size=2))
+        assert [r.curie for r in results] == [f'ILX:{i:07}' for i in range(5)]
+        assert [c[1] for c in remote.ilx_cli.calls] == [0, 2, 4]
+        assert remote.ilx_cli.calls[0][0] == {'query': {'bool': {'filter': [
+            {'terms': {'type': ['term']}}]}}}
@@ -1,4 +1,6 @@
 import os
+import gzip
+import asyncio
 import unittest
 from uuid import uuid4
 import pytest
@@ -189,6 +191,461 @@ class TestSciGraph(ServiceBase, unittest.TestCase):
             pass
 
 
+class FakeSciGraphApi:
+    """ stand in for the scigraph client module that counts requests,
+        each request waits until all four metadata requests are in
+        flight, so fetching them one at a time breaks the barrier """
+
+    def __init__(self):
+        import threading
+        self.calls = []
+        self.lock = threading.Lock()
+        self.barrier = threading.Barrier(4, timeout=10)
+        api = self
+
+        class Client:
+            def __init__(self, **kwargs):
+                pass
+
+            def _call(self, name, value):
+                with api.lock:
+                    api.calls.append(name)
+
+                api.barrier.wait()
+                return value
+
+        class Vocabulary(Client):
+            def getCategories(self):
+                return self._call('categories', ['anatomical entity'])
+
+        class Graph(Client):
+            def getRelationships(self):
+                return self._call('relationships', ['subClassOf', 'BFO:0000050'])
+
+        class Cypher(Client):
+            def getCuries(self):
+                return self._call('curies', {'UBERON': oq.OntId('UBERON:').iri})
+
+            def execute(self, query, limit, output):
+                return self._call('ontologies', [{'iri': 'http://example.org/ont'}])
+
+        self.Vocabulary, self.Graph, self.Cypher, self.Dynamic = Vocabulary, Graph, Cypher, Client
+
+
+class TestSciGraphMetadata(unittest.TestCase):
+    def setUp(self):
+        import tempfile
+        self.dir = tempfile.TemporaryDirectory()
+        self.api = api = FakeSciGraphApi()
+
+        class SciGraph(oq.plugin.get('SciGraph')):
+            metadata_cache_path = os.path.join(self.dir.name, 'scigraph', 'metadata.json')
+            def _import_stuff(self):
+                self._scigraph = api
+
+        class OntTerm(oq.OntTerm): pass
+        self.OntTerm = OntTerm
+        self.SciGraph = SciGraph
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def make(self):
+        remote = self.SciGraph(apiEndpoint='http://example.org/scigraph')
+        remote.setup(instrumented=self.OntTerm)
+        return remote
+
+    def test_lazy_concurrent(self):
+        remote = self.make()
+        assert self.api.calls == []
+        assert remote.search_prefixes == ['UBERON']  # 4 requests at once
+        assert sorted(self.api.calls) == ['categories', 'curies', 'ontologies', 'relationships']
+        assert remote.categories == ['anatomical entity']
+        assert list(remote.onts) == ['http://example.org/ont']
+        assert list(remote.predicates) == ['BFO:0000050', 'subClassOf']
+        assert len(self.api.calls) == 4
+
+    def test_persisted(self):
+        list(self.make().predicates)
+        remote = self.make()
+        assert remote.search_prefixes == ['UBERON'] and len(self.api.calls) == 4
+        other = self.SciGraph(apiEndpoint='http://example.org/other')
+        other.setup(instrumented=self.OntTerm)
+        other.categories
+        assert len(self.api.calls) == 8
+
+    def test_expired(self):
+        list(self.make().predicates)
+        self.SciGraph.metadata_ttl = 0
+        remote = self.make()
+        assert len(self.api.calls) == 4
+        remote.categories
+        assert len(self.api.calls) == 8
+
+    def test_no_cache(self):
+        self.SciGraph.metadata_cache_path = None
+        self.make().categories
+        self.make().categories
+        assert len(self.api.calls) == 8
+        assert not os.path.exists(os.path.join(self.dir.name, 'scigraph'))
+
+    def test_malformed(self):
+        import json
+        path = self.SciGraph.metadata_cache_path
+        os.makedirs(os.path.dirname(path))
+        identity = self.SciGraph(apiEndpoint='http://example.org/scigraph').identity
+        for blob in ([], {identity: None}, {identity: {}}, {identity: {'created': 'x'}},
+                     {identity: {'created': 1e20, 'metadata': []}},
+                     {identity: {'created': 1e20, 'metadata': {'curies': {}}}}):
+            with open(path, 'wt') as f:
+                json.dump(blob, f)
+
+            del self.api.calls[:]
+            assert self.make().search_prefixes == ['UBERON']
+            assert len(self.api.calls) == 4, blob
+
+    def test_attribute_error(self):
+        from ontquery.exceptions import FetchingError
+        del self.api.Vocabulary.getCategories
+        remote = self.make()
+        with self.assertRaises(FetchingError):
+            remote.curies
+
+    def test_clear(self):
+        remote = self.make()
+        remote.categories
+        remote.clear_metadata()
+        remote.metadata_cache_path = None
+        remote.categories
+        assert len(self.api.calls) == 8
+
+
+class FakeSciGraphServer:
+    """ local http server that answers the subset of the SciGraph api
+        that SciGraphRemote.query uses and records each request path """
+    partOf = OntId('partOf:').iri
+    hasPart = OntId('hasPart:').iri
+    nodes = {'UBERON:0000955': 'brain',
+             'UBERON:0000062': 'organ',
+             'UBERON:0001016': 'nervous system',
+             'UBERON:0002240': 'spinal cord',
+             'UBERON:0000956': 'cerebral cortex',
+             'UBERON:0010000': 'multicellular anatomical structure',
+             'UBERON:0001062': 'anatomical entity',
+             'UBERON:0000467': 'anatomical system',
+             'UBERON:0000468': 'multicellular organism',}
+    edges = (('UBERON:0000955', 'subClassOf', 'UBERON:0000062'),
+             ('UBERON:0002240', 'subClassOf', 'UBERON:0000062'),
+             ('UBERON:0000062', 'subClassOf', 'UBERON:0010000'),
+             ('UBERON:0010000', 'subClassOf', 'UBERON:0001062'),
+             ('UBERON:0001016', 'subClassOf', 'UBERON:0000467'),
+             ('UBERON:0000467', 'subClassOf', 'UBERON:0010000'),
+             ('UBERON:0000955', partOf, 'UBERON:0001016'),
+             ('UBERON:0001016', hasPart, 'UBERON:0002240'),
+             ('UBERON:0000956', partOf, 'UBERON:0000955'),
+             ('UBERON:0010000', partOf, 'UBERON:0000468'),
+             ('UBERON:0000467', partOf, 'UBERON:0000468'),)
+
+    def __init__(self):
+        import threading
+        from http.server import ThreadingHTTPServer
+        self.neighbor_types = True  # include types in the meta of neighbors nodes
+        self.paths = []
+        self.requests = []
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), self.handler())
+        self.endpoint = 'http://127.0.0.1:{}'.format(self.server.server_address[1])
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    @staticmethod
+    def curie(id):
+        return OntId(id).curie
+
+    def node(self, curie):
+        return {'id': curie, 'lbl': self.nodes[curie],
+                'meta': {'types': ['Class', 'anatomical entity'],
+                         'category': ['anatomical entity']}}
+
+    def concept(self, curie):
+        return {'iri': OntId(curie).iri, 'curie': curie,
+                'labels': [self.nodes[curie]], 'definitions': [], 'synonyms': [],
+                'acronyms': [], 'abbreviations': [],
+                'categories': ['anatomical entity'], 'deprecated': False}
+
+    def neighbors(self, curie, params):
+        types = {t if t == 'subClassOf' else OntId(t).iri
+                 for t in params.get('relationshipType', [])}
+        direction = params.get('direction', ['BOTH'])[0]
+        depth = int(params.get('depth', ['1'])[0])
+        found, edges, frontier = {curie}, [], [curie]
+        for _ in range(depth):
+            next_frontier = []
+            for s, p, o in self.edges:
+                if types and p not in types:
+                    continue
+
+                if direction != 'INCOMING' and s in frontier:
+                    new = o
+                elif direction != 'OUTGOING' and o in frontier:
+                    new = s
+                else:
+                    continue
+
+                edge = {'sub': s, 'pred': p, 'obj': o, 'meta': {}}
+                if edge not in edges:
+                    edges.append(edge)
+
+                if new not in found:
+                    found.add(new)
+                    next_frontier.append(new)
+
+            frontier = next_frontier
+
+        nodes = [self.node(c) for c in sorted(found)]
+        if not self.neighbor_types:
+            for node in nodes:
+                del node['meta']['types']
+
+        return {'nodes': nodes, 'edges': edges}
+
+    def answer(self, path, params):
+        from urllib.parse import unquote
+        if path == '/cypher/curies':
+            return {'UBERON': OntId('UBERON:').iri, 'BFO': OntId('BFO:').iri}
+        elif path == '/vocabulary/categories':
+            return ['anatomical entity']
+        elif path == '/graph/relationship_types':
+            return ['subClassOf', self.partOf, self.hasPart]
+        elif path == '/cypher/execute':
+            return ''  # an empty text table
+
+        *head, id = path.split('/')
+        curie = self.curie(unquote(id))
+        if curie not in self.nodes:
+            return None
+        elif head == ['', 'vocabulary', 'id']:
+            return self.concept(curie)
+        elif head == ['', 'graph', 'neighbors']:
+            return self.neighbors(curie, params)
+        elif head == ['', 'graph']:
+            return {'nodes': [self.node(curie)], 'edges': []}
+
+    def handler(self):
+        import json
+        from urllib.parse import urlsplit, parse_qs
+        from http.server import BaseHTTPRequestHandler
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlsplit(self.path)
+                params = parse_qs(url.query)
+                fake.paths.append(url.path)
+                fake.requests.append((url.path, params))
+                body = fake.answer(url.path, params)
+                if body is None:
+                    self.send_response(404)
+                    self.end_headers()
+                    return
+
+                if isinstance(body, str):
+                    blob, content_type = body.encode(), 'text/plain'
+                else:
+                    blob, content_type = json.dumps(body).encode(), 'application/json'
+
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(blob)))
+                self.end_headers()
+                self.wfile.write(blob)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+class TestSciGraphBatch(unittest.TestCase):
+    predicates = ('rdfs:subClassOf', 'partOf:', 'hasPart:', 'BFO:0000050')
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = FakeSciGraphServer()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.close()
+
+    def make(self, batch_neighbors):
+        from pyontutils import scigraph_client
+
+        class SciGraph(oq.plugin.get('SciGraph')):
+            cache = False
+            metadata_cache_path = None
+            known_inverses = ('partOf:', 'hasPart:'),
+            def _import_stuff(self):
+                self._scigraph = scigraph_client
+
+        SciGraph.batch_neighbors = batch_neighbors
+        class OntTerm(oq.OntTerm): pass
+        remote = SciGraph(apiEndpoint=self.server.endpoint)
+        remote.setup(instrumented=OntTerm)
+        list(remote.predicates)  # fetch metadata before counting
+        return remote
+
+    def query(self, remote, curie):
+        del self.server.paths[:]
+        result, = remote.query(curie=curie, predicates=self.predicates)
+        return result, list(self.server.paths)
+
+    @staticmethod
+    def get_node(paths):
+        return [p for p in paths
+                if p.startswith('/graph/') and not p.startswith('/graph/neighbors/')]
+
+    def test_request_count(self):
+        batch, paths = self.query(self.make(True), 'UBERON:0000955')
+        assert len(paths) == 3, paths
+        assert len([p for p in paths if p.startswith('/graph/neighbors/')]) == 2
+        assert not self.get_node(paths)
+        single, paths = self.query(self.make(False), 'UBERON:0000955')
+        assert len(paths) == 9, paths  # findById, 4 + 3 inverse neighbors, getNode
+        assert batch.predicates == single.predicates
+        assert batch.types == single.types == (OntId('owl:Class'),)
+
+    def test_no_types(self):
+        expect, _ = self.query(self.make(True), 'UBERON:0000955')
+        self.server.neighbor_types = False
+        try:
+            result, paths = self.query(self.make(True), 'UBERON:0000955')
+        finally:
+            self.server.neighbor_types = True
+
+        assert len(paths) == 4, paths  # getNode for the types
+        assert len(self.get_node(paths)) == 1
+        assert result.types == expect.types == (OntId('owl:Class'),)
+
+    def test_partition(self):
+        result, _ = self.query(self.make(True), 'UBERON:0000955')
+        preds = {OntId(k).iri: {v.curie for v in vs} for k, vs in result.predicates.items()}
+        assert preds[OntId('rdfs:subClassOf').iri] == {'UBERON:0000062'}
+        assert preds[OntId('partOf:').iri] == {'UBERON:0001016'}
+        # from the inverse request, cerebral cortex partOf brain
+        assert preds[OntId('hasPart:').iri] == {'UBERON:0000956'}
+
+    def test_no_edges(self):
+        remote = self.make(True)
+        result, paths = self.query(remote, 'UBERON:0002240')
+        single, _ = self.query(self.make(False), 'UBERON:0002240')
+        assert result.predicates == single.predicates
+        assert result.types == single.types
+
+    def test_supers(self):
+        remote = self.make(True)
+        def closure_requests():
+            return [path for path, params in self.server.requests
+                    if params.get('depth') == [str(remote.supers_depth)]]
+
+        del self.server.requests[:]
+        values = {o.curie for p, o in remote._graphQuery(OntId('UBERON:0000955'), OntId('partOf:'),
+                                                         include_supers=True)}
+        # multicellular organism from the superclass, nervous system directly
+        assert values == {'UBERON:0000468', 'UBERON:0001016'}
+        # brain and nervous system, each closure fetched with one request
+        assert len(closure_requests()) == 2
+        assert [c.curie for c in remote.superclasses(['UBERON:0000955'])[0]] == [
+            'UBERON:0000062', 'UBERON:0010000', 'UBERON:0001062']
+
+        # organ and anatomical system were in those responses
+        del self.server.requests[:]
+        list(remote._graphQuery(OntId('UBERON:0000062'), OntId('partOf:'), include_supers=True))
+        list(remote._graphQuery(OntId('UBERON:0000467'), OntId('partOf:'), include_supers=True))
+        assert closure_requests() == []
+
+        del self.server.requests[:]
+        result, = remote.query(curie='UBERON:0000955', predicates=('partOf:', 'rdfs:subClassOf'),
+                               include_supers=True)
+        assert closure_requests() == []
+        assert {o.curie for o in result.predicates['partOf:']} == {'UBERON:0000468',
+                                                                   'UBERON:0001016'}
+
+        remote.clear_superclasses()
+        del self.server.requests[:]
+        remote.superclasses(['UBERON:0000955', 'UBERON:0002240'])
+        assert len(closure_requests()) == 2
+        # one pool for every level of every traversal
+        executor = remote._supers_executor
+        assert executor is not None
+        list(remote._graphQuery(OntId('UBERON:0000955'), OntId('partOf:'), include_supers=True))
+        assert remote._supers_executor is executor
+
+    def test_supers_unlocked(self):
+        remote = self.make(True)
+        remote.supers_depth = 2  # the closure of brain takes two requests
+        fetch = remote._fetch_superclasses
+        fetched = []
+        def unlocked(node):
+            assert not remote._superclass_lock.locked()
+            fetched.append(node.curie)
+            return fetch(node)
+
+        remote._fetch_superclasses = unlocked
+        assert [c.curie for c in remote.superclasses(['UBERON:0000955'])[0]] == [
+            'UBERON:0000062', 'UBERON:0010000', 'UBERON:0001062']
+        assert len(fetched) == 2, fetched
+
+
+    def native(self, remote):
+        """ remote.aquery without aiohttp, each request is fetched in a
+            thread through the sync client and recorded """
+        fetched = []
+        async def afetch(method, url, params=None, output=None, api_key=None):
+            fetched.append(url)
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                None, lambda: remote.sgg._normal_get(method, url, params, output))
+
+        remote._import_aiohttp = lambda: True
+        remote._afetch = afetch
+        return fetched
+
+    def test_aquery(self):
+        remote = self.make(True)
+        fetched = self.native(remote)
+        kwargs = dict(curie='UBERON:0000955', predicates=self.predicates)
+        results = asyncio.run(remote.aquery(**kwargs))
+        assert ([dict(r.items()) for r in results] ==
+                [dict(r.items()) for r in remote.query(**kwargs)])
+        assert len(fetched) == 3, fetched
+        assert remote._aquery_executor is None
+
+        del fetched[:]
+        kwargs = dict(curie='UBERON:0000955', predicates=('partOf:',), include_supers=True)
+        results = asyncio.run(remote.aquery(**kwargs))
+        assert ([dict(r.items()) for r in results] ==
+                [dict(r.items()) for r in remote.query(**kwargs)])
+        assert {o.curie for o in results[0].predicates['partOf:']} == {'UBERON:0000468',
+                                                                       'UBERON:0001016'}
+        assert fetched
+
+    def test_aquery_missing(self):
+        remote = self.make(True)
+        fetched = self.native(remote)
+        assert asyncio.run(remote.aquery(curie='UBERON:9999999')) == ()
+        assert len(fetched) == 1
+
+    def test_aquery_threads(self):
+        remote = self.make(True)
+        remote._import_aiohttp = lambda: None
+        results = asyncio.run(remote.aquery(curie='UBERON:0000955'))
+        assert [r.label for r in results] == ['brain']
+        assert remote._aquery_executor is not None
+
+
 class TestRdflib(ServiceBase, unittest.TestCase):
     remote = oq.plugin.get('rdflib')(test_graph)
 
@@ -207,6 +664,446 @@ class TestRdflib(ServiceBase, unittest.TestCase):
         assert len(oops) == 3, 'oh no'
 
 
+class TestRdflibIndex(unittest.TestCase):
+    def setUp(self):
+        class OntTerm(oq.OntTerm): pass
+        self.OntTerm = OntTerm
+
+    def results(self, use_index, curie, **kwargs):
+        remote = oq.plugin.get('rdflib')(test_graph)
+        remote.use_index = use_index
+        remote.setup(instrumented=self.OntTerm)
+        def norm(v):
+            # triple order is not defined by rdflib so neither is tuple order
+            if isinstance(v, tuple):
+                return frozenset(v)
+            elif isinstance(v, dict):
+                return {k: norm(v) for k, v in v.items()}
+            return v
+
+        return [{k: norm(v) for k, v in r.items() if k != 'source'}
+                for r in remote.query(curie=curie, **kwargs)]
+
+    def test_same_results(self):
+        sco = oq.OntId('rdfs:subClassOf')
+        for curie in ('UBERON:0000955', 'BIRNLEX:796', 'TEMP:cycle-1'):
+            for depth in (1, 2, 99):
+                expect = self.results(False, curie, predicates=(sco,), depth=depth)
+                got = self.results(True, curie, predicates=(sco,), depth=depth)
+                assert got == expect, (curie, depth)
+
+    def test_index(self):
+        remote = oq.plugin.get('rdflib')(test_graph)
+        remote.setup(instrumented=self.OntTerm)
+        index = remote.index()
+        assert index is remote.index()
+        brain = rdflib.URIRef(oq.OntId('UBERON:0000955').iri)
+        assert set(index.edges(brain)) == {(index.ids[p], index.ids[o])
+                                           for p, o in test_graph.predicate_objects(brain)}
+        sco = rdflib.RDFS.subClassOf
+        assert list(index.objects(brain, sco)) == list(test_graph.objects(brain, sco))
+        parent = next(test_graph.objects(brain, sco))
+        assert list(index.subjects(sco, parent)) == [brain]
+        assert index.is_class(brain) and not index.is_class(sco)
+        assert list(index.edges(rdflib.URIRef('http://example.org/nothing'))) == []
+
+    def test_index_curies(self):
+        class LocalId(oq.OntId):
+            _namespaces = type('LocalCuries', (oq.OntCuries.new(),), {})
+
+        LocalId._namespaces({p: n for p, n in oq.OntCuries().items() if p != 'UBERON'})
+        remote = oq.plugin.get('rdflib')(test_graph, OntId=LocalId)
+        index = remote.index()
+        brain = index.ids[rdflib.URIRef(OntId('UBERON:0000955').iri)]
+        assert index.curie(brain) == 'obo:UBERON_0000955'
+        LocalId._namespaces({'UBERON': OntId('UBERON:').iri})
+        assert remote.index() is index  # the rows are kept
+        assert index.curie(brain) == 'UBERON:0000955'
+        assert index.value(brain).curie == 'UBERON:0000955'
+
+
+class TestRdflibLabels(unittest.TestCase):
+    def setUp(self):
+        graph = rdflib.Graph()
+        for t in test_graph:
+            graph.add(t)
+
+        # language tags and odd whitespace
+        graph.add((rdflib.URIRef(oq.OntId('TEMP:cycle-1').iri), rdflib.RDFS.label,
+                   rdflib.Literal('cycle  One', lang='en')))
+        graph.add((rdflib.URIRef(oq.OntId('TEMP:cycle-2').iri),
+                   rdflib.URIRef(oq.OntId('NIFRID:synonym').iri),
+                   rdflib.Literal('brain')))
+
+        class OntTerm(oq.OntTerm): pass
+        self.remote = oq.plugin.get('rdflib')(graph)
+        self.remote.setup(instrumented=OntTerm)
+
+    def curies(self, **kwargs):
+        return [r.curie for r in self.remote.query(**kwargs)]
+
+    def test_ranked(self):
+        # exact label, then label that differs in case, then synonym
+        assert self.curies(term='brain') == ['UBERON:0000955', 'BIRNLEX:796', 'TEMP:cycle-2']
+        assert self.curies(term='Brain')[:2] == ['BIRNLEX:796', 'UBERON:0000955']
+
+    def test_label_only(self):
+        assert self.curies(label='BRAIN') == ['UBERON:0000955', 'BIRNLEX:796']
+
+    def test_normalized(self):
+        assert self.curies(label='cycle one') == ['TEMP:cycle-1']
+        assert self.curies(term=' THINKthink ') == ['BIRNLEX:796']
+
+    def test_filters(self):
+        assert self.curies(term='brain', prefix=('BIRNLEX',)) == ['BIRNLEX:796']
+        assert self.curies(term='brain', exclude_prefix=('UBERON',),
+                           limit=1) == ['BIRNLEX:796']
+        assert self.curies(term='nope') == []
+
+    def test_rebuild(self):
+        index = self.remote.labels()
+        assert index is self.remote.labels()
+        self.remote.graph.add((rdflib.URIRef('http://example.org/x'), rdflib.RDF.type,
+                               rdflib.OWL.Class))
+        self.remote.graph.add((rdflib.URIRef('http://example.org/x'), rdflib.RDFS.label,
+                               rdflib.Literal('new thing')))
+        assert self.remote.labels() is not index
+        assert [r.iri for r in self.remote.query(label='New Thing')] == ['http://example.org/x']
+
+
+class TestRdflibSearch(unittest.TestCase):
+    def setUp(self):
+        class OntTerm(oq.OntTerm): pass
+        self.remote = oq.plugin.get('rdflib')(test_graph)
+        OntTerm.query_init(self.remote).setup()
+        self.OntTerm = OntTerm
+
+    def curies(self, **kwargs):
+        return [r.curie for r in self.remote.query(**kwargs)]
+
+    def test_search(self):
+        assert set(self.curies(search='brain')) == {'UBERON:0000955', 'BIRNLEX:796'}
+        assert self.curies(search='mushy GRAY') == ['BIRNLEX:796']
+        assert self.curies(search='brain nogin') == ['BIRNLEX:796']
+        assert self.curies(search='brain zebra') == []
+
+    def test_prefix_match(self):
+        assert self.curies(search='think') == ['BIRNLEX:796']
+        assert self.curies(search='bra') and self.curies(search='bra') == self.curies(search='brain')
+
+    def test_rank(self):
+        from ontquery.plugins.services.rdflib import TextIndex
+        g = rdflib.Graph()
+        a, b, c = (rdflib.URIRef(f'http://example.org/{x}') for x in 'abc')
+        label, definition = rdflib.RDFS.label, rdflib.URIRef('http://example.org/def')
+        g.add((a, definition, rdflib.Literal('a part of the cortex')))
+        g.add((b, label, rdflib.Literal('cortex')))
+        g.add((c, label, rdflib.Literal('cortical plate')))
+        index = TextIndex.from_graph(g, ((label, 2.), (definition, .5)))
+        assert index.search('cortex') == [b, a]
+        assert set(index.search('cort')) == {a, b, c}
+        assert index.search('cort')[-1] == a  # definitions weigh less
+
+    def test_filters(self):
+        assert self.curies(search='brain', prefix=('BIRNLEX',)) == ['BIRNLEX:796']
+        assert self.curies(search='brain', exclude_prefix=('BIRNLEX',)) == ['UBERON:0000955']
+        assert len(self.curies(search='brain', limit=1)) == 1
+
+    def test_ontterm_search(self):
+        terms = self.OntTerm.search('brain')
+        assert {t.curie for t in terms} == {'UBERON:0000955', 'BIRNLEX:796'}
+
+    def test_persist(self):
+        import tempfile
+        from unittest import mock
+        from ontquery.plugins.services.rdflib import TextIndex
+        with tempfile.TemporaryDirectory() as d:
+            path = os.path.join(d, 'search.json.gz')
+            self.remote.search_index_path = path
+            expect = self.curies(search='brain')
+            assert os.path.exists(path)
+            remote = oq.plugin.get('rdflib')(test_graph)
+            remote.search_index_path = path
+            remote.setup(instrumented=self.OntTerm)
+            with mock.patch.object(TextIndex, 'from_graph') as from_graph:
+                got = [r.curie for r in remote.query(search='brain')]
+                assert not from_graph.called
+
+            assert got == expect
+            assert os.listdir(d) == ['search.json.gz']  # no temp file left
+
+    def test_persist_rebuild(self):
+        import tempfile
+        from ontquery.plugins.services.rdflib import TextIndex
+        with tempfile.TemporaryDirectory() as d:
+            path = os.path.join(d, 'search.json.gz')
+            def remote(**kwargs):
+                remote = oq.plugin.get('rdflib')(test_graph)
+                remote.search_index_path = path
+                for k, v in kwargs.items():
+                    setattr(remote, k, v)
+
+                remote.setup(instrumented=self.OntTerm)
+                return remote
+
+            expect = [r.curie for r in remote().query(search='brain')]
+            for blob in (b'', b'not gzip', gzip.compress(b'not json'),
+                         gzip.compress(b'{"version": 1}'), gzip.compress(b'[]'),
+                         gzip.compress(b'{"version": 1, "stamp": null}')[:-4]):
+                with open(path, 'wb') as f:
+                    f.write(blob)
+
+                assert [r.curie for r in remote().query(search='brain')] == expect, blob
+
+            # a different field set does not reuse the saved index
+            labels = remote(search_fields=(('label', 1.),)).text_index()
+            assert labels.stamp[2] == [[str(rdflib.RDFS.label), 1.]]
+            assert len(remote().text_index().stamp[2]) > 1
+            assert TextIndex.load(path).stamp[2] != labels.stamp[2]
+
+
+class TestRdflibPrefix(unittest.TestCase):
+    def setUp(self):
+        self.graph = rdflib.Graph()
+        for t in test_graph:
+            self.graph.add(t)
+
+        self.graph.bind('UBERON', rdflib.Namespace(oq.OntId('UBERON:').iri))
+        self.graph.bind('BIRNLEX', rdflib.Namespace(oq.OntId('BIRNLEX:').iri))
+
+        class OntTerm(oq.OntTerm): pass
+        self.remote = oq.plugin.get('rdflib')(self.graph)
+        self.remote.setup(instrumented=OntTerm)
+
+    def brute(self, prefix):
+        return sorted(u for u in set(e for t in self.graph for e in t
+                                     if isinstance(e, rdflib.URIRef))
+                      if self.remote._prefix(u) == prefix)
+
+    def test_index(self):
+        for prefix in ('UBERON', 'BIRNLEX', 'rdfs', 'owl'):
+            assert list(self.remote.prefix_subjects(prefix)) == self.brute(prefix), prefix
+
+        assert self.remote.prefix_subjects('notaprefix') == ()
+
+    def test_paging(self):
+        everything = self.remote.prefix_subjects('UBERON')
+        pages = [self.remote.prefix_subjects('UBERON', i, i + 2)
+                 for i in range(0, len(everything), 2)]
+        assert sum(pages, ()) == everything
+
+    def test_query(self):
+        curies = [r.curie for r in self.remote.query(prefix=('UBERON', 'BIRNLEX'))]
+        expect = [r.curie for p in ('UBERON', 'BIRNLEX') for u in self.brute(p)
+                  for r in self.remote.query(iri=u)]
+        assert curies == expect and 'BIRNLEX:796' in curies
+
+    def test_rebuild(self):
+        before = self.remote.prefix_subjects('UBERON')
+        new = rdflib.URIRef(oq.OntId('UBERON:1234567').iri)
+        self.graph.add((new, rdflib.RDF.type, rdflib.OWL.Class))
+        assert self.remote.prefix_subjects('UBERON') == tuple(sorted(before + (new,)))
+
+
+class TestRdflibSnapshot(unittest.TestCase):
+    def setUp(self):
+        import tempfile
+        self.graph = rdflib.Graph(identifier=rdflib.URIRef('http://example.org/snap'))
+        for t in test_graph:
+            self.graph.add(t)
+
+        brain = rdflib.URIRef(oq.OntId('UBERON:0000955').iri)
+        restriction = rdflib.BNode()
+        self.graph.add((brain, rdflib.RDFS.subClassOf, restriction))
+        self.graph.add((restriction, rdflib.RDF.type, rdflib.OWL.Restriction))
+        self.graph.add((brain, rdflib.RDFS.comment, rdflib.Literal('cerveau', lang='fr')))
+        self.graph.add((restriction, rdflib.OWL.cardinality, rdflib.Literal(3)))
+
+        class OntTerm(oq.OntTerm): pass
+        self.OntTerm = OntTerm
+        self.remote = oq.plugin.get('rdflib')(self.graph)
+        self.remote.setup(instrumented=OntTerm)
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, 'graph.snapshot')
+        self.remote.snapshot(self.path)
+        self.snap = oq.plugin.get('rdflib').from_snapshot(self.path)
+        self.snap.setup(instrumented=OntTerm)
+
+    def tearDown(self):
+        self.snap.graph.close()
+        self.dir.cleanup()
+
+    def test_nul_literal(self):
+        from ontquery.plugins.services.snapshot import encode_node, decode_node
+        for literal in (rdflib.Literal('a\x00b'),
+                        rdflib.Literal('\x00\x00', lang='en'),
+                        rdflib.Literal('x\x00', datatype=rdflib.XSD.string)):
+            decoded = decode_node(encode_node(literal))
+            assert (decoded, decoded.datatype, decoded.language) == (
+                literal, literal.datatype, literal.language)
+
+        brain = rdflib.URIRef(oq.OntId('UBERON:0000955').iri)
+        self.graph.add((brain, rdflib.RDFS.comment, rdflib.Literal('a\x00b')))
+        path = os.path.join(self.dir.name, 'nul.snapshot')
+        self.remote.snapshot(path)
+        graph = oq.plugin.get('rdflib').from_snapshot(path).graph
+        assert rdflib.Literal('a\x00b') in set(graph.objects(brain, rdflib.RDFS.comment))
+        graph.close()
+
+    def test_graph(self):
+        from rdflib.compare import isomorphic
+        graph = self.snap.graph
+        assert len(graph) == len(self.graph)
+        assert graph.identifier == self.graph.identifier
+        assert sorted(graph.namespaces()) == sorted(self.graph.namespaces())
+        assert isomorphic(graph, self.graph)
+        brain = rdflib.URIRef(oq.OntId('UBERON:0000955').iri)
+        for pattern in ((brain, None, None),
+                        (None, rdflib.RDFS.subClassOf, None),
+                        (None, None, rdflib.OWL.Class),
+                        (None, rdflib.RDFS.label, rdflib.Literal('brain')),
+                        (None, None, rdflib.Literal(3)),
+                        (rdflib.URIRef('http://example.org/nothing'), None, None)):
+            assert (sorted(graph.triples(pattern)) ==
+                    sorted(self.graph.triples(pattern))), pattern
+
+        with self.assertRaises(TypeError):
+            graph.add((brain, rdflib.RDFS.label, rdflib.Literal('nope')))
+
+    def test_same_results(self):
+        sco = oq.OntId('rdfs:subClassOf')
+        for curie in ('UBERON:0000955', 'BIRNLEX:796', 'TEMP:cycle-1'):
+            for depth in (1, 99):
+                expect = list(self.remote.query(curie=curie, predicates=(sco,), depth=depth))
+                got = list(self.snap.query(curie=curie, predicates=(sco,), depth=depth))
+                assert [sorted(r.predicates) for r in got] == [sorted(r.predicates) for r in expect]
+                assert [(r.label, r.iri) for r in got] == [(r.label, r.iri) for r in expect]
+
+        assert [r.curie for r in self.snap.query(term='brain')] == ['UBERON:0000955', 'BIRNLEX:796']
+        assert self.snap.identity == self.remote.identity
+        assert type(self.snap.index()).__name__ == 'SnapshotIndex'
+
+    def test_not_a_snapshot(self):
+        path = os.path.join(self.dir.name, 'graph.ttl')
+        self.graph.serialize(path, format='turtle')
+        with self.assertRaises(ValueError):
+            oq.plugin.get('rdflib').from_snapshot(path)
+
+
+class TestTermStore(unittest.TestCase):
+    def setUp(self):
+        import tempfile
+        from ontquery.plugins.services import termstore
+        self.termstore = termstore
+        self.graph = rdflib.Graph()
+        for t in test_graph:
+            self.graph.add(t)
+
+        self.graph.bind('UBERON', rdflib.Namespace(oq.OntId('UBERON:').iri))
+
+        class OntTerm(oq.OntTerm): pass
+        self.OntTerm = OntTerm
+        self.remote = oq.plugin.get('rdflib')(self.graph)
+        self.remote.setup(instrumented=OntTerm)
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, 'terms')
+        termstore.build_from_rdflib(self.remote, self.path)
+        self.store = oq.plugin.get('termstore')(self.path)
+        self.store.setup(instrumented=OntTerm)
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    @staticmethod
+    def norm(result):
+        def norm(v):
+            if isinstance(v, tuple):
+                return frozenset(str(e) for e in v)
+            elif isinstance(v, dict):
+                return {k: norm(v) for k, v in v.items()}
+            return str(v)
+
+        return {k: norm(result[k])
+                for k in ('iri', 'curie', 'label', 'synonyms', 'definition', 'predicates')}
+
+    def test_same_results(self):
+        sco = oq.OntId('rdfs:subClassOf')
+        for curie in ('UBERON:0000955', 'BIRNLEX:796', 'TEMP:cycle-1'):
+            for depth in (1, 99):
+                expect = list(self.remote.query(curie=curie, predicates=(sco,), depth=depth))
+                got = list(self.store.query(curie=curie, predicates=(sco,), depth=depth))
+                assert [self.norm(r) for r in got] == [self.norm(r) for r in expect], (curie, depth)
+
+        assert list(self.store.query(curie='UBERON:999999999')) == []
+
+    def test_labels(self):
+        for kwargs in ({'label': 'brain'}, {'term': 'Brain '}, {'label': 'nothing'}):
+            assert ([r.curie for r in self.store.query(**kwargs)] ==
+                    [r.curie for r in self.remote.query(**kwargs)]), kwargs
+
+        assert [r.curie for r in self.store.query(term='brain', prefix='BIRNLEX')] == ['BIRNLEX:796']
+
+    def test_prefix(self):
+        curies = [r.curie for r in self.store.query(prefix='UBERON')]
+        assert curies == sorted(curies) and 'UBERON:0000955' in curies
+        assert all(c.startswith('UBERON:') for c in curies)
+        query = oq.OntQuery(self.store, instrumented=self.OntTerm)
+        assert [t.curie for t in query.iter_terms(prefix='UBERON')] == curies
+        for page_size in (1, 2, 100):
+            assert [r.curie for r in self.store.iter_terms('UBERON', page_size=page_size)] == curies
+
+        assert [r.curie for r in self.store.query(prefix='UBERON', limit=2)] == curies[:2]
+        assert list(self.store.query(prefix='UBERON', exclude_prefix='UBERON')) == []
+
+    def test_prefix_longest(self):
+        # the curie decides the prefix, not the namespace the iri starts with
+        class LocalId(oq.OntId):
+            _namespaces = type('LocalCuries', (oq.OntCuries.new(),), {})
+
+        LocalId._namespaces(oq.OntCuries())
+        LocalId._namespaces({'BRAIN': oq.OntId('UBERON:00009').iri})
+        store = oq.plugin.get('termstore')(self.path)
+        store.setup(instrumented=self.OntTerm)
+        store.OntId = LocalId
+        curies = [r.curie for r in self.store.query(prefix='UBERON')]
+        assert 'UBERON:0000955' not in [r.curie for r in store.query(prefix='UBERON')]
+        assert len(list(store.iter_terms('UBERON'))) == len(curies) - 1
+
+    def test_ontterm(self):
+        class OntTerm(oq.OntTerm): pass
+        OntTerm.query_init(oq.plugin.get('termstore')(self.path))
+        brain = OntTerm('UBERON:0000955')
+        assert brain.label == 'brain' and brain.validated
+        assert brain('rdfs:subClassOf', depth=99)
+
+    def test_scigraph(self):
+        export = {'nodes': [{'id': 'UBERON:0000955', 'lbl': 'brain',
+                             'meta': {'synonym': ['encephalon'],
+                                      'definition': ['the brain'],
+                                      'types': ['Class']}},
+                            {'id': 'UBERON:0000062', 'lbl': 'organ', 'meta': {'types': ['Class']}}],
+                  'edges': [{'sub': 'UBERON:0000955', 'pred': 'subClassOf', 'obj': 'UBERON:0000062'},
+                            {'sub': 'UBERON:0000062', 'pred': 'BFO:0000050', 'obj': 'UBERON:0000467'}]}
+        path = os.path.join(self.dir.name, 'scigraph-terms')
+        curies = {'UBERON': oq.OntId('UBERON:').iri, 'BFO': oq.OntId('BFO:').iri}
+        self.termstore.build_from_scigraph(export, path, curies)
+        store = oq.plugin.get('termstore')(path)
+        store.setup(instrumented=self.OntTerm)
+        brain, = store.query(term='Encephalon', predicates=('rdfs:subClassOf',), depth=2)
+        assert brain.curie == 'UBERON:0000955' and brain.label == 'brain'
+        assert brain.synonyms == ('encephalon',) and brain.definition == 'the brain'
+        assert brain.predicates['rdfs:subClassOf'] == (oq.OntId('UBERON:0000062'),)
+        organ, = store.query(curie='UBERON:0000062')
+        assert organ.predicates['partOf:'] == oq.OntId('UBERON:0000467')
+        assert list(store.query(label='encephalon')) == []
+
+    def test_not_a_term_store(self):
+        path = os.path.join(self.dir.name, 'snapshot')
+        self.remote.snapshot(path)
+        with self.assertRaises(ValueError):
+            oq.plugin.get('termstore')(path)
+
+
 @skipif_no_net
 class TestGitHub(ServiceBase, unittest.TestCase):
 
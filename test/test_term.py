@@ -76,6 +76,134 @@ class TestOntTerm(TestOntId):
         assert newot.predicates == ot.predicates
 
 
+class CountingTerms:
+    """ self.OntTerm queries self.remote which counts its queries """
+    lazy = False
+    remote_class = common.CountingRdflib
+
+    def setUp(self):
+        class OntTerm(oq.OntTerm):
+            lazy = self.lazy
+
+        self.remote = self.remote_class(common.test_graph)
+        OntTerm.query_init(self.remote)
+        OntTerm.clear_traversal_cache()
+        self.OntTerm = OntTerm
+
+
+class TestLazyOntTerm(CountingTerms, unittest.TestCase):
+    lazy = True
+
+    def test_construct_free(self):
+        terms = [self.OntTerm(f'UBERON:{i:0>7}') for i in range(100)]
+        assert self.remote.calls == 0
+        assert not any(t.bound for t in terms)
+        assert terms[0].curie == 'UBERON:0000000'
+
+    def test_first_access(self):
+        t = self.OntTerm('UBERON:0000955')
+        assert t.label == 'brain'
+        assert t.bound and t.validated
+        t.synonyms, t.definition, t.source
+        assert self.remote.calls == 1
+        eager = oq.OntTerm('UBERON:0000955')
+        assert t.synonyms == eager.synonyms and t.source is self.remote
+
+    def test_missing(self):
+        t = self.OntTerm('UBERON:999999999')
+        assert t.validated is False and t.label is None
+        assert self.remote.calls == 1
+
+    def test_deferred_validation(self):
+        t = self.OntTerm('UBERON:0000955', label='not brain')
+        with self.assertRaises(ValueError):
+            t.label
+
+    def test_other_attributes(self):
+        t = self.OntTerm('UBERON:0000955')
+        assert not hasattr(t, 'nope')
+        assert self.remote.calls == 0
+
+
+class TestLazyBindRetries(CountingTerms, unittest.TestCase):
+    lazy = True
+
+    class remote_class(common.CountingRdflib):
+        def query(self, *args, **kwargs):
+            for result in super().query(*args, **kwargs):
+                if self.calls == 1:
+                    raise ConnectionError('first call fails')
+
+                yield result
+
+    def test_failed_bind_retries(self):
+        t = self.OntTerm('UBERON:0000955')
+        with self.assertRaises(ConnectionError):
+            t.label
+
+        assert not t.bound
+        assert t.label == 'brain' and t.bound
+        assert self.remote.calls == 2
+
+
+class TestTraversalCache(CountingTerms, unittest.TestCase):
+    def calls(self, term, *args, **kwargs):
+        before = self.remote.calls
+        out = term(*args, **kwargs)
+        return out, self.remote.calls - before
+
+    def test_repeat(self):
+        t = self.OntTerm('UBERON:0000955')
+        o1, n1 = self.calls(t, 'rdfs:subClassOf', depth=2)
+        o2, n2 = self.calls(t, 'rdfs:subClassOf', depth=2)
+        assert (n1, n2) == (1, 0) and o1 == o2 and len(o1) == 2
+
+    def test_shared(self):
+        self.OntTerm('UBERON:0000955')('rdfs:subClassOf', depth=3)
+        t = self.OntTerm('UBERON:0000955')
+        out, n = self.calls(t, 'rdfs:subClassOf', depth=3)
+        assert n == 0 and len(out) == 3
+
+    def test_saturation(self):
+        t = self.OntTerm('UBERON:0000955')
+        deep, _ = self.calls(t, 'rdfs:subClassOf', depth=10)
+        deeper, n = self.calls(t, 'rdfs:subClassOf', depth=20)
+        assert n == 1 and set(deep) == set(deeper)
+        # 10 and 20 match so anything deeper than 10 is known
+        deepest, n = self.calls(t, 'rdfs:subClassOf', depth=99)
+        assert n == 0 and set(deepest) == set(deep)
+        assert len(t.predicates['rdfs:subClassOf']) == len(deepest)
+
+    def test_saturation_empty(self):
+        t = self.OntTerm('UBERON:0000955')
+        self.calls(t, 'hasPart:', depth=1)
+        out, n = self.calls(t, 'hasPart:', depth=5)
+        assert n == 0 and out == ()
+
+    def test_cycle(self):
+        t = self.OntTerm('TEMP:cycle-1')
+        for depth in (99, 99, 3):
+            assert len(t('rdfs:subClassOf', depth=depth)) == 3
+
+    def test_clear(self):
+        t = self.OntTerm('UBERON:0000955')
+        t('rdfs:subClassOf', depth=2)
+        t.clear_traversals()
+        _, n = self.calls(t, 'rdfs:subClassOf', depth=2)
+        assert n == 1
+        self.OntTerm.clear_traversal_cache()
+        _, n = self.calls(t, 'rdfs:subClassOf', depth=2)
+        assert n == 1
+
+    def test_as_term(self):
+        t = self.OntTerm('UBERON:0000955')
+        ids = t('rdfs:subClassOf')
+        terms = t('rdfs:subClassOf', asTerm=True)
+        assert [i.curie for i in ids] == [t.curie for t in terms]
+        assert isinstance(terms[0], self.OntTerm)
+        assert not isinstance(t('rdfs:subClassOf')[0], self.OntTerm)
+
+
 class TestInterveningInstrumented(unittest.TestCase):
     @classmethod
     def setUpClass(cls):
@@ -114,3 +242,162 @@ class TestInterveningInstrumented(unittest.TestCase):
         self.OntTerm1.query
         hrm = self.OntTerm1._uninstrumented_class()._instrumented_class()
         hrm.query
+
+
+class TestOntIdInterning(unittest.TestCase):
+    def setUp(self):
+        oq.OntId.set_interning()
+
+    def tearDown(self):
+        oq.OntId.set_interning(False)
+
+    def test_canonical(self):
+        a = oq.OntId('UBERON:0000955')
+        b = oq.OntId('UBERON:0000955')
+        c = oq.OntId('http://purl.obolibrary.org/obo/UBERON_0000955')
+        assert a is b is c
+        assert a.curie == 'UBERON:0000955'
+        assert oq.OntId(curie='UBERON:0000955') is not a  # only the positional form is interned
+
+    def test_generation(self):
+        a = oq.OntId('UBERON:0000955')
+        oq.OntCuries({'test-interning': 'http://example.org/test-interning/'})
+        b = oq.OntId('UBERON:0000955')
+        assert a is not b and a == b
+
+    def test_weak(self):
+        import gc
+        iri = 'http://purl.obolibrary.org/obo/UBERON_9999999'
+        oq.OntId(iri)
+        gc.collect()
+        assert not [k for k in oq.OntId._interned.keys() if k[-1] == iri]
+
+    def test_instrumented(self):
+        try:
+            oq.OntTerm.set_interning()
+            raise AssertionError('should have failed')
+        except TypeError:
+            pass
+
+        assert oq.OntTerm._interned is None
+
+
+class TestCompactOntId(unittest.TestCase):
+    def test_same_as_ontid(self):
+        bads = []
+        for prefix, namespace in common.CURIE_MAP.items():
+            for suffix in common.suffixes:
+                try:
+                    oid = oq.OntId(namespace + suffix)
+                except oq.OntId.Error:
+                    continue
+
+                cid = oq.CompactOntId(namespace + suffix)
+                for attr in ('curie', 'iri', 'prefix', 'suffix', 'namespace'):
+                    if getattr(oid, attr) != getattr(cid, attr):
+                        bads.append((attr, oid, cid))
+
+        assert not bads, bads[:10]
+
+    def test_from_curie(self):
+        cid = oq.CompactOntId('UBERON:0000955')
+        assert cid == oq.OntId('UBERON:0000955')
+        assert cid.curie == 'UBERON:0000955'
+        assert oq.CompactOntId(cid) is cid
+        assert oq.CompactOntId(oq.OntId('UBERON:0000955')) == cid
+        assert cid.asOntId().curie == cid.curie
+
+    def test_no_dict(self):
+        cid = oq.CompactOntId('UBERON:0000955')
+        assert not hasattr(cid, '__dict__')
+
+    def test_copy_pickle(self):
+        import pickle
+        cid = oq.CompactOntId('UBERON:0000955')
+        assert copy.deepcopy(cid).curie == cid.curie
+        assert pickle.loads(pickle.dumps(cid)).curie == cid.curie
+
+    def test_errors(self):
+        for bad, error in (('lol', oq.OntId.BadCurieError),
+                           ('not-a-prefix:lol', oq.OntId.UnknownPrefixError)):
+            try:
+                oq.CompactOntId(bad)
+                raise AssertionError(f'should have failed {bad}')
+            except error:
+                pass
+
+
+class TestBulk(unittest.TestCase):
+    def inputs(self):
+        for prefix, namespace in sorted(common.CURIE_MAP.items()):
+            if not prefix or 'ERROR' in namespace:
+                continue
+
+            for suffix in ('0000955', 'lol', '1232/123123/asdfasdf'):
+                yield prefix + ':' + suffix
+                yield namespace + suffix
+
+    def test_from_many(self):
+        inputs = list(self.inputs())
+        inputs += inputs[:10]  # repeats
+        inputs.append(oq.OntId('UBERON:0000955'))
+        expect = [oq.OntId(i) for i in inputs]
+        got = oq.OntId.from_many(inputs)
+        assert got == expect
+        assert ([(e.prefix, e.suffix, e.curie) for e in expect] ==
+                [(g.prefix, g.suffix, g.curie) for g in got])
+        assert got[-1] is inputs[-1]
+        assert got[0] is got[len(inputs) - 11]
+
+    def test_from_many_errors(self):
+        for bad, error in (('lol', oq.OntId.BadCurieError),
+                           ('not-a-prefix:lol', oq.OntId.UnknownPrefixError)):
+            try:
+                oq.OntId.from_many(['UBERON:0000955', bad])
+                raise AssertionError(f'should have failed {bad}')
+            except error:
+                pass
+
+    def test_qname_expand_many(self):
+        curies = [i for i in self.inputs() if not i.startswith('http')]
+        iris = oq.OntCuries.expand_many(curies)
+        assert iris == [oq.OntId(c).iri for c in curies]
+        assert oq.OntCuries.qname_many(iris) == [oq.OntCuries.qname(i) for i in iris]
+
+
+class LocalId(oq.OntId):
+    """ module level so that it can be pickled """
+    _namespaces = oq.OntCuries.new()
+
+
+class TestLazyPrefix(unittest.TestCase):
+    def test_lazy(self):
+        iri = 'http://example.org/lazy/ns/thing/1'
+        oid = oq.OntId(iri)
+        assert '_ps_stamp' not in oid.__dict__
+        assert oid.curie is None and oid.prefix is None
+        oq.OntCuries({'lazy-ns': 'http://example.org/lazy/ns/'})
+        assert oid.curie == 'lazy-ns:thing/1'
+        oq.OntCuries({'lazy-ns-thing': 'http://example.org/lazy/ns/thing/'})
+        assert (oid.prefix, oid.suffix) == ('lazy-ns-thing', '1')
+
+    def test_pickle(self):
+        import pickle
+        LocalId._namespaces({'local-ns': 'http://example.org/local/ns/'})
+        oid = LocalId('local-ns:1')
+        assert oid.prefix == 'local-ns'
+        loaded = pickle.loads(pickle.dumps(oid))
+        assert '_ps_stamp' not in loaded.__dict__
+        assert loaded == oid and loaded.curie == 'local-ns:1'
+
+    def test_set(self):
+        oid = oq.OntId('UBERON:0000955')
+        oid.suffix = 'lol'
+        assert oid.curie == 'UBERON:lol'
+
+    def test_curie_as_iri(self):
+        try:
+            oq.OntId(iri='UBERON:0000955')
+            raise AssertionError('should have failed')
+        except ValueError:
+            pass